@@ -0,0 +1,121 @@
+"""
+PIPELINE BENCHMARKS
+Reproducible offline benchmarks for the Nifty Relative Valuation Model
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+Runs the data pipeline against the SyntheticProvider so timings are not
+skewed by the network or rate limits.
+
+Usage:
+    python benchmarks.py                     # 50, 500 and 5,000 tickers
+    python benchmarks.py --tickers 500 --latency 0.05
+    python benchmarks.py --suite tail-risk --days 1250
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from data_providers import SyntheticProvider
+from financial_risk_modeling import CONFIDENCE_LEVELS, tail_risk
+from market_data import fetch_concurrently
+from snapshot_store import PriceArchive
+
+
+def timed(label, fn, results):
+    """Run fn(), record its wall time under label and return its result"""
+    start = time.perf_counter()
+    value = fn()
+    results.append((label, time.perf_counter() - start))
+    return value
+
+
+def benchmark_pipeline(n_tickers, latency=0.0, seed=42, period='5y'):
+    """Time each pipeline stage for a synthetic universe of n_tickers"""
+    provider = SyntheticProvider(n_tickers=n_tickers, seed=seed, latency=latency)
+    tickers = list(provider.universe())
+    results = []
+
+    # Ticker info: one call per ticker, concurrently
+    timed('info fetch (concurrent)',
+          lambda: fetch_concurrently(provider.get_info, tickers, max_workers=16), results)
+
+    # Price history: cold archive (full download) then warm (incremental)
+    workdir = tempfile.mkdtemp(prefix='nifty_bench_')
+    try:
+        archive = PriceArchive(os.path.join(workdir, 'bench.sqlite'), refresh_interval=0)
+        timed(f'price sync {period} (cold)',
+              lambda: archive.sync(tickers, period, provider.download), results)
+        timed(f'price sync {period} (warm)',
+              lambda: archive.sync(tickers, period, provider.download), results)
+        panel = timed('load price panel',
+                      lambda: archive.load_panel(tickers, period), results)
+        timed('panel returns', panel.returns, results)
+        archive.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def per_level_tail_risk(returns, confidence_levels=CONFIDENCE_LEVELS):
+    """
+    Reference VAR/CVaR the way FinancialRiskModel computed them: per
+    ticker and per level, a full np.percentile for VAR and again for CVaR
+    """
+    var = np.empty((len(confidence_levels), returns.shape[1]))
+    cvar = np.empty_like(var)
+    for i in range(returns.shape[1]):
+        column = returns[:, i]
+        for j, level in enumerate(confidence_levels):
+            var[j, i] = np.percentile(column, (1 - level) * 100)
+            cvar[j, i] = column[column <= np.percentile(column, (1 - level) * 100)].mean()
+    return var, cvar
+
+
+def benchmark_tail_risk(n_tickers, n_days=1250, seed=42, confidence_levels=CONFIDENCE_LEVELS):
+    """Time VAR/CVaR at several confidence levels for a (n_days x n_tickers) returns matrix"""
+    rng = np.random.default_rng(seed)
+    returns = 0.01 * rng.standard_t(4, size=(n_days, n_tickers))
+    results = []
+
+    timed('VaR/CVaR per ticker and level',
+          lambda: per_level_tail_risk(returns, confidence_levels), results)
+    timed('VaR/CVaR np.percentile by level',
+          lambda: [np.percentile(returns, (1 - level) * 100, axis=0) for level in confidence_levels], results)
+    timed('VaR/CVaR one partial sort',
+          lambda: tail_risk(returns, confidence_levels), results)
+
+    return results
+
+
+def print_results(n_tickers, results):
+    print(f"\n{n_tickers:,} tickers")
+    print("-" * 48)
+    for label, seconds in results:
+        print(f"  {label:<32} {seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated seconds per provider call')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--suite', choices=['pipeline', 'tail-risk', 'all'], default='all')
+    parser.add_argument('--days', type=int, default=1250,
+                        help='return observations per ticker for the tail-risk suite')
+    args = parser.parse_args()
+
+    for n in args.tickers:
+        results = []
+        if args.suite in ('pipeline', 'all'):
+            results += benchmark_pipeline(n, latency=args.latency, seed=args.seed)
+        if args.suite in ('tail-risk', 'all'):
+            results += benchmark_tail_risk(n, n_days=args.days, seed=args.seed)
+        print_results(n, results)
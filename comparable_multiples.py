@@ -6,11 +6,19 @@ Prof. V. Ravichandran | The Mountain Path - World of Finance
 
 Format: Average multiples from comparable companies in each sector
 Used to calculate implied valuation for target companies
+
+SECTOR_MULTIPLES is the static fallback; once the app feeds it universe
+snapshots, get_sector_multiples serves live statistics instead.
 """
 
+import bisect
+import threading
+
 import pandas as pd
 import numpy as np
 
+from valuation_thresholds import THRESHOLDS
+
 # Sector-wise Comparable Company Multiples (Recent Market Data)
 SECTOR_MULTIPLES = {
     'IT & Software': {
@@ -135,9 +143,311 @@ SECTOR_MULTIPLES = {
 }
 
 
+# Axes of the implied-valuation tensor
+MULTIPLE_TYPES = ['P/E', 'P/B', 'P/S', 'EV/EBITDA']
+STATISTICS = ['avg', 'median', 'high', 'low']
+
+# Financials each multiple type is applied to (in crores)
+MULTIPLE_BASES = {'P/E': 'net_income', 'P/B': 'book_value', 'P/S': 'revenue', 'EV/EBITDA': 'ebitda'}
+
+
+# ============================================================================
+# LIVE SECTOR MULTIPLES
+# ============================================================================
+
+# Quantiles reported as the 'low' and 'high' comparable multiples
+BAND_QUANTILES = (0.25, 0.75)
+
+# Positive multiples a sector needs before its live statistics are used
+MIN_PEERS = 2
+
+
+class OrderStatistics:
+    """
+    Sorted multiset of values with a running sum
+    
+    add/remove are a bisect plus a list insert/delete, so a quote refresh
+    updates only the values that moved; quantiles interpolate linearly
+    between order statistics (as np.percentile does).
+    """
+
+    def __init__(self):
+        self._values = []
+        self._sum = 0.0
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, value):
+        bisect.insort(self._values, value)
+        self._sum += value
+
+    def remove(self, value):
+        i = bisect.bisect_left(self._values, value)
+        if i < len(self._values) and self._values[i] == value:
+            del self._values[i]
+            self._sum -= value
+
+    def mean(self):
+        return self._sum / len(self._values) if self._values else np.nan
+
+    def quantile(self, q):
+        n = len(self._values)
+        if n == 0:
+            return np.nan
+        position = q * (n - 1)
+        lower = int(position)
+        upper = min(lower + 1, n - 1)
+        return self._values[lower] + (self._values[upper] - self._values[lower]) * (position - lower)
+
+
+class LiveSectorMultiples:
+    """
+    Comparable multiples per sector computed from the live universe
+    
+    update() takes a universe snapshot (a frame indexed by Sector, Ticker
+    with Company and multiple columns) and moves only the multiples that
+    changed since the last update in and out of per-sector OrderStatistics.
+    The whole universe is tracked too, as the comparable set of last resort.
+    """
+
+    def __init__(self, min_peers=MIN_PEERS, band_quantiles=BAND_QUANTILES):
+        self.min_peers = min_peers
+        self.band_quantiles = band_quantiles
+        self._stats = {}        # (sector or None, multiple) -> OrderStatistics
+        self._rows = {}         # ticker -> (sector, company, {multiple: value})
+        self._built_at = None
+        self._latest = None     # ((built_at, priced_at), frame) of the newest snapshot
+        self._lock = threading.Lock()
+
+    def _move(self, sector, multiple, old, new):
+        for key in (sector, None):
+            stats = self._stats.setdefault((key, multiple), OrderStatistics())
+            if old is not None:
+                stats.remove(old)
+            if new is not None:
+                stats.add(new)
+
+    def _set_row(self, ticker, sector, company, values):
+        old_sector, _, old_values = self._rows.get(ticker, (sector, None, {}))
+        for multiple in MULTIPLE_TYPES:
+            old, new = old_values.get(multiple), values.get(multiple)
+            if old == new and old_sector == sector:
+                continue
+            if old is not None:
+                self._move(old_sector, multiple, old, None)
+            if new is not None:
+                self._move(sector, multiple, None, new)
+        self._rows[ticker] = (sector, company, values)
+
+    def update(self, snapshot, changed=None):
+        """
+        Apply a universe snapshot
+        
+        changed: tickers repriced since the previous snapshot; only they are
+        re-read unless the snapshot was rebuilt (a new built_at), in which
+        case every row is diffed against what is held. Sessions may apply
+        their snapshots out of order; the changed rows are then read from
+        the newest snapshot seen, so an older one never overwrites them.
+        """
+        frame = snapshot.frame
+        built_at = getattr(snapshot, 'built_at', None)
+        version = (built_at or 0, getattr(snapshot, 'priced_at', None) or 0)
+        
+        with self._lock:
+            if self._latest is not None and version < self._latest[0]:
+                if changed is None:
+                    return
+                frame, built_at = self._latest[1], self._built_at
+            else:
+                self._latest = (version, frame)
+            
+            if changed is not None and built_at == self._built_at:
+                rows = frame[frame.index.get_level_values('Ticker').isin(list(changed))]
+            else:
+                rows = frame
+                present = set(frame.index.get_level_values('Ticker'))
+                for ticker in [t for t in self._rows if t not in present]:
+                    self._set_row(ticker, self._rows[ticker][0], None, {})
+                    del self._rows[ticker]
+            self._built_at = built_at
+            
+            columns = [rows[multiple].to_numpy(dtype=np.float64) for multiple in MULTIPLE_TYPES]
+            for i, (sector, ticker) in enumerate(rows.index):
+                values = {multiple: float(column[i]) for multiple, column in zip(MULTIPLE_TYPES, columns)
+                          if column[i] > 0}
+                self._set_row(ticker, sector, rows['Company'].iat[i], values)
+
+    def _summary(self, stats):
+        low, high = self.band_quantiles
+        return {
+            'avg': round(stats.mean(), 2),
+            'median': round(stats.quantile(0.5), 2),
+            'high': round(stats.quantile(high), 2),
+            'low': round(stats.quantile(low), 2),
+        }
+
+    def get(self, sector):
+        """
+        Multiples for a sector in the SECTOR_MULTIPLES format, plus 'source'
+        ('live', 'static' or 'market') per multiple
+        
+        Live sector statistics need min_peers positive multiples; below
+        that the static table is used, then the live market-wide figures.
+        """
+        with self._lock:
+            if not self._rows:
+                return SECTOR_MULTIPLES.get(sector, {})
+            
+            static = SECTOR_MULTIPLES.get(sector, {})
+            multiples, source = {}, {}
+            for multiple in MULTIPLE_TYPES:
+                sector_stats = self._stats.get((sector, multiple))
+                market_stats = self._stats.get((None, multiple))
+                if sector_stats is not None and len(sector_stats) >= self.min_peers:
+                    multiples[multiple], source[multiple] = self._summary(sector_stats), 'live'
+                elif multiple in static.get('multiples', {}):
+                    multiples[multiple], source[multiple] = static['multiples'][multiple], 'static'
+                elif market_stats is not None and len(market_stats) >= self.min_peers:
+                    multiples[multiple], source[multiple] = self._summary(market_stats), 'market'
+            
+            if not multiples:
+                return {}
+            
+            companies = [company for s, company, _ in self._rows.values() if s == sector]
+            return {
+                'companies': companies or static.get('companies', []),
+                'multiples': multiples,
+                'source': source,
+            }
+
+
+# Fed by the app with every universe snapshot; empty until then, in which
+# case get_sector_multiples serves the static table
+LIVE_SECTOR_MULTIPLES = LiveSectorMultiples()
+
+
+def update_sector_multiples(snapshot, changed=None):
+    """Refresh the live comparable multiples from a universe snapshot"""
+    LIVE_SECTOR_MULTIPLES.update(snapshot, changed)
+
+
 def get_sector_multiples(sector: str) -> dict:
-    """Get multiples for a specific sector"""
-    return SECTOR_MULTIPLES.get(sector, {})
+    """Get multiples for a specific sector (live when available, else static)"""
+    return LIVE_SECTOR_MULTIPLES.get(sector)
+
+
+def multiples_array(multiples: dict) -> np.ndarray:
+    """Sector multiples dict -> (4 multiple types x 4 statistics) array, NaN where missing"""
+    return np.array([
+        [multiples.get(multiple_type, {}).get(stat, np.nan) for stat in STATISTICS]
+        for multiple_type in MULTIPLE_TYPES
+    ], dtype=np.float64)
+
+
+def sector_multiples_array(sectors) -> np.ndarray:
+    """(N x 4 x 4) comparable multiples for a sequence of sector names"""
+    by_sector = {}
+    for sector in sectors:
+        if sector not in by_sector:
+            by_sector[sector] = multiples_array(get_sector_multiples(sector).get('multiples', {}))
+    return np.stack([by_sector[sector] for sector in sectors]) if len(sectors) else \
+        np.empty((0, len(MULTIPLE_TYPES), len(STATISTICS)))
+
+
+def implied_prices(multiple, base, debt, shares):
+    """
+    Implied value, market cap and share price; all arguments broadcast
+    
+    multiple x base is the implied EV for EV/EBITDA (debt = net debt) and
+    the market cap otherwise (debt = 0); when net debt would wipe out the
+    equity the EV itself is used. Shares are in millions, values in crores.
+    """
+    implied_value = multiple * base
+    implied_market_cap = implied_value - debt
+    implied_market_cap = np.where(implied_market_cap <= 0, implied_value, implied_market_cap)
+    return implied_value, implied_market_cap, implied_market_cap / (shares + 0.01) * 10
+
+
+def implied_valuation_tensor(financials: pd.DataFrame, multiples: np.ndarray) -> dict:
+    """
+    Implied valuation of N companies x 4 multiple types x 4 statistics
+    
+    Parameters:
+    -----------
+    financials : DataFrame
+        One row per company with the calculate_implied_valuation keys
+        (market_cap, net_income, book_value, revenue, ebitda, net_debt,
+        shares_outstanding, share_price); missing columns count as 0
+        (shares_outstanding as 1)
+    
+    multiples : ndarray
+        (N x 4 x 4) comparable multiples, or a single (4 x 4) array
+        broadcast to every company
+    
+    Returns:
+    --------
+    dict of (N x 4 x 4) arrays: 'multiple', 'current_multiple',
+    'implied_ev', 'implied_market_cap', 'implied_price', 'upside_downside'
+    and the boolean 'valid' mask
+    """
+    column = lambda key, default=0.0: (financials[key].to_numpy(dtype=np.float64, na_value=np.nan)
+                                       if key in financials else np.full(len(financials), default))
+    
+    market_cap = column('market_cap')
+    net_debt = column('net_debt')
+    share_price = column('share_price')
+    shares = column('shares_outstanding', 1.0)
+    base = np.stack([column(MULTIPLE_BASES[t]) for t in MULTIPLE_TYPES], axis=1)     # (N, 4)
+    multiple = np.broadcast_to(np.asarray(multiples, dtype=np.float64),
+                               (len(financials), len(MULTIPLE_TYPES), len(STATISTICS)))
+    
+    is_ev = np.array([t == 'EV/EBITDA' for t in MULTIPLE_TYPES])[None, :, None]         # (1, 4, 1)
+    debt = np.where(is_ev, net_debt[:, None, None], 0.0)                                 # (N, 4, 1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied_value, implied_market_cap, implied_price = implied_prices(
+            multiple, base[:, :, None], debt, shares[:, None, None])
+        price = share_price[:, None, None]
+        upside = np.where((implied_price > 0) & (price > 0), (implied_price - price) / price * 100, 0.0)
+        
+        current_multiple = np.where(base > 0, (market_cap[:, None] + debt[:, :, 0]) / base, 0.0)
+    
+    valid = (base > 0)[:, :, None] & (multiple > 0)
+    return {
+        'multiple': multiple,
+        'current_multiple': np.broadcast_to(current_multiple[:, :, None], multiple.shape),
+        'implied_ev': np.where(is_ev, implied_value, np.nan),
+        'implied_market_cap': implied_market_cap,
+        'implied_price': implied_price,
+        'current_price': np.broadcast_to(price, multiple.shape),
+        'upside_downside': upside,
+        'valid': valid,
+    }
+
+
+def implied_valuation_frame(financials: pd.DataFrame, multiples: np.ndarray) -> pd.DataFrame:
+    """
+    Tidy numeric DataFrame of implied valuations for many companies
+    
+    One row per (company, multiple type, statistic) with a usable base and
+    multiple; the company is taken from the financials index
+    """
+    tensor = implied_valuation_tensor(financials, multiples)
+    company, type_index, stat_index = np.nonzero(tensor['valid'])
+    
+    return pd.DataFrame({
+        'Company': financials.index.to_numpy()[company],
+        'Multiple Type': np.array(MULTIPLE_TYPES)[type_index],
+        'Statistic': np.array(STATISTICS)[stat_index],
+        'Multiple': tensor['multiple'][company, type_index, stat_index],
+        'Current Multiple': tensor['current_multiple'][company, type_index, stat_index],
+        'Implied EV': tensor['implied_ev'][company, type_index, stat_index],
+        'Implied Market Cap': tensor['implied_market_cap'][company, type_index, stat_index],
+        'Implied Price': tensor['implied_price'][company, type_index, stat_index],
+        'Current Price': tensor['current_price'][company, type_index, stat_index],
+        'Upside/Downside %': tensor['upside_downside'][company, type_index, stat_index],
+    })
 
 
 def calculate_implied_valuation(financials: dict, multiples: dict, multiple_type: str) -> dict:
@@ -167,175 +477,125 @@ def calculate_implied_valuation(financials: dict, multiples: dict, multiple_type
     --------
     dict : Valuation results
     """
+    if multiple_type not in MULTIPLE_TYPES or multiple_type not in multiples:
+        return {}
+    
+    tensor = implied_valuation_tensor(pd.DataFrame([financials]), multiples_array(multiples))
+    t = MULTIPLE_TYPES.index(multiple_type)
     
     results = {}
+    for s, method in enumerate(STATISTICS):
+        if not tensor['valid'][0, t, s]:
+            continue
+        results[method] = {
+            'multiple': float(tensor['multiple'][0, t, s]),
+            'implied_market_cap': float(tensor['implied_market_cap'][0, t, s]),
+            'implied_price': float(tensor['implied_price'][0, t, s]),
+            'current_price': financials['share_price'],
+            'upside_downside': float(tensor['upside_downside'][0, t, s]),
+            'current_multiple': float(tensor['current_multiple'][0, t, s])
+        }
+        if multiple_type == 'EV/EBITDA':
+            results[method] = {'multiple': results[method]['multiple'],
+                               'implied_ev': float(tensor['implied_ev'][0, t, s]),
+                               **results[method]}
     
-    # Convert shares from millions to actual number for calculation
-    shares_outstanding = financials.get('shares_outstanding', 1) * 10  # millions to crore equivalent
-    if shares_outstanding == 0:
-        shares_outstanding = 1
+    return results
+
+
+# ============================================================================
+# VALUATION SUMMARY
+# ============================================================================
+
+# Render-time formats for the numeric summary columns
+SUMMARY_FORMATS = {
+    'Comparable Multiple': '{:.2f}x',
+    'Implied Price': '₹{:.0f}',
+    'Current Price': '₹{:.0f}',
+    'Upside/Downside %': '{:.1f}%',
+}
+
+
+def _upside_status(upside: np.ndarray, sectors: np.ndarray) -> np.ndarray:
+    """Upside band label per row, one np.searchsorted per distinct sector"""
+    status = np.empty(len(upside), dtype=object)
+    for sector in pd.unique(sectors):
+        rows = sectors == sector
+        bands = THRESHOLDS.get('upside', 'implied', sector)
+        status[rows] = np.array(bands.bands, dtype=object)[bands.band_array(upside[rows])]
+    return status
+
+
+def universe_valuation_summary(financials: pd.DataFrame, sectors) -> pd.DataFrame:
+    """
+    Median-multiple valuation summary for many companies at once
     
-    if multiple_type == 'P/E' and financials.get('net_income', 0) > 0:
-        # P/E = Market Cap / Net Income
-        # Implied Market Cap = P/E × Net Income
-        # Implied Price = (Implied Market Cap / Shares Outstanding) × 10 (convert crore to rupee value)
-        
-        net_income = financials.get('net_income', 0.1)
-        if net_income <= 0:
-            net_income = 0.1
-        
-        current_pe = financials['market_cap'] / net_income if net_income > 0 else 0
-        
-        for method in ['avg', 'median', 'high', 'low']:
-            multiple = multiples['P/E'].get(method)
-            if multiple and multiple > 0:
-                implied_market_cap = multiple * net_income
-                # Implied Price per Share = Market Cap (in crores) / Shares (in millions) × 10
-                implied_price = (implied_market_cap / (financials.get('shares_outstanding', 1) + 0.01)) * 10
-                
-                if implied_price > 0 and financials['share_price'] > 0:
-                    upside = ((implied_price - financials['share_price']) / financials['share_price']) * 100
-                else:
-                    upside = 0
-                
-                results[method] = {
-                    'multiple': multiple,
-                    'implied_market_cap': implied_market_cap,
-                    'implied_price': implied_price,
-                    'current_price': financials['share_price'],
-                    'upside_downside': upside,
-                    'current_multiple': current_pe
-                }
-    
-    elif multiple_type == 'P/B' and financials.get('book_value', 0) > 0:
-        # P/B = Market Cap / Book Value
-        # Implied Market Cap = P/B × Book Value
-        # Implied Price = (Implied Market Cap / Shares Outstanding) × 10
-        
-        book_value = financials.get('book_value', 0.1)
-        if book_value <= 0:
-            book_value = 0.1
-        
-        current_pb = financials['market_cap'] / book_value if book_value > 0 else 0
-        
-        for method in ['avg', 'median', 'high', 'low']:
-            multiple = multiples['P/B'].get(method)
-            if multiple and multiple > 0:
-                implied_market_cap = multiple * book_value
-                implied_price = (implied_market_cap / (financials.get('shares_outstanding', 1) + 0.01)) * 10
-                
-                if implied_price > 0 and financials['share_price'] > 0:
-                    upside = ((implied_price - financials['share_price']) / financials['share_price']) * 100
-                else:
-                    upside = 0
-                
-                results[method] = {
-                    'multiple': multiple,
-                    'implied_market_cap': implied_market_cap,
-                    'implied_price': implied_price,
-                    'current_price': financials['share_price'],
-                    'upside_downside': upside,
-                    'current_multiple': current_pb
-                }
-    
-    elif multiple_type == 'P/S' and financials.get('revenue', 0) > 0:
-        # P/S = Market Cap / Revenue
-        # Implied Market Cap = P/S × Revenue
-        # Implied Price = (Implied Market Cap / Shares Outstanding) × 10
-        
-        revenue = financials.get('revenue', 0.1)
-        if revenue <= 0:
-            revenue = 0.1
-        
-        current_ps = financials['market_cap'] / revenue if revenue > 0 else 0
-        
-        for method in ['avg', 'median', 'high', 'low']:
-            multiple = multiples['P/S'].get(method)
-            if multiple and multiple > 0:
-                implied_market_cap = multiple * revenue
-                implied_price = (implied_market_cap / (financials.get('shares_outstanding', 1) + 0.01)) * 10
-                
-                if implied_price > 0 and financials['share_price'] > 0:
-                    upside = ((implied_price - financials['share_price']) / financials['share_price']) * 100
-                else:
-                    upside = 0
-                
-                results[method] = {
-                    'multiple': multiple,
-                    'implied_market_cap': implied_market_cap,
-                    'implied_price': implied_price,
-                    'current_price': financials['share_price'],
-                    'upside_downside': upside,
-                    'current_multiple': current_ps
-                }
-    
-    elif multiple_type == 'EV/EBITDA' and financials.get('ebitda', 0) > 0:
-        # EV = EV/EBITDA × EBITDA
-        # Market Cap = EV - Net Debt
-        # Implied Price = (Implied Market Cap / Shares Outstanding) × 10
-        
-        ebitda = financials.get('ebitda', 0.1)
-        if ebitda <= 0:
-            ebitda = 0.1
-        
-        net_debt = financials.get('net_debt', 0)
-        current_ev = (financials['market_cap'] + net_debt) / ebitda if ebitda > 0 else 0
-        
-        for method in ['avg', 'median', 'high', 'low']:
-            multiple = multiples['EV/EBITDA'].get(method)
-            if multiple and multiple > 0:
-                implied_ev = multiple * ebitda
-                implied_market_cap = implied_ev - net_debt
-                
-                if implied_market_cap <= 0:
-                    implied_market_cap = multiple * ebitda  # Use EV if MC is negative
-                
-                implied_price = (implied_market_cap / (financials.get('shares_outstanding', 1) + 0.01)) * 10
-                
-                if implied_price > 0 and financials['share_price'] > 0:
-                    upside = ((implied_price - financials['share_price']) / financials['share_price']) * 100
-                else:
-                    upside = 0
-                
-                results[method] = {
-                    'multiple': multiple,
-                    'implied_ev': implied_ev,
-                    'implied_market_cap': implied_market_cap,
-                    'implied_price': implied_price,
-                    'current_price': financials['share_price'],
-                    'upside_downside': upside,
-                    'current_multiple': current_ev
-                }
+    Parameters:
+    -----------
+    financials : DataFrame
+        One row per company (see implied_valuation_tensor), indexed by ticker
     
-    return results
+    sectors : sequence of sector names aligned with the rows
+    
+    Returns:
+    --------
+    Numeric DataFrame: Ticker (the financials index), Sector, Valuation
+    Method, Comparable Multiple, Implied Price, Current Price,
+    Upside/Downside %, Status
+    """
+    sectors = np.asarray(sectors, dtype=object)
+    implied = implied_valuation_frame(financials, sector_multiples_array(sectors))
+    median = implied[implied['Statistic'] == 'median'].reset_index(drop=True)
+    
+    row_sector = sectors[financials.index.get_indexer(median['Company'])]
+    upside = median['Upside/Downside %'].to_numpy()
+    
+    return pd.DataFrame({
+        'Ticker': median['Company'],
+        'Sector': row_sector,
+        'Valuation Method': median['Multiple Type'],
+        'Comparable Multiple': median['Multiple'],
+        'Implied Price': median['Implied Price'],
+        'Current Price': median['Current Price'],
+        'Upside/Downside %': upside,
+        'Status': _upside_status(upside, row_sector),
+    })
 
 
-def get_valuation_summary(financials: dict, sector: str) -> pd.DataFrame:
-    """Get complete valuation summary using all multiples"""
+def snapshot_financials(snapshot) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Financials (in crores, shares in millions) for every stock of a
+    universe snapshot, from its multiples and fundamentals frames
     
-    sector_multiples = get_sector_multiples(sector)
+    Returns (financials indexed by ticker, array of sectors aligned with
+    the rows), ready for universe_valuation_summary
+    """
+    flat = snapshot.frame.reset_index().set_index('Ticker')
+    fundamentals = snapshot.fundamentals.reindex(flat.index)
+    shares = fundamentals['Shares']
     
-    if not sector_multiples:
-        return pd.DataFrame()
+    financials = pd.DataFrame({
+        'market_cap': flat['Market Cap (Cr)'],
+        'net_income': fundamentals['EPS'] * shares / 1e7,
+        'book_value': fundamentals['BVPS'] * shares / 1e7,
+        'revenue': fundamentals['SPS'] * shares / 1e7,
+        'ebitda': fundamentals['EBITDA'] / 1e7,
+        'net_debt': fundamentals['Net Debt'].fillna(0) / 1e7,
+        'shares_outstanding': shares / 1e6,
+        'share_price': flat['Price'],
+    }, index=flat.index)
+    return financials, flat['Sector'].to_numpy()
+
+
+def get_valuation_summary(financials: dict, sector: str) -> pd.DataFrame:
+    """
+    Get complete valuation summary using all multiples
     
-    summary_data = []
+    Values stay numeric; format them with SUMMARY_FORMATS (via a Styler)
+    when rendering
+    """
+    if not get_sector_multiples(sector):
+        return pd.DataFrame()
     
-    for multiple_type in ['P/E', 'P/B', 'P/S', 'EV/EBITDA']:
-        if multiple_type in sector_multiples['multiples']:
-            results = calculate_implied_valuation(financials, sector_multiples['multiples'], multiple_type)
-            
-            if results:
-                median_result = results.get('median', {})
-                
-                if median_result:
-                    summary_data.append({
-                        'Valuation Method': multiple_type,
-                        'Comparable Multiple': f"{median_result['multiple']:.2f}x",
-                        'Implied Price': f"₹{median_result['implied_price']:.0f}",
-                        'Current Price': f"₹{median_result['current_price']:.0f}",
-                        'Upside/Downside': f"{median_result['upside_downside']:.1f}%",
-                        'Status': 'Undervalued' if median_result['upside_downside'] > 5 else 
-                                 ('Overvalued' if median_result['upside_downside'] < -5 else 'Fair Valued')
-                    })
-    
-    return pd.DataFrame(summary_data)
+    summary = universe_valuation_summary(pd.DataFrame([financials]), [sector])
+    return summary.drop(columns=['Ticker', 'Sector'])
@@ -0,0 +1,441 @@
+"""
+MARKET DATA PROVIDERS
+Pluggable data sources for the Nifty Relative Valuation Model
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+Every provider answers the same questions:
+- get_info(ticker): yfinance-style info dict for one ticker
+- download(tickers, period=None, start=None): yf.download-style OHLCV
+  frame with (Price, Ticker) MultiIndex columns
+- get_quotes(tickers): latest price per ticker, one batched call
+  (defaults to the last close of a short download)
+
+Providers:
+1. YFinanceProvider    - live Yahoo Finance data (default)
+2. RecordReplayProvider - records real responses to disk and replays them
+3. SyntheticProvider   - deterministic generated universe of 50-5,000
+                         tickers for offline, reproducible benchmarks
+4. ResilientProvider   - wraps a network provider with rate limiting,
+                         retries and a per-host circuit breaker
+
+Select with the NIFTY_DATA_PROVIDER environment variable
+('yfinance', 'record', 'replay' or 'synthetic').
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from market_data import split_ohlcv, period_start, has_price, last_prices, OHLCV_COLUMNS
+from resilience import (FetchError, TokenBucket, CircuitBreaker, retry_with_backoff,
+                        as_fetch_error)
+
+DEFAULT_REPLAY_DIR = os.environ.get(
+    'NIFTY_REPLAY_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.market_cache', 'replay')
+)
+
+# Sectors used for generated tickers (mirrors the Nifty 50 classification)
+SYNTHETIC_SECTORS = [
+    'IT & Software', 'Financial Services', 'Consumer & FMCG', 'Pharmaceuticals',
+    'Automobiles', 'Energy & Utilities', 'Metals & Mining', 'Construction & Materials',
+    'Telecom', 'Healthcare', 'Holding Companies', 'Infrastructure',
+]
+
+
+def build_ohlcv_frame(frames):
+    """Combine per-ticker OHLCV frames into a yf.download-style frame"""
+    if not frames:
+        return pd.DataFrame()
+
+    combined = pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+    combined = combined.swaplevel(0, 1, axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+    combined.index.name = 'Date'
+    return combined
+
+
+# ============================================================================
+# 1. PROVIDER INTERFACE
+# ============================================================================
+
+class MarketDataProvider:
+    """Base class for market data sources"""
+
+    name = 'base'
+    host = 'local'
+
+    def get_info(self, ticker):
+        """yfinance-style info dict for one ticker"""
+        raise NotImplementedError
+
+    def download(self, tickers, period=None, start=None):
+        """yf.download-style OHLCV frame for a list of tickers"""
+        raise NotImplementedError
+
+    def get_quotes(self, tickers):
+        """Latest price per ticker (tickers without a price are left out)"""
+        tickers = list(tickers)
+        return last_prices(self.download(tickers, period='5d'), tickers)
+
+
+# ============================================================================
+# 2. YAHOO FINANCE
+# ============================================================================
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance via yfinance"""
+
+    name = 'yfinance'
+    host = 'query1.finance.yahoo.com'
+
+    def get_info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def download(self, tickers, period=None, start=None):
+        if start is not None:
+            return yf.download(list(tickers), start=start, progress=False, group_by='column')
+        return yf.download(list(tickers), period=period, progress=False, group_by='column')
+
+
+# ============================================================================
+# 3. RECORD / REPLAY
+# ============================================================================
+
+class RecordReplayProvider(MarketDataProvider):
+    """
+    Capture real responses to disk, then serve them back without network
+
+    mode='record': forward to `inner` and save every response
+    mode='replay': serve saved responses only (missing data -> empty)
+
+    Info dicts are stored as info/<ticker>.json and price history as
+    history/<ticker>.pkl (merged across recordings), so a replay can
+    answer any period or start date covered by the recordings.
+    """
+
+    name = 'replay'
+
+    @property
+    def host(self):
+        return self.inner.host if self.mode == 'record' else 'local'
+
+    def __init__(self, inner=None, path=DEFAULT_REPLAY_DIR, mode='replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown mode: {mode}")
+        if mode == 'record' and inner is None:
+            raise ValueError("Record mode needs an inner provider")
+
+        self.inner = inner
+        self.path = path
+        self.mode = mode
+        os.makedirs(os.path.join(path, 'info'), exist_ok=True)
+        os.makedirs(os.path.join(path, 'history'), exist_ok=True)
+
+    def _info_path(self, ticker):
+        return os.path.join(self.path, 'info', f'{ticker}.json')
+
+    def _history_path(self, ticker):
+        return os.path.join(self.path, 'history', f'{ticker}.pkl')
+
+    def get_info(self, ticker):
+        if self.mode == 'record':
+            info = self.inner.get_info(ticker)
+            if info:
+                with open(self._info_path(ticker), 'w') as f:
+                    json.dump(info, f, default=str)
+            return info
+
+        if not os.path.exists(self._info_path(ticker)):
+            return None
+        with open(self._info_path(ticker)) as f:
+            return json.load(f)
+
+    def download(self, tickers, period=None, start=None):
+        tickers = list(tickers)
+
+        if self.mode == 'record':
+            raw = self.inner.download(tickers, period=period, start=start)
+            for ticker, frame in split_ohlcv(raw, tickers).items():
+                path = self._history_path(ticker)
+                if os.path.exists(path):
+                    stored = pd.read_pickle(path)
+                    frame = pd.concat([stored, frame])
+                    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+                frame.to_pickle(path)
+            return raw
+
+        since = pd.Timestamp(start) if start is not None else period_start(period or 'max')
+        frames = {}
+        for ticker in tickers:
+            path = self._history_path(ticker)
+            if not os.path.exists(path):
+                continue
+            frame = pd.read_pickle(path)
+            if since is not None:
+                frame = frame.loc[frame.index >= since]
+            if len(frame):
+                frames[ticker] = frame
+
+        return build_ohlcv_frame(frames)
+
+
+# ============================================================================
+# 4. SYNTHETIC UNIVERSE
+# ============================================================================
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic generated market data for any number of tickers
+
+    Each ticker's fundamentals and price path are derived from a seed
+    built from the provider seed and the ticker symbol, so the same
+    ticker always produces the same data (across runs and machines).
+
+    latency: optional seconds slept per call, to emulate network round-trips
+    history_days: business days of price history generated per ticker
+    quote_interval: seconds per quote tick; each ticker's quote moves
+                    every 1-4 ticks, so only part of the universe changes
+                    between two refreshes
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, n_tickers=50, seed=42, latency=0.0, history_days=2520, end=None,
+                 quote_interval=60.0):
+        self.n_tickers = n_tickers
+        self.seed = seed
+        self.latency = latency
+        self.history_days = history_days
+        self.quote_interval = quote_interval
+        self.end = pd.Timestamp(end if end is not None else pd.Timestamp.today()).normalize()
+        self.dates = pd.bdate_range(end=self.end, periods=history_days, name='Date')
+
+    def _rng(self, ticker, stream):
+        key = zlib.crc32(f'{ticker}|{stream}'.encode())
+        return np.random.default_rng([self.seed, key])
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def universe(self):
+        """NIFTY_50_DATA-style mapping for the generated tickers"""
+        return {
+            f'SYN{i:04d}.NS': {
+                'Company': f'Synthetic Company {i:04d}',
+                'Sector': SYNTHETIC_SECTORS[i % len(SYNTHETIC_SECTORS)],
+            }
+            for i in range(self.n_tickers)
+        }
+
+    def get_info(self, ticker):
+        self._sleep()
+        rng = self._rng(ticker, 'info')
+
+        price = float(rng.lognormal(np.log(1500), 0.8))
+        shares = float(rng.uniform(2e8, 6e9))
+        pe = float(rng.lognormal(np.log(24), 0.45))
+        pb = float(rng.lognormal(np.log(3.5), 0.6))
+        ps = float(rng.lognormal(np.log(3.0), 0.6))
+        ev_ebitda = float(rng.lognormal(np.log(15), 0.4))
+        market_cap = price * shares
+        revenue = market_cap / ps
+        ebitda = revenue * float(rng.uniform(0.08, 0.35))
+        total_debt = market_cap * float(rng.uniform(0.0, 0.5))
+        total_cash = market_cap * float(rng.uniform(0.0, 0.15))
+
+        return {
+            'symbol': ticker,
+            'currentPrice': price,
+            'regularMarketPrice': price,
+            'trailingPE': pe,
+            'priceToBook': pb,
+            'priceToSalesTrailing12Months': ps,
+            'enterpriseToEbitda': ev_ebitda,
+            'dividendYield': float(rng.uniform(0.0, 0.04)),
+            'marketCap': market_cap,
+            'fiftyTwoWeekHigh': price * float(rng.uniform(1.02, 1.5)),
+            'fiftyTwoWeekLow': price * float(rng.uniform(0.6, 0.98)),
+            'earningsGrowth': float(rng.normal(0.12, 0.15)),
+            'sharesOutstanding': shares,
+            'trailingEps': price / pe,
+            'bookValue': price / pb,
+            'revenuePerShare': revenue / shares,
+            'totalRevenue': revenue,
+            'ebitda': ebitda,
+            'totalDebt': total_debt,
+            'totalCash': total_cash,
+        }
+
+    def get_quotes(self, tickers, now=None):
+        self._sleep()
+        tick = int((time.time() if now is None else now) // self.quote_interval)
+
+        quotes = {}
+        for ticker in dict.fromkeys(tickers):
+            base = self._rng(ticker, 'info').lognormal(np.log(1500), 0.8)
+            every = int(self._rng(ticker, 'quote').integers(1, 5))
+            move = self._rng(ticker, f'quote|{tick // every}').normal(0, 0.01)
+            quotes[ticker] = float(base * np.exp(move))
+        return quotes
+
+    def _history(self, ticker):
+        rng = self._rng(ticker, 'history')
+        dates = self.dates
+
+        drift = rng.normal(0.0004, 0.0003)
+        vol = rng.uniform(0.01, 0.03)
+        returns = rng.normal(drift, vol, len(dates))
+        close = float(rng.lognormal(np.log(1500), 0.8)) * np.exp(np.cumsum(returns))
+
+        spread = np.abs(rng.normal(0, vol / 2, len(dates)))
+        open_ = close * np.exp(rng.normal(0, vol / 3, len(dates)))
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        volume = rng.lognormal(np.log(2e6), 0.5, len(dates)).round()
+
+        return pd.DataFrame(
+            np.column_stack([open_, high, low, close, volume]),
+            index=dates, columns=OHLCV_COLUMNS
+        )
+
+    def download(self, tickers, period=None, start=None):
+        self._sleep()
+        since = pd.Timestamp(start) if start is not None else period_start(period or 'max', self.end)
+
+        frames = {}
+        for ticker in dict.fromkeys(tickers):
+            frame = self._history(ticker)
+            frames[ticker] = frame.loc[frame.index >= since] if since is not None else frame
+
+        return build_ohlcv_frame(frames)
+
+
+# ============================================================================
+# 5. RESILIENT WRAPPER
+# ============================================================================
+
+class ResilientProvider(MarketDataProvider):
+    """
+    Rate-limited, retrying, circuit-broken view of another provider
+
+    - every upstream call first takes a token from the shared TokenBucket
+    - retryable failures (throttling, network, timeouts) are retried with
+      jittered exponential backoff
+    - repeated failures open the breaker for the inner provider's host;
+      while open, calls fail fast with kind 'circuit_open' so callers can
+      fall back to the persisted snapshot
+    - every failure is raised as a structured FetchError
+    """
+
+    # Breakers are shared by every wrapper talking to the same host
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+
+    def __init__(self, inner, limiter=None, attempts=3, base_delay=0.5,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.inner = inner
+        self.name = inner.name
+        self.host = inner.host
+        self.limiter = limiter or TokenBucket()
+        self.attempts = attempts
+        self.base_delay = base_delay
+
+        with self._breakers_lock:
+            self.breaker = self._breakers.setdefault(
+                self.host, CircuitBreaker(failure_threshold, reset_timeout)
+            )
+
+    def _call(self, label, fn):
+        if not self.breaker.allow():
+            raise FetchError(label, 'circuit_open', retry_after=self.breaker.retry_after(),
+                             detail=f"Circuit breaker open for {self.host}")
+
+        def attempt():
+            self.limiter.acquire()
+            try:
+                return fn()
+            except Exception as e:
+                raise as_fetch_error(label, e)
+
+        try:
+            value = retry_with_backoff(attempt, attempts=self.attempts, base_delay=self.base_delay,
+                                       should_retry=lambda e: e.retryable)
+        except FetchError as e:
+            # Missing tickers say nothing about the health of the host
+            if e.kind in ('not_found', 'no_data'):
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        return value
+
+    def get_info(self, ticker):
+        info = self._call(ticker, lambda: self.inner.get_info(ticker))
+        if not has_price(info):
+            raise FetchError(ticker, 'no_data', "No price in upstream response")
+        return info
+
+    @staticmethod
+    def _label(tickers):
+        return ','.join(tickers) if len(tickers) <= 3 else f"{len(tickers)} tickers"
+
+    def download(self, tickers, period=None, start=None):
+        tickers = list(tickers)
+        return self._call(self._label(tickers), lambda: self.inner.download(tickers, period=period, start=start))
+
+    def get_quotes(self, tickers):
+        tickers = list(tickers)
+        return self._call(self._label(tickers), lambda: self.inner.get_quotes(tickers))
+
+
+# ============================================================================
+# PROVIDER SELECTION
+# ============================================================================
+
+def get_provider(name=None):
+    """
+    Build the configured provider
+
+    name: 'yfinance', 'record', 'replay' or 'synthetic'
+          (defaults to the NIFTY_DATA_PROVIDER environment variable)
+    """
+    name = (name or os.environ.get('NIFTY_DATA_PROVIDER', 'yfinance')).lower()
+
+    if name == 'yfinance':
+        return ResilientProvider(YFinanceProvider())
+    if name == 'record':
+        return RecordReplayProvider(ResilientProvider(YFinanceProvider()), mode='record')
+    if name == 'replay':
+        return RecordReplayProvider(mode='replay')
+    if name == 'synthetic':
+        return SyntheticProvider(
+            n_tickers=int(os.environ.get('NIFTY_SYNTHETIC_TICKERS', 50)),
+            seed=int(os.environ.get('NIFTY_SYNTHETIC_SEED', 42)),
+        )
+
+    raise ValueError(f"Unknown data provider: {name}")
+
+
+# Example usage
+if __name__ == "__main__":
+
+    provider = SyntheticProvider(n_tickers=5)
+    tickers = list(provider.universe())
+
+    raw = provider.download(tickers, period='1mo')
+    print(f"Downloaded {len(raw)} bars for {len(tickers)} synthetic tickers")
+
+    info = provider.get_info(tickers[0])
+    print(f"{tickers[0]}: price ₹{info['currentPrice']:.2f}, P/E {info['trailingPE']:.2f}")
+
+    quotes = provider.get_quotes(tickers)
+    print(f"{tickers[0]}: latest quote ₹{quotes[tickers[0]]:.2f}")
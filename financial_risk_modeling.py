@@ -5,8 +5,11 @@ Advanced Relative Valuation & Risk Analysis Framework
 Prof. V. Ravichandran | 28+ Years Corporate Finance & Banking Experience
 
 This module provides comprehensive tools for:
-1. Relative Valuation Analysis (P/E, P/B, P/S, EV/EBITDA)
-2. Financial Risk Modeling (VAR, CVaR, Sharpe Ratio)
+1. Relative Valuation Analysis (P/E, P/B, P/S, EV/EBITDA), per company
+   or for a whole universe at once (BatchRelativeValuation)
+2. Financial Risk Modeling (VAR, CVaR, Sharpe Ratio), per return series
+   or for a whole returns matrix at once (RiskEngine), over the full
+   sample or rolling windows
 3. Portfolio Risk Assessment
 4. Sector Risk Metrics
 5. Liquidity & Solvency Analysis
@@ -19,6 +22,8 @@ from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+from valuation_thresholds import THRESHOLDS
+
 # ============================================================================
 # 1. RELATIVE VALUATION MODULE
 # ============================================================================
@@ -57,6 +62,14 @@ class RelativeValuation:
         self.valuation_metrics = {}
         self.risk_signals = []
         
+    def _flag(self, metric, value):
+        """Record the risk flag (if any) for a metric from the threshold table"""
+        if np.isnan(value):
+            return
+        flag = THRESHOLDS.classify('flag', metric, value)
+        if flag:
+            self.risk_signals.append(flag)
+    
     def calculate_pe_ratio(self):
         """
         Price-to-Earnings Ratio
@@ -73,10 +86,7 @@ class RelativeValuation:
         pe = self.data['current_price'] / self.data['earnings_per_share']
         self.valuation_metrics['P/E'] = pe
         
-        if pe < 12:
-            self.risk_signals.append("P/E suggests undervaluation")
-        elif pe > 25:
-            self.risk_signals.append("P/E suggests overvaluation")
+        self._flag('P/E', pe)
         
         return pe
     
@@ -96,10 +106,7 @@ class RelativeValuation:
         pb = self.data['current_price'] / self.data['book_value_per_share']
         self.valuation_metrics['P/B'] = pb
         
-        if pb < 1:
-            self.risk_signals.append("P/B suggests deep value opportunity")
-        elif pb > 3:
-            self.risk_signals.append("P/B suggests potential overvaluation")
+        self._flag('P/B', pb)
         
         return pb
     
@@ -144,10 +151,7 @@ class RelativeValuation:
         ev_ebitda = enterprise_value / self.data['ebitda']
         self.valuation_metrics['EV/EBITDA'] = ev_ebitda
         
-        if ev_ebitda < 8:
-            self.risk_signals.append("EV/EBITDA suggests undervaluation")
-        elif ev_ebitda > 15:
-            self.risk_signals.append("EV/EBITDA suggests overvaluation")
+        self._flag('EV/EBITDA', ev_ebitda)
         
         return ev_ebitda
     
@@ -175,10 +179,7 @@ class RelativeValuation:
         peg = pe / earnings_growth
         self.valuation_metrics['PEG'] = peg
         
-        if peg < 1:
-            self.risk_signals.append("PEG suggests undervaluation for growth rate")
-        elif peg > 1.5:
-            self.risk_signals.append("PEG suggests overvaluation for growth rate")
+        self._flag('PEG', peg)
         
         return peg
     
@@ -217,40 +218,203 @@ class RelativeValuation:
         """
         score = 50  # Neutral starting point
         
-        pe = self.valuation_metrics.get('P/E')
-        if pe and pe < 15:
-            score += 10
-        elif pe and pe > 25:
-            score -= 10
+        for metric in ['P/E', 'P/B', 'P/S', 'EV/EBITDA', 'PEG']:
+            value = self.valuation_metrics.get(metric)
+            if value and not np.isnan(value):
+                score += THRESHOLDS.classify('score', metric, value)
         
-        pb = self.valuation_metrics.get('P/B')
-        if pb and pb < 1:
-            score += 15
-        elif pb and pb > 3:
-            score -= 10
-        
-        ps = self.valuation_metrics.get('P/S')
-        if ps and ps < 1:
-            score += 10
-        elif ps and ps > 3:
-            score -= 10
+        return np.clip(score, 0, 100)
+
+def _masked_divide(numerator, denominator):
+    """numerator / denominator as a masked array, masked where the denominator is 0 or NaN"""
+    numerator = np.ma.asarray(numerator, dtype=np.float64)
+    denominator = np.ma.asarray(denominator, dtype=np.float64)
+    invalid = np.ma.getmaskarray(denominator) | (denominator.filled(0) == 0) | np.isnan(denominator.filled(0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = numerator.filled(np.nan) / denominator.filled(1)
+    return np.ma.masked_array(result, mask=invalid | np.ma.getmaskarray(numerator) | np.isnan(result))
+
+
+class BatchRelativeValuation:
+    """
+    Relative Valuation for many companies at once
+    
+    Columnar counterpart of RelativeValuation: each input is an array (one
+    entry per company) and every metric is computed for all rows with
+    NumPy. Where RelativeValuation returns None (zero EPS, zero EBITDA,
+    zero growth, ...), the row is masked instead.
+    """
+    
+    METRICS = ['P/E', 'P/B', 'P/S', 'EV/EBITDA', 'PEG', 'Dividend Yield %']
+    
+    def __init__(self, current_price, earnings_per_share, book_value_per_share, sales_per_share,
+                 ebitda, market_cap, debt=0, cash=0, earnings_growth_rate=0, dividends_per_share=0):
+        """
+        Initialize with columnar company data
         
-        ev_ebitda = self.valuation_metrics.get('EV/EBITDA')
-        if ev_ebitda and ev_ebitda < 8:
-            score += 10
-        elif ev_ebitda and ev_ebitda > 15:
-            score -= 10
+        All arguments are arrays of equal length (scalars are broadcast),
+        named like the RelativeValuation company_data keys
+        """
+        self.price = np.asarray(current_price, dtype=np.float64)
+        n = self.price.shape
+        column = lambda values: np.broadcast_to(np.asarray(values, dtype=np.float64), n)
+        
+        self.eps = column(earnings_per_share)
+        self.bvps = column(book_value_per_share)
+        self.sps = column(sales_per_share)
+        self.ebitda = column(ebitda)
+        self.market_cap = column(market_cap)
+        self.debt = column(debt)
+        self.cash = column(cash)
+        self.growth = column(earnings_growth_rate)
+        self.dps = column(dividends_per_share)
+        self.valuation_metrics = {}
+    
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a DataFrame with RelativeValuation company_data columns"""
+        get = lambda key, default=0: df[key].to_numpy() if key in df else default
+        return cls(
+            current_price=get('current_price'),
+            earnings_per_share=get('earnings_per_share'),
+            book_value_per_share=get('book_value_per_share'),
+            sales_per_share=get('sales_per_share'),
+            ebitda=get('ebitda'),
+            market_cap=get('market_cap', np.nan),
+            debt=get('debt'),
+            cash=get('cash'),
+            earnings_growth_rate=get('earnings_growth_rate'),
+            dividends_per_share=get('dividends_per_share'),
+        )
+    
+    def calculate_all_metrics(self):
+        """Calculate all relative valuation metrics (masked arrays) for every row"""
+        pe = _masked_divide(self.price, self.eps)
+        enterprise_value = self.market_cap + self.debt - self.cash
+        
+        self.valuation_metrics = {
+            'P/E': pe,
+            'P/B': _masked_divide(self.price, self.bvps),
+            'P/S': _masked_divide(self.price, self.sps),
+            'EV/EBITDA': _masked_divide(enterprise_value, self.ebitda),
+            'PEG': _masked_divide(pe, self.growth),
+            'Dividend Yield %': _masked_divide(self.dps, self.price) * 100,
+        }
+        return self.valuation_metrics
+    
+    def _metrics(self):
+        if not self.valuation_metrics:
+            self.calculate_all_metrics()
+        return self.valuation_metrics
+    
+    def to_frame(self, index=None):
+        """Metrics as a DataFrame (masked entries become NaN)"""
+        metrics = self._metrics()
+        return pd.DataFrame({metric: metrics[metric].filled(np.nan) for metric in self.METRICS}, index=index)
+    
+    def get_valuation_score(self):
+        """
+        Composite valuation score (0-100) for every row
+        Higher score = More undervalued
+        """
+        metrics = self._metrics()
+        score = np.full(self.price.shape, 50.0)  # Neutral starting point
         
-        peg = self.valuation_metrics.get('PEG')
-        if peg and peg < 1:
-            score += 10
+        for metric in ['P/E', 'P/B', 'P/S', 'EV/EBITDA', 'PEG']:
+            values = metrics[metric].filled(0)
+            bands = THRESHOLDS.get('score', metric)
+            points = np.asarray(bands.bands, dtype=np.float64)[bands.band_array(values)]
+            score += np.where(values != 0, points, 0)
         
         return np.clip(score, 0, 100)
+    
+    def risk_flags(self):
+        """
+        Risk flag per row and metric: -1 undervaluation, +1 overvaluation,
+        0 none (the vector form of RelativeValuation.risk_signals)
+        """
+        metrics = self._metrics()
+        flags = {}
+        for metric in THRESHOLDS.metrics('flag'):
+            values = metrics[metric]
+            band = THRESHOLDS.get('flag', metric).band_array(values.filled(np.nan))
+            flags[metric] = np.where(np.ma.getmaskarray(values), 0, band - 1).astype(np.int8)
+        return pd.DataFrame(flags)
 
 # ============================================================================
 # 2. FINANCIAL RISK MODELING
 # ============================================================================
 
+# Confidence levels reported by the tail-risk routines
+CONFIDENCE_LEVELS = (0.90, 0.95, 0.975, 0.99, 0.995)
+
+
+def tail_risk(returns, confidence_levels=CONFIDENCE_LEVELS):
+    """
+    Historical VAR and CVaR for several confidence levels in one pass
+    
+    Partitions each column once so that only the lower tail - up to the
+    deepest order statistic any level needs - is sorted; every VAR is read
+    off that sorted tail with np.percentile's linear interpolation, and
+    every CVaR is a running mean of it. NaNs are ignored column by column.
+    
+    Parameters:
+    -----------
+    returns : 1-D array (T) or 2-D array (T x N)
+    confidence_levels : sequence of levels, e.g. (0.95, 0.99)
+    
+    Returns:
+    --------
+    (var, cvar): arrays of shape (L,) for 1-D input or (L x N) for 2-D
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    one_dimensional = x.ndim == 1
+    if one_dimensional:
+        x = x[:, None]
+    
+    T, N = x.shape
+    n = (~np.isnan(x)).sum(axis=0)                                   # (N,)
+    levels = np.asarray(confidence_levels, dtype=np.float64)
+    
+    # Virtual index of each quantile, as np.percentile computes it
+    position = ((1 - levels) * 100 / 100)[:, None] * np.maximum(n - 1, 0)  # (L, N)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, np.maximum(n - 1, 0))
+    gamma = position - lower
+    
+    # Lower tail only: one partition, then a sort of the first `depth` rows
+    depth = min(T, int(upper.max(initial=0)) + 1)
+    if depth == 0:
+        var = np.full((len(levels), N), np.nan)
+        return (var[:, 0], var[:, 0].copy()) if one_dimensional else (var, var.copy())
+    head = x if depth >= T else np.partition(x, depth - 1, axis=0)[:depth]
+    head = np.sort(head, axis=0)                                     # NaNs sort last
+    
+    columns = np.arange(N)
+    a = head[lower, columns]
+    b = head[upper, columns]
+    diff = b - a
+    var = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+    
+    # CVaR: mean of the returns at or below VAR, from the tail's running sum
+    tail_sum = np.cumsum(np.nan_to_num(head), axis=0)
+    count = (head[None, :, :] <= var[:, None, :]).sum(axis=1)       # (L, N)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cvar = tail_sum[np.clip(count - 1, 0, depth - 1), columns] / count
+    
+    # Ties with VAR can run past the sorted tail: recount those in full
+    for level, column in zip(*np.nonzero((count == depth) & (depth < n))):
+        values = x[:, column]
+        cvar[level, column] = values[values <= var[level, column]].mean()
+    
+    empty = n == 0
+    var[:, empty] = np.nan
+    cvar[:, empty] = np.nan
+    
+    return (var[:, 0], cvar[:, 0]) if one_dimensional else (var, cvar)
+
+
 class FinancialRiskModel:
     """
     Advanced Financial Risk Analysis
@@ -277,7 +441,25 @@ class FinancialRiskModel:
         self.market_returns = np.array(market_returns) if market_returns is not None else None
         self.risk_free_rate = risk_free_rate
         self.risk_metrics = {}
-    
+
+    @classmethod
+    def from_prices(cls, prices, market_prices=None, risk_free_rate=0.04):
+        """
+        Build a risk model from price series instead of returns
+
+        prices: pd.Series of closing prices, e.g. PricePanel.close[ticker]
+        market_prices: optional pd.Series of index prices (aligned on date)
+        """
+        prices = pd.Series(prices).dropna()
+
+        if market_prices is not None:
+            aligned = pd.concat([prices, pd.Series(market_prices)], axis=1, join='inner').dropna()
+            returns = aligned.pct_change().dropna()
+            return cls(returns.iloc[:, 0].values, returns.iloc[:, 1].values, risk_free_rate)
+
+        returns = prices.pct_change().dropna()
+        return cls(returns.values, None, risk_free_rate)
+
     def calculate_var(self, confidence_level=0.95):
         """
         Value at Risk (VAR)
@@ -297,12 +479,25 @@ class FinancialRiskModel:
         
         More comprehensive risk measure than VAR
         """
-        var = self.calculate_var(confidence_level)
-        cvar = self.returns[self.returns <= var].mean()
+        var, cvar = tail_risk(self.returns, [confidence_level])
         
-        self.risk_metrics[f'CVaR_{confidence_level}'] = cvar
+        self.risk_metrics[f'VAR_{confidence_level}'] = var[0]
+        self.risk_metrics[f'CVaR_{confidence_level}'] = cvar[0]
         
-        return cvar
+        return cvar[0]
+    
+    def calculate_tail_risk(self, confidence_levels=CONFIDENCE_LEVELS):
+        """
+        VAR and CVaR for several confidence levels from one partial sort
+        
+        Returns a DataFrame indexed by confidence level
+        """
+        var, cvar = tail_risk(self.returns, confidence_levels)
+        for level, v, c in zip(confidence_levels, var, cvar):
+            self.risk_metrics[f'VAR_{level}'] = v
+            self.risk_metrics[f'CVaR_{level}'] = c
+        
+        return pd.DataFrame({'VAR': var, 'CVaR': cvar}, index=pd.Index(confidence_levels, name='Confidence'))
     
     def calculate_sharpe_ratio(self):
         """
@@ -338,12 +533,12 @@ class FinancialRiskModel:
     def calculate_maximum_drawdown(self):
         """
         Maximum Drawdown
-        Maximum peak-to-trough decline
+        Maximum peak-to-trough decline (the starting value counts as a peak)
         
         Key measure of downside risk
         """
-        cumulative = (1 + self.returns).cumprod()
-        running_max = cumulative.expanding().max()
+        cumulative = np.cumprod(1 + self.returns)
+        running_max = np.maximum(np.maximum.accumulate(cumulative), 1.0)
         drawdown = (cumulative - running_max) / running_max
         max_drawdown = drawdown.min()
         
@@ -363,8 +558,9 @@ class FinancialRiskModel:
         if self.market_returns is None:
             return None
         
+        # Sample covariance and sample variance (both ddof=1)
         covariance = np.cov(self.returns, self.market_returns)[0, 1]
-        market_variance = np.var(self.market_returns)
+        market_variance = np.var(self.market_returns, ddof=1)
         
         beta = covariance / market_variance if market_variance != 0 else 0
         self.risk_metrics['Beta'] = beta
@@ -395,6 +591,502 @@ class FinancialRiskModel:
         
         return self.risk_metrics
 
+class RiskEngine:
+    """
+    FinancialRiskModel for many assets at once
+    
+    Works on a (T x N) returns matrix - one column per ticker - with
+    axis-wise NumPy operations, so the whole universe is one pass per
+    metric. Missing returns (NaN, e.g. before a listing date) are left
+    out column by column; every metric matches FinancialRiskModel on the
+    column's own observations.
+    
+    The rolling_* methods give the same metrics for every trailing window
+    without rescanning it: moments from running sums in O(T) per ticker,
+    VAR/CVaR from Fenwick trees over return ranks in O(T log T). A window
+    containing a missing return is left NaN.
+    """
+    
+    TRADING_DAYS = 252
+    
+    def __init__(self, returns_data, market_returns=None, risk_free_rate=0.04):
+        """
+        Initialize risk engine
+        
+        returns_data: (T x N) DataFrame or array of returns
+        market_returns: length-T market returns (Series are aligned on the
+                        returns index) for beta
+        risk_free_rate: annual risk-free rate (default 4% for India)
+        """
+        if isinstance(returns_data, pd.DataFrame):
+            self.tickers = list(returns_data.columns)
+            self.index = returns_data.index
+            if isinstance(market_returns, pd.Series):
+                market_returns = market_returns.reindex(returns_data.index)
+            returns_data = returns_data.to_numpy(dtype=np.float64)
+        else:
+            returns_data = np.asarray(returns_data, dtype=np.float64)
+            if returns_data.ndim == 1:
+                returns_data = returns_data[:, None]
+            self.tickers = list(range(returns_data.shape[1]))
+            self.index = pd.RangeIndex(returns_data.shape[0])
+        
+        self.returns = returns_data
+        self.market_returns = None if market_returns is None else np.asarray(market_returns, dtype=np.float64)
+        self.risk_free_rate = risk_free_rate
+        
+        self._valid = ~np.isnan(self.returns)
+        self._count = self._valid.sum(axis=0)
+        self._filled = np.where(self._valid, self.returns, 0.0)
+        
+        # Date of each ticker's starting value (the price before its first
+        # return); known only when built from prices
+        self.start_dates = None
+    
+    @classmethod
+    def from_prices(cls, prices, market_prices=None, risk_free_rate=0.04):
+        """
+        Build a risk engine from prices instead of returns
+        
+        prices: PricePanel (e.g. from PriceArchive.load_panel) or a
+                DataFrame of closing prices, one column per ticker
+        market_prices: optional pd.Series of index prices
+        """
+        close = prices.close if hasattr(prices, 'close') else pd.DataFrame(prices)
+        returns = close.pct_change(fill_method=None).iloc[1:]
+        
+        market_returns = None
+        if market_prices is not None:
+            market = pd.Series(market_prices).reindex(close.index)
+            market_returns = market.pct_change(fill_method=None).iloc[1:]
+        
+        engine = cls(returns, market_returns, risk_free_rate)
+        engine.start_dates = close.apply(pd.Series.first_valid_index).to_numpy()
+        return engine
+    
+    def _series(self, values):
+        return pd.Series(values, index=self.tickers)
+    
+    def _mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._filled.sum(axis=0) / self._count
+    
+    def _std(self):
+        """Population standard deviation per column (as ndarray.std())"""
+        deviation = np.where(self._valid, self.returns - self._mean(), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt((deviation ** 2).sum(axis=0) / self._count)
+    
+    def calculate_var(self, confidence_level=0.95):
+        """Historical-simulation VAR per ticker"""
+        return self._series(tail_risk(self.returns, [confidence_level])[0][0])
+    
+    def calculate_cvar(self, confidence_level=0.95):
+        """Expected shortfall per ticker: average of returns at or below VAR"""
+        return self._series(tail_risk(self.returns, [confidence_level])[1][0])
+    
+    def calculate_tail_risk(self, confidence_levels=CONFIDENCE_LEVELS):
+        """
+        VAR and CVaR per ticker for several confidence levels at once
+        
+        Returns a DataFrame indexed by ticker with VAR_<c> and CVaR_<c>
+        columns
+        """
+        var, cvar = tail_risk(self.returns, confidence_levels)
+        columns = {}
+        for level, v, c in zip(confidence_levels, var, cvar):
+            columns[f'VAR_{level}'] = v
+            columns[f'CVaR_{level}'] = c
+        return pd.DataFrame(columns, index=self.tickers)
+    
+    def calculate_volatility(self):
+        """Annualized volatility per ticker"""
+        return self._series(self._std() * np.sqrt(self.TRADING_DAYS))
+    
+    def calculate_sharpe_ratio(self):
+        """Sharpe ratio per ticker (0 where volatility is 0)"""
+        avg_return = self._mean() * self.TRADING_DAYS
+        std_dev = self._std() * np.sqrt(self.TRADING_DAYS)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sharpe = np.where(std_dev != 0, (avg_return - self.risk_free_rate) / std_dev, 0.0)
+        return self._series(np.where(self._count > 0, sharpe, np.nan))
+    
+    def calculate_sortino_ratio(self, target_return=0):
+        """Sortino ratio per ticker (0 where there is no downside deviation)"""
+        avg_return = self._mean() * self.TRADING_DAYS
+        
+        downside = self._valid & (self.returns < target_return)
+        n_down = downside.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            down_mean = np.where(downside, self.returns, 0.0).sum(axis=0) / n_down
+            down_var = np.where(downside, (self.returns - down_mean) ** 2, 0.0).sum(axis=0) / n_down
+            downside_std = np.where(n_down > 0, np.sqrt(down_var) * np.sqrt(self.TRADING_DAYS), 0.0)
+            sortino = np.where(downside_std != 0, (avg_return - target_return) / downside_std, 0.0)
+        return self._series(np.where(self._count > 0, sortino, np.nan))
+    
+    def calculate_beta(self):
+        """
+        Beta per ticker against the market returns (None without them)
+        
+        Each column uses the dates where both it and the market have a
+        return; covariance and market variance are both sample (ddof=1)
+        estimates, as in FinancialRiskModel.calculate_beta.
+        """
+        if self.market_returns is None:
+            return None
+        
+        market = self.market_returns[:, None]
+        both = self._valid & ~np.isnan(market)
+        n = both.sum(axis=0)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stock = np.where(both, self.returns, 0.0)
+            index = np.where(both, market, 0.0)
+            stock_dev = np.where(both, stock - stock.sum(axis=0) / n, 0.0)
+            index_dev = np.where(both, index - index.sum(axis=0) / n, 0.0)
+            
+            covariance = (stock_dev * index_dev).sum(axis=0) / (n - 1)
+            market_variance = (index_dev ** 2).sum(axis=0) / (n - 1)
+            beta = np.where(market_variance != 0, covariance / market_variance, 0.0)
+        
+        return self._series(np.where(n > 1, beta, np.nan))
+    
+    def calculate_all_risk_metrics(self, confidence_levels=(0.95,)):
+        """
+        Every risk metric for every ticker
+        
+        Returns:
+        --------
+        DataFrame indexed by ticker with Observations, Volatility, Sharpe
+        Ratio, Sortino Ratio, Max Drawdown, VAR_<c> and CVaR_<c> per
+        confidence level, and Beta when market returns were given
+        """
+        metrics = pd.DataFrame({
+            'Observations': self._count,
+            'Volatility': self.calculate_volatility().to_numpy(),
+            'Sharpe Ratio': self.calculate_sharpe_ratio().to_numpy(),
+            'Sortino Ratio': self.calculate_sortino_ratio().to_numpy(),
+            'Max Drawdown': self.calculate_maximum_drawdown()['Max Drawdown'].to_numpy(),
+        }, index=self.tickers)
+        
+        metrics = metrics.join(self.calculate_tail_risk(confidence_levels))
+        
+        if self.market_returns is not None:
+            metrics['Beta'] = self.calculate_beta().to_numpy()
+        
+        return metrics
+
+    # ------------------------------------------------------------------
+    # Drawdowns
+    # ------------------------------------------------------------------
+    
+    def _wealth(self):
+        """
+        Cumulative wealth index per ticker; flat across gaps, NaN before a
+        ticker's first return and after its last (e.g. once delisted)
+        """
+        started = np.logical_or.accumulate(self._valid, axis=0)
+        active = started & np.logical_or.accumulate(self._valid[::-1], axis=0)[::-1]
+        wealth = np.cumprod(1 + self._filled, axis=0)
+        return np.where(active, wealth, np.nan)
+    
+    def drawdown_curve(self):
+        """
+        Drawdown from the running peak at every date (T x N, 0 at a peak);
+        the starting value (wealth 1) counts as the first peak
+        """
+        wealth = self._wealth()
+        with warnings.catch_warnings():
+            # Columns with no returns at all stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            running_max = np.fmax(np.fmax.accumulate(wealth, axis=0), 1.0)
+        return self._frame((wealth - running_max) / running_max)
+    
+    def calculate_maximum_drawdown(self):
+        """
+        Maximum drawdown per ticker with its dates and durations
+        
+        A spell under water runs from a peak to the first date back at it
+        (the recovery), or to the last observation if there is none; its
+        length is counted in periods from the peak, so prices 100, 90, 100
+        are under water for 2 periods.
+        
+        Returns:
+        --------
+        DataFrame indexed by ticker:
+        - Max Drawdown: worst peak-to-trough decline (<= 0)
+        - Peak Date / Trough Date: the worst decline's start and bottom
+          (a peak at the starting value has the start date when built
+          from prices, NaT otherwise)
+        - Recovery Date: first date back at the peak (NaT if not yet, or
+          if the ticker was never below a peak)
+        - Time Under Water: length of the worst decline's spell (0 if
+          never below a peak)
+        - Longest Under Water: length of the longest spell
+        """
+        drawdown = self.drawdown_curve().to_numpy()
+        T, N = drawdown.shape
+        position = np.arange(T)[:, None]
+        columns = np.arange(N)
+        has_data = self._count > 0
+        
+        # The starting value sits one period before the first return
+        start = np.argmax(self._valid, axis=0) - 1
+        last_observed = T - 1 - np.argmax(self._valid[::-1], axis=0)
+        
+        at_peak = drawdown == 0
+        last_peak = np.maximum(np.maximum.accumulate(np.where(at_peak, position, -1), axis=0), start)
+        next_peak = np.minimum.accumulate(np.where(at_peak, position, T)[::-1], axis=0)[::-1]
+        
+        # Length of the spell under water each date belongs to (0 at a peak)
+        spell_end = np.where(next_peak < T, next_peak, last_observed)
+        spell = np.where(drawdown < 0, spell_end - last_peak, 0)
+        
+        trough = np.argmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=0)
+        max_drawdown = np.where(has_data, drawdown[trough, columns], np.nan)
+        drawn_down = max_drawdown < 0
+        peak = last_peak[trough, columns]
+        recovery = next_peak[trough, columns]
+        
+        # Dates (or positions) of the given rows, NaT/NaN where not ok
+        pick = lambda rows, ok: self.index[np.clip(rows, 0, T - 1)].where(ok).to_numpy()
+        
+        peak_dates = pick(peak, has_data & (peak > start))
+        if self.start_dates is not None:
+            peak_dates = np.where(has_data & (peak == start), self.start_dates, peak_dates)
+        
+        return pd.DataFrame({
+            'Max Drawdown': max_drawdown,
+            'Peak Date': peak_dates,
+            'Trough Date': pick(trough, has_data),
+            'Recovery Date': pick(recovery, drawn_down & (recovery < T)),
+            'Time Under Water': np.where(has_data, spell[trough, columns], np.nan),
+            'Longest Under Water': np.where(has_data, spell.max(axis=0, initial=0), np.nan),
+        }, index=self.tickers)
+    
+    # ------------------------------------------------------------------
+    # Rolling windows
+    # ------------------------------------------------------------------
+    
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.index, columns=self.tickers)
+    
+    @staticmethod
+    def _window_sum(values, window):
+        """Trailing-window sums along time from one cumulative sum (NaN until full)"""
+        total = np.cumsum(values, axis=0)
+        result = np.full(values.shape, np.nan)
+        result[window - 1:] = total[window - 1:]
+        result[window:] -= total[:-window]
+        return result
+    
+    def _window_moments(self, window, mask=None):
+        """
+        Observation count, mean and population variance of every trailing
+        window, for the returns selected by mask (default: all valid)
+        
+        Columns are centred on their full-sample mean first so the running
+        sums of squares do not lose precision.
+        """
+        mask = self._valid if mask is None else mask
+        centre = np.nan_to_num(self._mean())
+        x = np.where(mask, self.returns - centre, 0.0)
+        
+        n = self._window_sum(mask.astype(np.float64), window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self._window_sum(x, window) / n
+            var = np.maximum(self._window_sum(x * x, window) / n - mean * mean, 0.0)
+        return n, mean + centre, var
+    
+    def rolling_volatility(self, window=63):
+        """Annualized volatility of each trailing window (T x N)"""
+        n, _, var = self._window_moments(window)
+        return self._frame(np.where(n == window, np.sqrt(var) * np.sqrt(self.TRADING_DAYS), np.nan))
+    
+    def rolling_sharpe_ratio(self, window=63):
+        """Sharpe ratio of each trailing window (T x N)"""
+        n, mean, var = self._window_moments(window)
+        std_dev = np.sqrt(var) * np.sqrt(self.TRADING_DAYS)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sharpe = np.where(std_dev != 0, (mean * self.TRADING_DAYS - self.risk_free_rate) / std_dev, 0.0)
+        return self._frame(np.where(n == window, sharpe, np.nan))
+    
+    def rolling_sortino_ratio(self, window=63, target_return=0):
+        """Sortino ratio of each trailing window (T x N)"""
+        n, mean, _ = self._window_moments(window)
+        n_down, _, down_var = self._window_moments(window, self._valid & (self.returns < target_return))
+        downside_std = np.where(n_down > 0, np.sqrt(down_var) * np.sqrt(self.TRADING_DAYS), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sortino = np.where(downside_std != 0, (mean * self.TRADING_DAYS - target_return) / downside_std, 0.0)
+        return self._frame(np.where(n == window, sortino, np.nan))
+    
+    def rolling_beta(self, window=63):
+        """Beta of each trailing window against the market (None without it)"""
+        if self.market_returns is None:
+            return None
+        
+        market = self.market_returns[:, None]
+        both = self._valid & ~np.isnan(market)
+        stock = np.where(both, self.returns - np.nan_to_num(self._mean()), 0.0)
+        index = np.where(both, market - np.nanmean(self.market_returns), 0.0)
+        
+        n = self._window_sum(both.astype(np.float64), window)
+        sum_stock = self._window_sum(stock, window)
+        sum_index = self._window_sum(index, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = (self._window_sum(stock * index, window) - sum_stock * sum_index / n) / (n - 1)
+            market_variance = (self._window_sum(index * index, window) - sum_index * sum_index / n) / (n - 1)
+            beta = np.where(market_variance > 0, covariance / market_variance, 0.0)
+        return self._frame(np.where(n == window, beta, np.nan))
+    
+    @staticmethod
+    def _wavelet_levels(rank, values, bits):
+        """
+        Levels of a column-wise wavelet matrix over ranks, top bit first
+        
+        Yields (bit, zeros, zero_sum, n_zeros) per level: the prefix count
+        of entries whose rank has a 0 at that bit and the prefix sum of
+        their values, both (T + 1) x N in the level's order, and the number
+        of such entries per column. Each level is a stable partition of the
+        one above on its bit.
+        """
+        T, N = rank.shape
+        for bit in reversed(range(bits)):
+            is_zero = (rank >> bit) & 1 == 0
+            zeros = np.zeros((T + 1, N), dtype=np.int64)
+            np.cumsum(is_zero, axis=0, out=zeros[1:])
+            zero_sum = np.zeros((T + 1, N))
+            np.cumsum(np.where(is_zero, values, 0.0), axis=0, out=zero_sum[1:])
+            yield bit, zeros, zero_sum, zeros[-1]
+            
+            order = np.argsort(~is_zero, axis=0, kind='stable')
+            rank = np.take_along_axis(rank, order, axis=0)
+            values = np.take_along_axis(values, order, axis=0)
+    
+    def _rolling_tail(self, window, confidence_levels):
+        """
+        Rolling historical VAR and CVaR of every column
+        
+        Each column's returns are ranked once and a wavelet matrix is built
+        over the ranks: one stable partition per bit of T. Every window is
+        a range of positions, so the k-th smallest return of all windows,
+        columns and confidence levels is one descent of the levels, and
+        the count and sum of the returns at or below VAR a second one.
+        That is O(T log T) per column in bit_length(T) array passes, with
+        no loop over time and independent of the window length (sliding
+        windows with np.partition would be O(T*W) time and memory).
+        Quantiles interpolate as np.percentile does; the tail is every
+        return at or below VAR.
+        
+        Returns (var, cvar) arrays of shape (levels, T, N)
+        """
+        T, N = self.returns.shape
+        levels = len(confidence_levels)
+        var = np.full((levels, T, N), np.nan)
+        cvar = np.full((levels, T, N), np.nan)
+        if T < window or N == 0:
+            return var, cvar
+        
+        # Sorted values per column (NaN last) and each return's rank in them
+        columns = np.arange(N)
+        order = np.argsort(self.returns, axis=0, kind='stable')
+        ordered = np.take_along_axis(self.returns, order, axis=0)
+        rank = np.empty((T, N), dtype=np.int64)
+        rank[order, columns] = np.arange(T)[:, None]
+        
+        # Last rank holding the same value, so ties at VAR all join the tail
+        run_end = np.ones((T, N), dtype=bool)
+        run_end[:-1] = ordered[1:] != ordered[:-1]
+        tie_end = np.where(run_end, np.arange(T)[:, None], T)
+        tie_end = np.minimum.accumulate(tie_end[::-1], axis=0)[::-1]
+        
+        # Windows ending at every t >= window - 1, as position ranges
+        full = (self._window_sum(self._valid.astype(np.float64), window) == window)[window - 1:]
+        end = np.arange(window, T + 1)[:, None]
+        bits = int(T).bit_length()
+        levels_of = lambda: self._wavelet_levels(rank, self._filled, bits)
+        at = lambda prefix, row: np.take(prefix, row * N + columns)
+        
+        # Order statistics needed per level: lower and upper neighbours of
+        # the interpolated position, all levels descended together
+        position = np.array([(1 - c) * (window - 1) for c in confidence_levels])
+        lower = position.astype(np.int64)
+        upper = np.minimum(lower + 1, window - 1)
+        fraction = (position - lower)[:, None, None]
+        
+        # k-th smallest rank in each window per (statistic, window, column)
+        k = np.broadcast_to(np.concatenate([lower, upper])[:, None, None], (2 * levels, len(end), N))
+        lo, hi = end - window + np.zeros_like(k), end + np.zeros_like(k)
+        found = np.zeros_like(k)
+        for bit, zeros, _, n_zeros in levels_of():
+            lo_zeros, hi_zeros = at(zeros, lo), at(zeros, hi)
+            inside = hi_zeros - lo_zeros
+            left = k < inside
+            found += np.where(left, 0, 1 << bit)
+            k = np.where(left, k, k - inside)
+            lo = np.where(left, lo_zeros, n_zeros + lo - lo_zeros)
+            hi = np.where(left, hi_zeros, n_zeros + hi - hi_zeros)
+        
+        low = ordered[found[:levels], columns]
+        high = ordered[found[levels:], columns]
+        v = low + (high - low) * fraction
+        
+        # Window returns <= VAR are those ranked below the end of the tie
+        # run of the order statistic VAR sits on
+        below = np.where(v >= high, tie_end[found[levels:], columns], tie_end[found[:levels], columns]) + 1
+        lo, hi = end - window + np.zeros_like(below), end + np.zeros_like(below)
+        tail_count = np.zeros(below.shape)
+        tail_sum = np.zeros(below.shape)
+        for bit, zeros, zero_sum, n_zeros in levels_of():
+            lo_zeros, hi_zeros = at(zeros, lo), at(zeros, hi)
+            one = (below >> bit) & 1 == 1
+            tail_count += np.where(one, hi_zeros - lo_zeros, 0)
+            tail_sum += np.where(one, at(zero_sum, hi) - at(zero_sum, lo), 0.0)
+            lo = np.where(one, n_zeros + lo - lo_zeros, lo_zeros)
+            hi = np.where(one, n_zeros + hi - hi_zeros, hi_zeros)
+        
+        var[:, window - 1:] = np.where(full, v, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cvar[:, window - 1:] = np.where(full, tail_sum / tail_count, np.nan)
+        
+        return var, cvar
+    
+    def rolling_var_cvar(self, window=252, confidence_levels=(0.95,)):
+        """
+        Rolling historical VAR and CVaR for every ticker
+        
+        Returns:
+        --------
+        (var, cvar): dicts of confidence level -> (T x N) DataFrame
+        """
+        var, cvar = self._rolling_tail(window, confidence_levels)
+        return ({c: self._frame(var[j]) for j, c in enumerate(confidence_levels)},
+                {c: self._frame(cvar[j]) for j, c in enumerate(confidence_levels)})
+    
+    def calculate_rolling_risk_metrics(self, windows=(63, 252), confidence_level=0.95):
+        """
+        Rolling risk metrics over one or more trailing windows
+        
+        Returns:
+        --------
+        DataFrame indexed by date with (Window, Metric, Ticker) columns:
+        Volatility, Sharpe Ratio, Sortino Ratio, VAR_<c>, CVaR_<c> and
+        Beta when market returns were given; a window's first full value
+        appears on its window-th observation
+        """
+        frames = {}
+        for window in windows:
+            var, cvar = self.rolling_var_cvar(window, (confidence_level,))
+            frames[(window, 'Volatility')] = self.rolling_volatility(window)
+            frames[(window, 'Sharpe Ratio')] = self.rolling_sharpe_ratio(window)
+            frames[(window, 'Sortino Ratio')] = self.rolling_sortino_ratio(window)
+            frames[(window, f'VAR_{confidence_level}')] = var[confidence_level]
+            frames[(window, f'CVaR_{confidence_level}')] = cvar[confidence_level]
+            if self.market_returns is not None:
+                frames[(window, 'Beta')] = self.rolling_beta(window)
+        
+        return pd.concat(frames, axis=1, names=['Window', 'Metric', 'Ticker'])
+
 # ============================================================================
 # 3. SECTOR RELATIVE VALUATION
 # ============================================================================
@@ -637,17 +1329,7 @@ def compare_multiples(stock_multiple, sector_avg, industry_avg=None):
     - Signal: Undervalued, Fair, Overvalued
     """
     relative_to_sector = (stock_multiple / sector_avg - 1) * 100
-    
-    if relative_to_sector < -15:
-        signal = "Significantly Undervalued"
-    elif relative_to_sector < -5:
-        signal = "Moderately Undervalued"
-    elif relative_to_sector < 5:
-        signal = "Fair Valued"
-    elif relative_to_sector < 15:
-        signal = "Moderately Overvalued"
-    else:
-        signal = "Significantly Overvalued"
+    signal = THRESHOLDS.classify('relative', 'multiple', relative_to_sector)
     
     return {
         'Relative to Sector %': relative_to_sector,
@@ -706,3 +1388,17 @@ if __name__ == "__main__":
         print(f"  {metric}: {value:.2f}")
     
     print(f"\nValuation Score: {val_model.get_valuation_score():.0f}/100")
+    
+    # Screen many companies at once
+    batch = BatchRelativeValuation.from_frame(pd.DataFrame([company_data] * 3))
+    print(batch.to_frame())
+    print("Batch Valuation Scores:", batch.get_valuation_score())
+    
+    # Risk metrics for many tickers in one call
+    rng = np.random.default_rng(42)
+    returns = pd.DataFrame(rng.normal(0.0005, 0.015, (252, 4)), columns=['TCS.NS', 'INFY.NS', 'SBIN.NS', 'ITC.NS'])
+    market = pd.Series(rng.normal(0.0004, 0.012, 252))
+    engine = RiskEngine(returns, market)
+    print(engine.calculate_all_risk_metrics((0.95, 0.99)).round(4))
+    print(engine.calculate_rolling_risk_metrics(windows=(63,))[63]['Volatility'].tail(3).round(4))
+    print(engine.calculate_maximum_drawdown())
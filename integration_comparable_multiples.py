@@ -5,7 +5,7 @@ Add this to your nifty_valuation_model.py in the Single Stock Analysis section
 """
 
 # Add this to the imports at the top of nifty_valuation_model.py:
-# from comparable_multiples import get_sector_multiples, calculate_implied_valuation, get_valuation_summary
+# from comparable_multiples import get_sector_multiples, calculate_implied_valuation, get_valuation_summary, SUMMARY_FORMATS
 
 # Then add this code after the Price Chart section (around line 560):
 
@@ -36,7 +36,7 @@ if sector_multiples:
         'net_debt': info.get('totalDebt', 0) - info.get('totalCash', 0)
     }
     
-    # Get valuation summary
+    # Get valuation summary (numeric; formatted only when displayed)
     valuation_df = get_valuation_summary(company_financials, sector)
     
     if not valuation_df.empty:
@@ -47,7 +47,7 @@ if sector_multiples:
         
         # Display comparison table
         st.markdown("#### Comparable Multiples Valuation")
-        st.dataframe(valuation_df, use_container_width=True, hide_index=True)
+        st.dataframe(valuation_df.style.format(SUMMARY_FORMATS, na_rep='N/A'), use_container_width=True, hide_index=True)
         
         st.markdown("---")
         
@@ -0,0 +1,537 @@
+"""
+MARKET DATA ENGINE
+Concurrent data fetching layer for the Nifty Relative Valuation Model
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+This module provides:
+1. Bounded thread-pool batch fetching with per-ticker timeouts
+2. Partial results (failed or slow tickers never block the rest)
+3. Aligned multi-ticker price panels (and latest prices) from a single
+   batched download
+4. Period arithmetic for incremental price-history updates
+5. Stale-while-revalidate caching with background refresh
+6. Single-flight coalescing of identical concurrent requests
+7. Compact slotted info records projected at fetch time
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from resilience import FetchError, as_fetch_error
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# yfinance period strings -> calendar offset back from today
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+# Fields of the yfinance info dict used by the valuation model
+INFO_FIELDS = (
+    'currentPrice',
+    'regularMarketPrice',
+    'trailingPE',
+    'priceToBook',
+    'priceToSalesTrailing12Months',
+    'enterpriseToEbitda',
+    'dividendYield',
+    'marketCap',
+    'fiftyTwoWeekHigh',
+    'fiftyTwoWeekLow',
+    'earningsGrowth',
+    # Slow-moving fundamentals used to reprice multiples from fresh quotes
+    'sharesOutstanding',
+    'trailingEps',
+    'bookValue',
+    'revenuePerShare',
+    'ebitda',
+    'totalDebt',
+    'totalCash',
+)
+
+# Default concurrency settings for universe-wide fetches
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TICKER_TIMEOUT = 20  # seconds allowed per ticker once its fetch starts
+
+
+def project_info(info):
+    """Keep only the INFO_FIELDS of a yfinance info dict"""
+    return {field: info.get(field) for field in INFO_FIELDS}
+
+
+def has_price(info):
+    """True if an info dict carries a usable current price"""
+    if not info:
+        return False
+    return bool(info.get('currentPrice') or info.get('regularMarketPrice'))
+
+
+# ============================================================================
+# 1. BATCH RESULTS
+# ============================================================================
+
+class BatchResult(dict):
+    """
+    Mapping of ticker -> fetched value for the tickers that succeeded
+
+    Tickers that failed or timed out are left out of the mapping and
+    recorded in `errors` (ticker -> FetchError) so callers can still
+    render whatever arrived.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = {}
+        self.elapsed = 0.0
+
+
+# ============================================================================
+# 2. CONCURRENT FETCHING
+# ============================================================================
+
+def fetch_concurrently(fetch_fn, tickers, max_workers=DEFAULT_MAX_WORKERS,
+                       timeout=DEFAULT_TICKER_TIMEOUT):
+    """
+    Call fetch_fn(ticker) for every ticker on a bounded thread pool
+
+    Parameters:
+    -----------
+    fetch_fn : callable
+        Single-ticker fetch function, e.g. fetch_stock_info
+    tickers : iterable of str
+        Tickers to fetch (duplicates are fetched once)
+    max_workers : int
+        Maximum number of fetches in flight at the same time
+    timeout : float
+        Seconds a single ticker may run before it is given up on
+
+    Returns:
+    --------
+    BatchResult : ticker -> value in input order, failures in .errors
+    """
+    tickers = list(dict.fromkeys(tickers))
+    result = BatchResult()
+    if not tickers:
+        return result
+
+    started_at = {}
+    start = time.monotonic()
+    workers = max(1, min(max_workers, len(tickers)))
+    # Hung fetches keep their worker busy, so queued tickers may never start;
+    # bound the whole batch by the number of "waves" the pool needs.
+    deadline = start + timeout * math.ceil(len(tickers) / workers) + 1.0
+
+    def run(ticker):
+        started_at[ticker] = time.monotonic()
+        return fetch_fn(ticker)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {executor.submit(run, ticker): ticker for ticker in tickers}
+        collected = {}
+
+        while pending:
+            done, _ = wait(pending, timeout=min(1.0, timeout), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                ticker = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    result.errors[ticker] = as_fetch_error(ticker, e)
+                    continue
+                if value:
+                    collected[ticker] = value
+                else:
+                    result.errors[ticker] = FetchError(ticker, 'no_data', "No data returned")
+
+            # Give up on tickers that have been running longer than allowed
+            now = time.monotonic()
+            for future, ticker in list(pending.items()):
+                if ticker in started_at:
+                    timed_out = now - started_at[ticker] > timeout
+                else:
+                    timed_out = now > deadline
+                if timed_out:
+                    pending.pop(future)
+                    future.cancel()
+                    result.errors[ticker] = FetchError(ticker, 'timeout', f"Timed out after {timeout:g}s")
+    finally:
+        # Do not block on hung requests; their threads finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for ticker in tickers:
+        if ticker in collected:
+            result[ticker] = collected[ticker]
+
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+# ============================================================================
+# 3. MULTI-TICKER PRICE PANEL
+# ============================================================================
+
+class PricePanel:
+    """
+    Aligned Close/Volume panel for a universe of tickers
+
+    close, volume: DataFrames indexed by date with one float64 column per
+    ticker, all sharing the same date index. Tickers missing from the
+    download are listed in `missing`.
+    """
+
+    def __init__(self, close, volume, missing=None):
+        self.close = close
+        self.volume = volume
+        self.missing = list(missing or [])
+
+    @property
+    def tickers(self):
+        return list(self.close.columns)
+
+    def __contains__(self, ticker):
+        return ticker in self.close.columns
+
+    def __len__(self):
+        return len(self.close)
+
+    def close_series(self, ticker):
+        """Close prices for one ticker with leading/trailing gaps removed"""
+        return self.close[ticker].dropna()
+
+    def returns(self, tickers=None):
+        """Simple daily returns (T x N) for the panel or a subset of tickers"""
+        close = self.close if tickers is None else self.close[list(tickers)]
+        return close.pct_change(fill_method=None).iloc[1:]
+
+
+def split_ohlcv(raw, tickers):
+    """
+    Split a yf.download frame into one OHLCV DataFrame per ticker
+
+    Tickers with no rows in the download are left out.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    frames = {}
+
+    if raw is None or len(raw) == 0:
+        return frames
+
+    if isinstance(raw.columns, pd.MultiIndex):
+        field_level = 0 if 'Close' in raw.columns.get_level_values(0) else 1
+        ticker_level = 1 - field_level
+        available = set(raw.columns.get_level_values(ticker_level))
+        for ticker in tickers:
+            if ticker not in available:
+                continue
+            frame = raw.xs(ticker, axis=1, level=ticker_level)
+            frame = frame.reindex(columns=OHLCV_COLUMNS).astype('float64').dropna(subset=['Close'])
+            if len(frame):
+                frames[ticker] = frame
+    elif tickers:
+        frame = raw.reindex(columns=OHLCV_COLUMNS).astype('float64').dropna(subset=['Close'])
+        if len(frame):
+            frames[tickers[0]] = frame
+
+    return frames
+
+
+def split_price_panel(raw, tickers):
+    """
+    Split a yf.download frame into an aligned PricePanel
+
+    Handles both the (Price, Ticker) MultiIndex layout returned for lists
+    of tickers and the flat OHLCV layout of a single-ticker download.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    empty = pd.DataFrame(index=pd.DatetimeIndex([], name='Date'), dtype='float64')
+
+    if raw is None or len(raw) == 0:
+        return PricePanel(empty, empty.copy(), missing=tickers)
+
+    if isinstance(raw.columns, pd.MultiIndex):
+        # Newer yfinance puts the field on level 0; group_by='ticker' flips it
+        field_level = 0 if 'Close' in raw.columns.get_level_values(0) else 1
+        close = raw.xs('Close', axis=1, level=field_level)
+        volume = raw.xs('Volume', axis=1, level=field_level)
+    else:
+        close = raw[['Close']].set_axis(tickers[:1], axis=1)
+        volume = raw[['Volume']].set_axis(tickers[:1], axis=1)
+
+    close = close.reindex(columns=tickers).astype('float64')
+    volume = volume.reindex(columns=tickers).astype('float64')
+
+    # Drop tickers for which the download returned nothing at all
+    missing = [t for t in tickers if close[t].isna().all()]
+    close = close.drop(columns=missing)
+    volume = volume.drop(columns=missing)
+
+    close = close.dropna(how='all').sort_index()
+    volume = volume.reindex(close.index)
+    close.index.name = volume.index.name = 'Date'
+
+    return PricePanel(close, volume, missing=missing)
+
+
+def last_prices(raw, tickers):
+    """Latest non-missing close per ticker from a yf.download frame"""
+    close = split_price_panel(raw, tickers).close
+    latest = close.ffill().iloc[-1] if len(close) else pd.Series(dtype='float64')
+    return {ticker: float(price) for ticker, price in latest.dropna().items()}
+
+
+# ============================================================================
+# 4. PERIOD ARITHMETIC
+# ============================================================================
+
+def period_start(period, today=None):
+    """
+    First calendar date covered by a yfinance period string
+
+    Returns None for 'max' (all available history).
+    """
+    today = pd.Timestamp(today if today is not None else pd.Timestamp.today()).normalize()
+
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return pd.Timestamp(year=today.year, month=1, day=1)
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period: {period}")
+
+    return today - PERIOD_OFFSETS[period]
+
+
+# ============================================================================
+# 5. STALE-WHILE-REVALIDATE CACHE
+# ============================================================================
+
+class StaleWhileRevalidateCache:
+    """
+    In-process cache that never makes a caller wait on an expired entry
+
+    - fresh entry (younger than ttl): returned as is
+    - stale entry: returned immediately, and a refresh is queued on a
+      background worker; the new value is swapped in atomically when it
+      arrives (a failed refresh keeps serving the stale value)
+    - missing entry: seeded from `fallback` (e.g. the persisted snapshot)
+      if available, otherwise loaded synchronously once
+
+    Only one refresh per key is ever in flight.
+    """
+
+    def __init__(self, ttl=3600, max_workers=4):
+        self.ttl = ttl
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='swr-refresh')
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_failures': 0}
+
+    def get(self, key, loader, fallback=None):
+        """
+        Value for key
+
+        loader: callable returning a fresh value (None means failure)
+        fallback: optional callable returning (value, fetched_at) or None,
+                  used to seed a missing entry without waiting on loader
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None and fallback is not None:
+            seeded = fallback()
+            if seeded is not None and seeded[0] is not None:
+                entry = seeded
+                with self._lock:
+                    self._entries.setdefault(key, entry)
+
+        if entry is None:
+            with self._lock:
+                self.stats['misses'] += 1
+            value = loader()
+            if value is not None:
+                self.put(key, value)
+            return value
+
+        value, fetched_at = entry
+        stale = time.time() - fetched_at >= self.ttl
+        with self._lock:
+            self.stats['stale_hits' if stale else 'hits'] += 1
+        if stale:
+            self.refresh(key, loader)
+        return value
+
+    def put(self, key, value, fetched_at=None):
+        """Atomically replace the entry for key"""
+        with self._lock:
+            self._entries[key] = (value, time.time() if fetched_at is None else fetched_at)
+
+    def refresh(self, key, loader):
+        """Queue a background refresh of key (no-op if one is in flight)"""
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+        return self._executor.submit(self._refresh, key, loader)
+
+    def _refresh(self, key, loader):
+        try:
+            value = loader()
+        except Exception:
+            value = None
+
+        with self._lock:
+            if value is not None:
+                self._entries[key] = (value, time.time())
+                self.stats['refreshes'] += 1
+            else:
+                self.stats['refresh_failures'] += 1
+            self._refreshing.discard(key)
+
+    def invalidate(self, key=None):
+        """Drop one entry (or all entries if key is None)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ============================================================================
+# 6. SINGLE-FLIGHT REQUEST COALESCING
+# ============================================================================
+
+class SingleFlight:
+    """
+    Collapse identical concurrent calls into one upstream request
+
+    The first caller for a key runs the function; callers arriving with
+    the same key while it is in flight wait on its future and share the
+    result (or the exception). Keys look like ('info', ticker) or
+    ('download', tickers, period, start).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = {'calls': 0, 'executions': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key"""
+        with self._lock:
+            self.stats['calls'] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.stats['executions'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    @property
+    def in_flight(self):
+        return len(self._inflight)
+
+
+# ============================================================================
+# 7. COMPACT INFO RECORDS
+# ============================================================================
+
+def _as_float(value):
+    """Finite float or None (yfinance sometimes sends 'Infinity' or strings)"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+class InfoRecord:
+    """
+    Typed projection of a yfinance info dict
+
+    Holds only INFO_FIELDS as float-or-None slots instead of the full
+    100+ key info dict, which keeps cached entries small and cheap to
+    pickle. Supports the dict-style reads used across the app
+    (record.get('trailingPE'), record['marketCap'], 'dividendYield' in
+    record); get() falls back to the default for missing values.
+    """
+
+    __slots__ = INFO_FIELDS
+
+    def __init__(self, **fields):
+        for field in INFO_FIELDS:
+            setattr(self, field, _as_float(fields.get(field)))
+
+    @classmethod
+    def from_info(cls, info):
+        """Project a yfinance info dict (or another record) onto INFO_FIELDS"""
+        if isinstance(info, cls):
+            return info
+        return cls(**{field: info.get(field) for field in INFO_FIELDS})
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in INFO_FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in INFO_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in INFO_FIELDS and getattr(self, key) is not None
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in INFO_FIELDS)
+
+    def __setstate__(self, state):
+        # Records pickled before a field was added simply lack it
+        state = tuple(state) + (None,) * (len(INFO_FIELDS) - len(state))
+        for field, value in zip(INFO_FIELDS, state):
+            setattr(self, field, value)
+
+    def __eq__(self, other):
+        return isinstance(other, InfoRecord) and self.__getstate__() == other.__getstate__()
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in INFO_FIELDS}
+
+    def __repr__(self):
+        price = self.currentPrice or self.regularMarketPrice
+        return f"InfoRecord(price={price}, trailingPE={self.trailingPE}, marketCap={self.marketCap})"
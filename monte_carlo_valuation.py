@@ -0,0 +1,251 @@
+"""
+MONTE CARLO VALUATION
+Implied-price distributions from comparable multiple ranges
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+This module provides:
+1. Multiple sampling from each sector's low-median-high range
+   (uniform, triangular or normal)
+2. Correlated draws across P/E, P/B, P/S and EV/EBITDA (Gaussian copula)
+3. simulate_implied_prices - implied-price percentiles and probability
+   of upside per stock and per multiple, plus a blended price
+
+Draws are generated in blocks of stocks sized to a memory budget, each
+stock with its own SeedSequence child, so results do not depend on the
+block size or on whether a process pool is used.
+"""
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from comparable_multiples import MULTIPLE_TYPES, MULTIPLE_BASES, STATISTICS, implied_prices, sector_multiples_array
+
+DISTRIBUTIONS = ['uniform', 'triangular', 'normal']
+
+# Correlation between any two multiples of the same stock
+DEFAULT_CORRELATION = 0.6
+
+# Share of the normal distribution that falls inside the low-high range
+NORMAL_RANGE_COVERAGE = 0.90
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Memory held per draw per stock: ~8 float64 work arrays over 4 multiples
+BYTES_PER_DRAW = 8 * len(MULTIPLE_TYPES) * 8
+
+BLENDED = 'Blended'
+
+
+# ============================================================================
+# 1. SAMPLING
+# ============================================================================
+
+def correlation_matrix(correlation=DEFAULT_CORRELATION):
+    """4 x 4 correlation matrix from a single coefficient or a full matrix"""
+    n = len(MULTIPLE_TYPES)
+    if np.isscalar(correlation):
+        matrix = np.full((n, n), float(correlation))
+        np.fill_diagonal(matrix, 1.0)
+    else:
+        matrix = np.asarray(correlation, dtype=np.float64)
+
+    if matrix.shape != (n, n) or not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1.0):
+        raise ValueError(f"Correlation must be a symmetric {n} x {n} matrix with a unit diagonal")
+    return matrix
+
+
+def sample_multiples(u, low, mode, high, distribution='triangular'):
+    """
+    Map copula uniforms u to multiples within [low, high]
+
+    Parameters:
+    -----------
+    u : ndarray of uniforms, broadcasting against low/mode/high
+    low, mode, high : sector low, median and high multiples
+    distribution : 'uniform', 'triangular' (peak at the median) or
+                   'normal' (centred on the median, with NORMAL_RANGE_COVERAGE
+                   of the mass between low and high; floored at zero)
+    """
+    width = high - low
+
+    if distribution == 'uniform':
+        return low + u * width
+
+    if distribution == 'triangular':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peak = np.where(width > 0, (np.clip(mode, low, high) - low) / width, 0.5)
+            unit = np.where(u < peak, np.sqrt(u * peak), 1 - np.sqrt((1 - u) * (1 - peak)))
+        return low + unit * width
+
+    if distribution == 'normal':
+        sigma = width / (2 * ndtri(0.5 + NORMAL_RANGE_COVERAGE / 2))
+        return np.maximum(mode + ndtri(u) * sigma, 0.0)
+
+    raise ValueError(f"Unknown distribution '{distribution}', expected one of {DISTRIBUTIONS}")
+
+
+# ============================================================================
+# 2. SIMULATION
+# ============================================================================
+
+def _simulate_block(task):
+    """
+    Simulate one block of stocks (module-level so a process pool can run it)
+
+    Returns (prices summary, upside probability, mean) arrays of shape
+    (stocks, methods x percentiles), (stocks, methods), (stocks, methods)
+    """
+    (seeds, base, debt, shares, current, low, mode, high,
+     n_draws, distribution, cholesky, percentiles) = task
+
+    n_stocks, n_types = base.shape
+    z = np.empty((n_draws, n_stocks, n_types))
+    for i, seed in enumerate(seeds):
+        z[:, i, :] = np.random.default_rng(seed).standard_normal((n_draws, n_types)) @ cholesky.T
+
+    multiple = sample_multiples(ndtr(z), low, mode, high, distribution)
+    del z
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _, _, price = implied_prices(multiple, base, debt, shares)
+    del multiple
+
+    valid = (base > 0) & (low > 0) & (high > 0)
+    price = np.where(valid, price, np.nan)
+
+    with warnings.catch_warnings():
+        # All-NaN slices (no usable multiple) come back as NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        # Blended price: average of the usable multiples, per draw
+        price = np.concatenate([price, np.nanmean(price, axis=2, keepdims=True)], axis=2)
+
+    # A column is either all NaN (unusable multiple) or has no NaN, so the
+    # plain reductions give NaN exactly where there is nothing to report
+    mean = price.mean(axis=0)
+    upside = np.where(np.isnan(mean), np.nan, np.mean(price > current[:, None], axis=0))
+
+    # One contiguous sort per block; percentiles interpolate linearly
+    # between order statistics, as np.percentile does
+    ordered = np.ascontiguousarray(price.reshape(n_draws, -1).T)
+    del price
+    ordered.sort(axis=1)
+    position = np.asarray(percentiles, dtype=np.float64) / 100 * (n_draws - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, n_draws - 1)
+    summary = ordered[:, lower] + (ordered[:, upper] - ordered[:, lower]) * (position - lower)
+
+    return summary.reshape(n_stocks, -1, len(percentiles)), upside, mean
+
+
+def simulate_implied_prices(financials, sectors, n_draws=10000, distribution='triangular',
+                            correlation=DEFAULT_CORRELATION, seed=None, percentiles=PERCENTILES,
+                            memory_budget_mb=256, processes=None):
+    """
+    Monte Carlo implied-price distribution for many stocks
+
+    Parameters:
+    -----------
+    financials : DataFrame
+        One row per stock, indexed by ticker, with the
+        calculate_implied_valuation keys (see implied_valuation_tensor)
+
+    sectors : sequence of sector names aligned with the rows
+
+    n_draws : int
+        Draws per stock
+
+    distribution : 'uniform', 'triangular' or 'normal'
+
+    correlation : float or 4 x 4 matrix
+        Correlation between the multiples of one stock
+
+    seed : int, optional
+        Root seed; the same seed gives the same result
+
+    memory_budget_mb : float
+        Approximate memory per block of stocks
+
+    processes : int, optional
+        Run blocks in a process pool of this size (None = in-process)
+
+    Returns:
+    --------
+    DataFrame with one row per (Ticker, Method) - each multiple plus
+    'Blended' - and Current Price, Mean, P<q> percentile and P(Upside)
+    columns
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{distribution}', expected one of {DISTRIBUTIONS}")
+
+    cholesky = np.linalg.cholesky(correlation_matrix(correlation))
+
+    column = lambda key, default=0.0: (financials[key].to_numpy(dtype=np.float64, na_value=np.nan)
+                                       if key in financials else np.full(len(financials), default))
+    base = np.stack([column(MULTIPLE_BASES[t]) for t in MULTIPLE_TYPES], axis=1)
+    debt = np.where(np.array(MULTIPLE_TYPES) == 'EV/EBITDA', column('net_debt')[:, None], 0.0)
+    shares = column('shares_outstanding', 1.0)[:, None]
+    current = column('share_price')
+
+    ranges = sector_multiples_array(list(sectors))
+    low, mode, high = (ranges[:, :, STATISTICS.index(stat)] for stat in ('low', 'median', 'high'))
+
+    n = len(financials)
+    seeds = np.random.SeedSequence(seed).spawn(n)
+    block = max(1, int(memory_budget_mb * 2 ** 20 // (n_draws * BYTES_PER_DRAW)))
+
+    tasks = [
+        (seeds[i:i + block], base[i:i + block], debt[i:i + block], shares[i:i + block],
+         current[i:i + block], low[i:i + block], mode[i:i + block], high[i:i + block],
+         n_draws, distribution, cholesky, percentiles)
+        for i in range(0, n, block)
+    ]
+
+    if processes and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            blocks = list(pool.map(_simulate_block, tasks))
+    else:
+        blocks = [_simulate_block(task) for task in tasks]
+
+    methods = MULTIPLE_TYPES + [BLENDED]
+    if blocks:
+        summary = np.concatenate([b[0] for b in blocks]).reshape(-1, len(percentiles))
+        upside = np.concatenate([b[1] for b in blocks]).ravel()
+        mean = np.concatenate([b[2] for b in blocks]).ravel()
+    else:
+        summary, upside, mean = np.empty((0, len(percentiles))), np.empty(0), np.empty(0)
+
+    result = pd.DataFrame({
+        'Ticker': np.repeat(financials.index.to_numpy(), len(methods)),
+        'Method': np.tile(methods, n),
+        'Current Price': np.repeat(current, len(methods)),
+        'Mean': mean,
+    })
+    for j, q in enumerate(percentiles):
+        result[f'P{q:g}'] = summary[:, j]
+    result['P(Upside)'] = upside
+
+    return result.dropna(subset=['Mean']).reset_index(drop=True)
+
+
+# Example usage
+if __name__ == "__main__":
+
+    financials = pd.DataFrame({
+        'market_cap': [500000, 180000],
+        'net_income': [20000, 9000],
+        'book_value': [100000, 60000],
+        'revenue': [150000, 70000],
+        'ebitda': [35000, 15000],
+        'net_debt': [-20000, 30000],
+        'shares_outstanding': [3600, 1400],
+        'share_price': [1400, 1300],
+    }, index=['TCS.NS', 'HDFCBANK.NS'])
+
+    result = simulate_implied_prices(financials, ['IT & Software', 'Financial Services'],
+                                     n_draws=20000, seed=42)
+    print(result.round(2).to_string(index=False))
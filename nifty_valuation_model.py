@@ -16,18 +16,55 @@ Relative Valuation Framework:
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import plotly.graph_objects as go
 import plotly.express as px
+import os
 from datetime import datetime, timedelta
+from functools import partial
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import comparable multiples module
 try:
-    from comparable_multiples import get_sector_multiples, calculate_implied_valuation, get_valuation_summary
+    from comparable_multiples import (get_sector_multiples, calculate_implied_valuation, get_valuation_summary,
+                                      update_sector_multiples, snapshot_financials, universe_valuation_summary,
+                                      SUMMARY_FORMATS)
 except ImportError:
     st.warning("⚠️ Comparable multiples module not found. Some features may be unavailable.")
+    update_sector_multiples = lambda snapshot, changed=None: None
+    snapshot_financials = None
+    universe_valuation_summary = None
+
+try:
+    from monte_carlo_valuation import simulate_implied_prices, DISTRIBUTIONS
+except ImportError:
+    simulate_implied_prices = None
+
+# The Monte Carlo view reprices from the comparable multiples financials
+if snapshot_financials is None:
+    simulate_implied_prices = None
+
+from market_data import (fetch_concurrently, split_price_panel, has_price, InfoRecord,
+                         StaleWhileRevalidateCache, SingleFlight,
+                         DEFAULT_MAX_WORKERS, DEFAULT_TICKER_TIMEOUT)
+from snapshot_store import SnapshotStore, PriceArchive
+from data_providers import get_provider
+from resilience import FetchError, NegativeCache, as_fetch_error, NEGATIVE_CACHE_TTL
+from universe_registry import UniverseRegistry
+from valuation_engine import (build_universe_snapshot, valuation_metrics_frame, metrics_dict,
+                              LiveUniverse, analyze_signal, signal_labels)
+
+# Render entirely from the last saved snapshot (no network calls)
+OFFLINE_MODE = os.environ.get('NIFTY_OFFLINE', '0') == '1'
+
+# Fundamentals change slowly; quotes are refreshed often and reprice the
+# multiples of only the stocks whose price moved
+FUNDAMENTALS_TTL = 6 * 3600
+QUOTE_TTL = 60
+
+# A snapshot with failed tickers is only kept until the failures may be
+# retried, so a network blip does not leave the universe views partial
+FUNDAMENTALS_RETRY_TTL = NEGATIVE_CACHE_TTL['network']
 
 # ============================================================================
 # PAGE CONFIG & STYLING
@@ -186,317 +223,266 @@ NIFTY_50_DATA = {
     'ASIANPAINT.NS': {'Company': 'Asian Paints', 'Sector': 'Consumer & FMCG'},
 }
 
+@st.cache_resource
+def get_universe_registry():
+    """Sector, ticker and company-name indexes over NIFTY_50_DATA, built once per process"""
+    return UniverseRegistry(NIFTY_50_DATA)
+
+UNIVERSE = get_universe_registry()
+
 # ============================================================================
 # DATA PROCESSING FUNCTIONS
 # ============================================================================
 
-@st.cache_data(ttl=3600)
-def fetch_stock_data(ticker, period='1y'):
-    """Fetch historical price data for a stock"""
+@st.cache_resource
+def get_snapshot_store():
+    """Process-wide on-disk snapshot store"""
+    return SnapshotStore()
+
+@st.cache_resource
+def get_price_archive():
+    """Process-wide on-disk price archive"""
+    return PriceArchive()
+
+@st.cache_resource
+def get_market_data_provider():
+    """Configured market data provider (NIFTY_DATA_PROVIDER, default yfinance)"""
+    return get_provider()
+
+@st.cache_resource
+def get_single_flight():
+    """Process-wide single-flight group shared by all sessions"""
+    return SingleFlight()
+
+def download_prices(tickers, period=None, start=None):
+    """Batched OHLCV download for a list of tickers (by period or from a start date)"""
+    return get_single_flight().do(
+        ('download', tuple(tickers), period, start),
+        lambda: get_market_data_provider().download(tickers, period=period, start=start)
+    )
+
+def sync_price_archive(tickers, period, offline=False):
+    """Append any missing bars to the local archive (skipped when offline)"""
+    if offline:
+        return
     try:
-        data = yf.download(ticker, period=period, progress=False)
-        return data
+        get_single_flight().do(
+            ('price_sync', tuple(tickers), period),
+            lambda: get_price_archive().sync(tickers, period, download_prices)
+        )
     except:
-        return None
+        # Network trouble: serve whatever history is already archived
+        pass
 
 @st.cache_data(ttl=3600)
-def fetch_stock_info(ticker):
-    """Fetch current stock information"""
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        return info
-    except:
-        return None
+def fetch_stock_data(ticker, period='1y', offline=False):
+    """Fetch historical price data for a stock"""
+    sync_price_archive([ticker], period, offline)
+    data = get_price_archive().load(ticker, period)
+    return data if len(data) > 0 else None
 
-def calculate_valuation_metrics(ticker, info):
-    """Calculate relative valuation metrics"""
-    metrics = {}
+@st.cache_data(ttl=3600)
+def fetch_price_panel(tickers, period='1y', offline=False):
+    """
+    Fetch price history for many tickers in one batched download
+    
+    Only bars missing from the local archive are downloaded. Returns an
+    aligned PricePanel (Close/Volume, one column per ticker) shared by the
+    price chart and returns-based analytics
+    """
+    tickers = list(tickers)
+    sync_price_archive(tickers, period, offline)
+    return get_price_archive().load_panel(tickers, period)
+
+@st.cache_resource
+def get_info_cache():
+    """Process-wide stale-while-revalidate cache for stock information"""
+    return StaleWhileRevalidateCache(ttl=FUNDAMENTALS_TTL)
+
+@st.cache_resource
+def get_negative_cache():
+    """Process-wide cache of recent fetch failures"""
+    return NegativeCache()
+
+def load_stock_info(ticker):
+    """
+    Fetch stock information from the provider and persist a snapshot
+    
+    Only the fields the app reads are kept (as a compact InfoRecord), so
+    cached entries do not carry the full 100+ key info dict.
+    Raises FetchError on failure. Failures are remembered in the negative
+    cache for a kind-specific TTL, so a throttled or missing ticker is not
+    re-requested on every rerun.
+    """
+    key = ('info', ticker)
+    negative_cache = get_negative_cache()
+    
+    cached_error = negative_cache.get(key)
+    if cached_error is not None:
+        raise cached_error
     
     try:
-        current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
-        
-        # P/E Ratio
-        pe_ratio = info.get('trailingPE', None)
-        metrics['P/E Ratio'] = pe_ratio
-        
-        # P/B Ratio
-        pb_ratio = info.get('priceToBook', None)
-        metrics['P/B Ratio'] = pb_ratio
-        
-        # Price to Sales
-        ps_ratio = info.get('priceToSalesTrailing12Months', None)
-        metrics['P/S Ratio'] = ps_ratio
-        
-        # EV/EBITDA
-        ev_ebitda = info.get('enterpriseToEbitda', None)
-        metrics['EV/EBITDA'] = ev_ebitda
-        
-        # Dividend Yield
-        dividend_yield = info.get('dividendYield', None)
-        if dividend_yield:
-            metrics['Dividend Yield %'] = dividend_yield * 100
-        else:
-            metrics['Dividend Yield %'] = None
-        
-        # Market Cap
-        market_cap = info.get('marketCap', None)
-        metrics['Market Cap (Cr)'] = market_cap / 10000000 if market_cap else None
-        
-        # 52-week high and low
-        metrics['52W High'] = info.get('fiftyTwoWeekHigh', None)
-        metrics['52W Low'] = info.get('fiftyTwoWeekLow', None)
-        
-        # Current Price
-        metrics['Current Price'] = current_price
-        
-        # Earnings Growth (%)
-        earnings_growth = info.get('earningsGrowth', None)
-        if earnings_growth:
-            metrics['Earnings Growth %'] = earnings_growth * 100
-        else:
-            metrics['Earnings Growth %'] = None
-        
-        return metrics
+        info = get_single_flight().do(key, lambda: get_market_data_provider().get_info(ticker))
+        if not has_price(info):
+            raise FetchError(ticker, 'no_data', "No price in upstream response")
     except Exception as e:
-        st.error(f"Error calculating metrics: {str(e)}")
-        return {}
+        error = as_fetch_error(ticker, e)
+        negative_cache.put(key, error)
+        raise error
+    
+    record = InfoRecord.from_info(info)
+    get_snapshot_store().put(ticker, record)
+    return record
 
-def analyze_valuation_signal(pe, pb, ps, ev_ebitda, peg=None):
-    """Generate detailed valuation signal with metric-by-metric breakdown"""
+def load_snapshot_info(ticker):
+    """Last persisted (InfoRecord, fetched_at) for a ticker, or None"""
+    snapshot = get_snapshot_store().latest(ticker)
+    return (InfoRecord.from_info(snapshot.info), snapshot.fetched_at) if snapshot else None
+
+def fetch_stock_info(ticker, offline=False):
+    """
+    Fetch current stock information
     
-    analysis = {
-        'metrics': {},
-        'overall_sentiment': [],
-        'overvalued_count': 0,
-        'undervalued_count': 0,
-        'fair_count': 0
-    }
+    Served stale-while-revalidate: an expired entry is returned at once and
+    refreshed in the background. A cold entry is seeded from the on-disk
+    snapshot when one exists; offline=True serves only the snapshot.
     
-    # P/E Analysis
-    if pe:
-        if pe < 12:
-            analysis['metrics']['P/E'] = {
-                'value': pe,
-                'signal': '🟢 Undervalued',
-                'status': 'Undervalued',
-                'reasoning': 'Trading at low earnings multiple',
-                'severity': 'Strong Buy',
-                'color': 'green'
-            }
-            analysis['undervalued_count'] += 1
-        elif pe < 15:
-            analysis['metrics']['P/E'] = {
-                'value': pe,
-                'signal': '🟡 Undervalued',
-                'status': 'Undervalued',
-                'reasoning': 'Below historical average',
-                'severity': 'Buy',
-                'color': 'lightgreen'
-            }
-            analysis['undervalued_count'] += 1
-        elif pe < 20:
-            analysis['metrics']['P/E'] = {
-                'value': pe,
-                'signal': '🟡 Fair Valued',
-                'status': 'Fair',
-                'reasoning': 'Trading at reasonable multiple',
-                'severity': 'Hold',
-                'color': 'yellow'
-            }
-            analysis['fair_count'] += 1
-        elif pe < 30:
-            analysis['metrics']['P/E'] = {
-                'value': pe,
-                'signal': '🟠 Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Premium to historical average',
-                'severity': 'Sell',
-                'color': 'orange'
-            }
-            analysis['overvalued_count'] += 1
-        else:
-            analysis['metrics']['P/E'] = {
-                'value': pe,
-                'signal': '🔴 Heavily Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Trading at very high multiple',
-                'severity': 'Strong Sell',
-                'color': 'red'
-            }
-            analysis['overvalued_count'] += 2
+    Raises FetchError when there is neither live data nor a snapshot.
+    """
+    if offline:
+        snapshot = load_snapshot_info(ticker)
+        if snapshot is None:
+            raise FetchError(ticker, 'no_data', "No saved snapshot (offline mode)")
+        return snapshot[0]
     
-    # P/B Analysis
-    if pb:
-        if pb < 0.8:
-            analysis['metrics']['P/B'] = {
-                'value': pb,
-                'signal': '🟢 Undervalued',
-                'status': 'Undervalued',
-                'reasoning': 'Trading below book value',
-                'severity': 'Strong Buy',
-                'color': 'green'
-            }
-            analysis['undervalued_count'] += 1
-        elif pb < 1.2:
-            analysis['metrics']['P/B'] = {
-                'value': pb,
-                'signal': '🟡 Fair Valued',
-                'status': 'Fair',
-                'reasoning': 'Near book value',
-                'severity': 'Hold',
-                'color': 'yellow'
-            }
-            analysis['fair_count'] += 1
-        elif pb < 2.0:
-            analysis['metrics']['P/B'] = {
-                'value': pb,
-                'signal': '🟡 Moderately Valued',
-                'status': 'Fair',
-                'reasoning': 'Premium to book value',
-                'severity': 'Hold',
-                'color': 'yellow'
-            }
-            analysis['fair_count'] += 1
-        elif pb < 3.0:
-            analysis['metrics']['P/B'] = {
-                'value': pb,
-                'signal': '🟠 Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Significant premium to book',
-                'severity': 'Sell',
-                'color': 'orange'
-            }
-            analysis['overvalued_count'] += 1
-        else:
-            analysis['metrics']['P/B'] = {
-                'value': pb,
-                'signal': '🔴 Heavily Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Extreme premium to book value',
-                'severity': 'Strong Sell',
-                'color': 'red'
-            }
-            analysis['overvalued_count'] += 2
+    return get_info_cache().get(
+        ticker,
+        partial(load_stock_info, ticker),
+        fallback=partial(load_snapshot_info, ticker)
+    )
+
+def fetch_many(tickers, offline=False, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TICKER_TIMEOUT):
+    """
+    Fetch stock information for many tickers concurrently
     
-    # P/S Analysis
-    if ps:
-        if ps < 0.5:
-            analysis['metrics']['P/S'] = {
-                'value': ps,
-                'signal': '🟢 Undervalued',
-                'status': 'Undervalued',
-                'reasoning': 'Very low sales multiple',
-                'severity': 'Strong Buy',
-                'color': 'green'
-            }
-            analysis['undervalued_count'] += 1
-        elif ps < 1.0:
-            analysis['metrics']['P/S'] = {
-                'value': ps,
-                'signal': '🟡 Fair Valued',
-                'status': 'Fair',
-                'reasoning': 'Reasonable sales multiple',
-                'severity': 'Hold',
-                'color': 'yellow'
-            }
-            analysis['fair_count'] += 1
-        elif ps < 2.0:
-            analysis['metrics']['P/S'] = {
-                'value': ps,
-                'signal': '🟡 Moderately Valued',
-                'status': 'Fair',
-                'reasoning': 'Moderate premium',
-                'severity': 'Hold',
-                'color': 'yellow'
-            }
-            analysis['fair_count'] += 1
-        elif ps < 3.0:
-            analysis['metrics']['P/S'] = {
-                'value': ps,
-                'signal': '🟠 Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Elevated sales multiple',
-                'severity': 'Sell',
-                'color': 'orange'
-            }
-            analysis['overvalued_count'] += 1
-        else:
-            analysis['metrics']['P/S'] = {
-                'value': ps,
-                'signal': '🔴 Heavily Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Excessive sales multiple',
-                'severity': 'Strong Sell',
-                'color': 'red'
-            }
-            analysis['overvalued_count'] += 2
+    Returns a dict of ticker -> info for the tickers that arrived in time;
+    failed or timed-out tickers are listed in the result's .errors
+    """
+    return fetch_concurrently(partial(fetch_stock_info, offline=offline), tickers,
+                              max_workers=max_workers, timeout=timeout)
+
+class IncompleteSnapshot(Exception):
+    """Carries a snapshot with failed tickers out of a cached function uncached"""
     
-    # EV/EBITDA Analysis
-    if ev_ebitda:
-        if ev_ebitda < 8:
-            analysis['metrics']['EV/EBITDA'] = {
-                'value': ev_ebitda,
-                'signal': '🟢 Undervalued',
-                'status': 'Undervalued',
-                'reasoning': 'Low EBITDA multiple',
-                'severity': 'Strong Buy',
-                'color': 'green'
-            }
-            analysis['undervalued_count'] += 1
-        elif ev_ebitda < 12:
-            analysis['metrics']['EV/EBITDA'] = {
-                'value': ev_ebitda,
-                'signal': '🟡 Fair Valued',
-                'status': 'Fair',
-                'reasoning': 'Historical average multiple',
-                'severity': 'Hold',
-                'color': 'yellow'
-            }
-            analysis['fair_count'] += 1
-        elif ev_ebitda < 15:
-            analysis['metrics']['EV/EBITDA'] = {
-                'value': ev_ebitda,
-                'signal': '🟡 Moderately Valued',
-                'status': 'Fair',
-                'reasoning': 'Above average multiple',
-                'severity': 'Hold',
-                'color': 'yellow'
-            }
-            analysis['fair_count'] += 1
-        elif ev_ebitda < 20:
-            analysis['metrics']['EV/EBITDA'] = {
-                'value': ev_ebitda,
-                'signal': '🟠 Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Premium EBITDA multiple',
-                'severity': 'Sell',
-                'color': 'orange'
-            }
-            analysis['overvalued_count'] += 1
-        else:
-            analysis['metrics']['EV/EBITDA'] = {
-                'value': ev_ebitda,
-                'signal': '🔴 Heavily Overvalued',
-                'status': 'Overvalued',
-                'reasoning': 'Very high EBITDA multiple',
-                'severity': 'Strong Sell',
-                'color': 'red'
-            }
-            analysis['overvalued_count'] += 2
+    def __init__(self, snapshot):
+        super().__init__(f"{len(snapshot.errors)} tickers failed")
+        self.snapshot = snapshot
+
+@st.cache_data(ttl=FUNDAMENTALS_RETRY_TTL, show_spinner=False)
+def build_fundamentals_snapshot(offline=False):
+    """Universe snapshot from the stale-while-revalidate info cache"""
+    infos = fetch_many(UNIVERSE.tickers, offline=offline)
+    return build_universe_snapshot(infos, UNIVERSE, errors=infos.errors)
+
+@st.cache_data(ttl=FUNDAMENTALS_TTL, show_spinner=False)
+def get_complete_fundamentals_snapshot(offline=False):
+    """Snapshot kept for FUNDAMENTALS_TTL; raises IncompleteSnapshot (never cached) if any ticker failed"""
+    snapshot = build_fundamentals_snapshot(offline)
+    if snapshot.errors:
+        raise IncompleteSnapshot(snapshot)
+    return snapshot
+
+def get_fundamentals_snapshot(offline=False):
+    """
+    Universe snapshot as fetched, with the fundamentals used for repricing
     
-    # Overall sentiment
-    if analysis['undervalued_count'] > analysis['overvalued_count']:
-        analysis['overall'] = '🟢 UNDERVALUED - BUY'
-        analysis['recommendation'] = 'Strong Buy Signal'
-    elif analysis['undervalued_count'] == analysis['overvalued_count']:
-        analysis['overall'] = '🟡 FAIRLY VALUED - HOLD'
-        analysis['recommendation'] = 'Hold Signal'
-    else:
-        analysis['overall'] = '🔴 OVERVALUED - SELL'
-        analysis['recommendation'] = 'Sell Signal'
+    A complete snapshot is kept for FUNDAMENTALS_TTL. One with failed
+    tickers is rebuilt every FUNDAMENTALS_RETRY_TTL from the info cache,
+    so recovered tickers and background refreshes show up within seconds.
+    """
+    try:
+        return get_complete_fundamentals_snapshot(offline)
+    except IncompleteSnapshot as e:
+        return e.snapshot
+
+@st.cache_data(ttl=QUOTE_TTL, show_spinner=False)
+def fetch_quotes(tickers, offline=False):
+    """Latest prices for many tickers in one batched call ({} when offline or unavailable)"""
+    if offline:
+        return {}
+    try:
+        return get_single_flight().do(
+            ('quotes', tickers),
+            lambda: get_market_data_provider().get_quotes(list(tickers))
+        )
+    except:
+        return {}
+
+@st.cache_resource
+def get_live_universe(offline=False):
+    """Process-wide holder of the latest repriced universe snapshot"""
+    return LiveUniverse()
+
+def get_universe_snapshot(offline=False):
+    """
+    Columnar valuation snapshot of all NIFTY 50 stocks
+    
+    Built once per fundamentals refresh and shared by every analysis mode,
+    which slice it by sector or ticker instead of fetching and rebuilding
+    rows. Fresh quotes reprice only the stocks whose price moved, and the
+    live comparable multiples are updated from the same rows.
+    """
+    base = get_fundamentals_snapshot(offline)
+    live = get_live_universe(offline)
+    snapshot, changed = live.update(base, fetch_quotes(UNIVERSE.tickers, offline))
+    
+    # Comparable multiples follow the snapshot, moving only repriced stocks
+    update_sector_multiples(snapshot, changed)
+    return snapshot
+
+@st.cache_data(ttl=QUOTE_TTL, show_spinner=False)
+def get_universe_valuation_summary(offline=False):
+    """
+    Comparable-multiples valuation of every stock, kept numeric
+    
+    Computed once per quote refresh and sliced per view; formatting is
+    applied only when a table is rendered.
+    """
+    if universe_valuation_summary is None or snapshot_financials is None:
+        return pd.DataFrame()
+    financials, sectors = snapshot_financials(get_universe_snapshot(offline))
+    return universe_valuation_summary(financials, sectors)
+
+@st.cache_data(ttl=QUOTE_TTL, show_spinner=False)
+def get_implied_price_distribution(ticker, offline=False, distribution='triangular', n_draws=20000):
+    """Monte Carlo implied-price percentiles for one stock from its sector's multiple ranges"""
+    if simulate_implied_prices is None:
+        return pd.DataFrame()
+    financials, sectors = snapshot_financials(get_universe_snapshot(offline))
+    rows = financials.index == ticker
+    if not rows.any():
+        return pd.DataFrame()
+    return simulate_implied_prices(financials[rows], sectors[rows], n_draws=n_draws,
+                                   distribution=distribution, seed=42)
+
+def show_fetch_errors(result, tickers=None):
+    """Warn about tickers missing from a fetch_many result or snapshot"""
+    errors = result.errors
+    if tickers is not None:
+        errors = {ticker: errors[ticker] for ticker in tickers if ticker in errors}
+    if not errors:
+        return
     
-    return analysis
+    details = ', '.join(f"{ticker} ({error.message})" for ticker, error in errors.items())
+    st.warning(f"⚠️ Data unavailable for {len(errors)} stocks: {details}")
+
+def calculate_valuation_metrics(ticker, info):
+    """Calculate relative valuation metrics"""
+    return metrics_dict(valuation_metrics_frame({ticker: info}).iloc[0])
+
+def analyze_valuation_signal(pe, pb, ps, ev_ebitda, peg=None, sector=None):
+    """Generate detailed valuation signal with metric-by-metric breakdown"""
+    return analyze_signal({'P/E': pe, 'P/B': pb, 'P/S': ps, 'EV/EBITDA': ev_ebitda}, sector)
 
 # ============================================================================
 # STREAMLIT INTERFACE
@@ -549,8 +535,16 @@ with st.sidebar:
         help="Historical data period for charts"
     )
     
-    sectors = list(set([data['Sector'] for data in NIFTY_50_DATA.values()]))
-    sectors.sort()
+    # Data Source Selection
+    st.markdown('<div style="color: white; font-weight: bold; margin-bottom: 10px; margin-top: 20px;">DATA SOURCE:</div>', unsafe_allow_html=True)
+    offline_mode = st.checkbox(
+        "Offline mode (last saved snapshot)",
+        value=OFFLINE_MODE,
+        help="Render from the locally stored snapshot without contacting Yahoo Finance"
+    )
+    
+    flight_stats = get_single_flight().stats
+    st.markdown(f'<div style="color: #b3d9ff; font-size: 11px;">📡 Upstream calls: {flight_stats["executions"]} issued · {flight_stats["coalesced"]} coalesced</div>', unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -614,10 +608,14 @@ if analysis_mode == "Single Stock Analysis":
     col1, col2 = st.columns([2, 1])
     
     with col1:
+        stock_query = st.text_input("🔎 Search company or ticker:", placeholder="e.g. tata, bank, INFY")
+        stock_options = UNIVERSE.search(stock_query)
+        if not stock_options:
+            st.info(f"No stocks match '{stock_query}'. Try a company name or ticker.")
         selected_ticker = st.selectbox(
             "📊 **Select Stock From List:**",
-            list(NIFTY_50_DATA.keys()),
-            format_func=lambda x: f"🏢 {NIFTY_50_DATA[x]['Company']} ({x})",
+            stock_options,
+            format_func=lambda x: f"🏢 {UNIVERSE.label(x)}",
             label_visibility="visible"
         )
     
@@ -626,12 +624,22 @@ if analysis_mode == "Single Stock Analysis":
         if st.button("📈 Analyze Stock", use_container_width=True):
             pass
     
-    # Fetch data
-    info = fetch_stock_info(selected_ticker)
+    # Fetch data (nothing to fetch when the search matched no stock)
+    info, fetch_error = None, None
+    if selected_ticker is not None:
+        try:
+            info = fetch_stock_info(selected_ticker, offline_mode)
+        except FetchError as e:
+            fetch_error = e
     
     if info:
-        company_name = NIFTY_50_DATA[selected_ticker]['Company']
-        sector = NIFTY_50_DATA[selected_ticker]['Sector']
+        company_name = UNIVERSE.company(selected_ticker)
+        sector = UNIVERSE.sector_of(selected_ticker)
+        
+        # Relative Valuation Metrics (repriced from the latest quote when available)
+        metrics = get_universe_snapshot(offline_mode).metrics(selected_ticker)
+        if metrics is None:
+            metrics = calculate_valuation_metrics(selected_ticker, info)
         
         # Header info
         col1, col2, col3, col4 = st.columns(4)
@@ -651,22 +659,19 @@ if analysis_mode == "Single Stock Analysis":
         with col3:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
             st.markdown('<div class="metric-title">Current Price</div>', unsafe_allow_html=True)
-            price = info.get('currentPrice', info.get('regularMarketPrice', 0))
+            price = metrics.get('Current Price') or 0
             st.markdown(f'<div class="metric-value">₹ {price:,.2f}</div>', unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
         
         with col4:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
             st.markdown('<div class="metric-title">Market Cap (Cr)</div>', unsafe_allow_html=True)
-            mc = info.get('marketCap', 0) / 10000000
+            mc = metrics.get('Market Cap (Cr)') or 0
             st.markdown(f'<div class="metric-value">₹ {mc:,.0f}</div>', unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
         
         st.markdown("---")
         
-        # Relative Valuation Metrics
-        metrics = calculate_valuation_metrics(selected_ticker, info)
-        
         col1, col2, col3 = st.columns(3)
         
         with col1:
@@ -705,7 +710,8 @@ if analysis_mode == "Single Stock Analysis":
                 metrics.get('P/E Ratio'),
                 metrics.get('P/B Ratio'),
                 metrics.get('P/S Ratio'),
-                metrics.get('EV/EBITDA')
+                metrics.get('EV/EBITDA'),
+                sector=UNIVERSE.sector_of(selected_ticker)
             )
             
             # Display overall sentiment
@@ -751,7 +757,7 @@ if analysis_mode == "Single Stock Analysis":
             # -------- COMPARABLE MULTIPLES SECTION --------
             st.markdown('<div style="background-color: #f0f7ff; padding: 15px; border-left: 5px solid #003366; border-radius: 8px; margin-bottom: 20px;"><h3 style="color: #003366; margin: 0 0 10px 0;">💰 COMPARABLE MULTIPLES VALUATION</h3></div>', unsafe_allow_html=True)
             
-            sector = NIFTY_50_DATA[selected_ticker]['Sector']
+            sector = UNIVERSE.sector_of(selected_ticker)
             
             # Display sector info prominently
             col_sector_info1, col_sector_info2 = st.columns([1, 3])
@@ -764,11 +770,7 @@ if analysis_mode == "Single Stock Analysis":
                 """, unsafe_allow_html=True)
             
             # Get peer companies in same sector
-            peer_companies = [
-                (ticker, data['Company']) 
-                for ticker, data in NIFTY_50_DATA.items() 
-                if data['Sector'] == sector and ticker != selected_ticker
-            ]
+            peer_companies = [(ticker, UNIVERSE.company(ticker)) for ticker in UNIVERSE.peers(selected_ticker)]
             
             if peer_companies:
                 with col_sector_info2:
@@ -783,24 +785,15 @@ if analysis_mode == "Single Stock Analysis":
                 
                 st.markdown("---")
                 
-                # Fetch metrics for peer companies
-                peer_metrics = []
-                st.markdown("**📊 Fetching peer company multiples...**")
-                for peer_ticker, peer_name in peer_companies[:5]:
-                    peer_info = fetch_stock_info(peer_ticker)
-                    if peer_info:
-                        peer_data = {
-                            'Company': peer_name,
-                            'P/E': peer_info.get('trailingPE'),
-                            'P/B': peer_info.get('priceToBook'),
-                            'P/S': peer_info.get('priceToSalesTrailing12Months'),
-                            'EV/EBITDA': peer_info.get('enterpriseToEbitda'),
-                        }
-                        peer_metrics.append(peer_data)
+                # Peer multiples and sector statistics from the universe snapshot
+                universe = get_universe_snapshot(offline_mode)
+                sector_stats = universe.sector_stats.sector(sector)
+                stock_standing = universe.sector_stats.stock(selected_ticker)
+                df_peers = universe.for_tickers([peer_ticker for peer_ticker, _ in peer_companies[:5]])
+                df_peers = df_peers[['Company', 'P/E', 'P/B', 'P/S', 'EV/EBITDA']]
                 
-                if peer_metrics:
+                if len(df_peers) > 0:
                     st.markdown("**Peer Company Multiples:**")
-                    df_peers = pd.DataFrame(peer_metrics)
                     
                     # Format for display
                     df_peers_display = df_peers.copy()
@@ -813,13 +806,18 @@ if analysis_mode == "Single Stock Analysis":
                     
                     st.markdown("---")
                     
-                    # Calculate sector average multiples
+                    # Peer average multiples (the sector without this stock)
                     st.markdown("**Sector Average Multiples:**")
                     
-                    sector_pe_avg = df_peers[df_peers['P/E'].notna()]['P/E'].mean() if len(df_peers['P/E'].dropna()) > 0 else metrics.get('P/E Ratio')
-                    sector_pb_avg = df_peers[df_peers['P/B'].notna()]['P/B'].mean() if len(df_peers['P/B'].dropna()) > 0 else metrics.get('P/B Ratio')
-                    sector_ps_avg = df_peers[df_peers['P/S'].notna()]['P/S'].mean() if len(df_peers['P/S'].dropna()) > 0 else metrics.get('P/S Ratio')
-                    sector_ev_avg = df_peers[df_peers['EV/EBITDA'].notna()]['EV/EBITDA'].mean() if len(df_peers['EV/EBITDA'].dropna()) > 0 else metrics.get('EV/EBITDA')
+                    sector_pe_avg = stock_standing.get('P/E Peer Mean', np.nan)
+                    sector_pb_avg = stock_standing.get('P/B Peer Mean', np.nan)
+                    sector_ps_avg = stock_standing.get('P/S Peer Mean', np.nan)
+                    sector_ev_avg = stock_standing.get('EV/EBITDA Peer Mean', np.nan)
+                    
+                    sector_pe_avg = sector_pe_avg if pd.notna(sector_pe_avg) else metrics.get('P/E Ratio')
+                    sector_pb_avg = sector_pb_avg if pd.notna(sector_pb_avg) else metrics.get('P/B Ratio')
+                    sector_ps_avg = sector_ps_avg if pd.notna(sector_ps_avg) else metrics.get('P/S Ratio')
+                    sector_ev_avg = sector_ev_avg if pd.notna(sector_ev_avg) else metrics.get('EV/EBITDA')
                     
                     col_sector1, col_sector2, col_sector3, col_sector4 = st.columns(4)
                     
@@ -832,6 +830,73 @@ if analysis_mode == "Single Stock Analysis":
                     with col_sector4:
                         st.metric("Avg EV/EBITDA", f"{sector_ev_avg:.2f}x" if sector_ev_avg else "N/A")
                     
+                    # Sector aggregates (all stocks) and this stock's standing
+                    # against its peers (leave-one-out)
+                    standing_rows = []
+                    for multiple in ['P/E', 'P/B', 'P/S', 'EV/EBITDA']:
+                        standing_rows.append({
+                            'Multiple': multiple,
+                            'Median': sector_stats.get(f'{multiple} median', np.nan),
+                            'Mean': sector_stats.get(f'{multiple} mean', np.nan),
+                            'Cap-Weighted': sector_stats.get(f'{multiple} cap_weighted', np.nan),
+                            'Harmonic': sector_stats.get(f'{multiple} harmonic', np.nan),
+                            'Peer Mean': stock_standing.get(f'{multiple} Peer Mean', np.nan),
+                            'Z-Score': stock_standing.get(f'{multiple} Z', np.nan),
+                            'Percentile': stock_standing.get(f'{multiple} Pctl', np.nan) * 100,
+                        })
+                    
+                    st.markdown("**Sector Statistics & Relative Standing:**")
+                    st.dataframe(
+                        pd.DataFrame(standing_rows).style.format({
+                            'Median': '{:.2f}x',
+                            'Mean': '{:.2f}x',
+                            'Cap-Weighted': '{:.2f}x',
+                            'Harmonic': '{:.2f}x',
+                            'Peer Mean': '{:.2f}x',
+                            'Z-Score': '{:+.2f}',
+                            'Percentile': '{:.0f}%'
+                        }, na_rep='N/A'),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    
+                    # Comparable multiples valuation, sliced from the universe-wide summary
+                    valuation_summary = get_universe_valuation_summary(offline_mode)
+                    if len(valuation_summary) > 0:
+                        stock_summary = valuation_summary[valuation_summary['Ticker'] == selected_ticker]
+                        if len(stock_summary) > 0:
+                            st.markdown("**Comparable Multiples Valuation (Median Peer Multiple):**")
+                            st.dataframe(
+                                stock_summary.drop(columns=['Ticker', 'Sector']).style.format(SUMMARY_FORMATS, na_rep='N/A'),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                    
+                    # Implied-price distribution from the sector low-high multiple ranges
+                    if simulate_implied_prices is not None:
+                        st.markdown("**Implied Price Distribution (Monte Carlo):**")
+                        mc_distribution = st.radio(
+                            "Multiple distribution",
+                            DISTRIBUTIONS,
+                            index=DISTRIBUTIONS.index('triangular'),
+                            horizontal=True,
+                            key='mc_distribution'
+                        )
+                        df_simulated = get_implied_price_distribution(selected_ticker, offline_mode, mc_distribution)
+                        if len(df_simulated) > 0:
+                            price_columns = [col for col in df_simulated.columns if col.startswith('P') and col != 'P(Upside)']
+                            st.dataframe(
+                                df_simulated.drop(columns=['Ticker']).style.format(
+                                    {**{col: '₹{:.0f}' for col in ['Current Price', 'Mean'] + price_columns},
+                                     'P(Upside)': '{:.0%}'},
+                                    na_rep='N/A'
+                                ),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                            st.caption("20,000 correlated draws of each multiple between the sector's low and high; "
+                                       "P5-P95 are implied-price percentiles, P(Upside) the share of draws above the current price.")
+                    
                     st.markdown("---")
                     
                     # Implied valuation comparison
@@ -1005,25 +1070,17 @@ if analysis_mode == "Single Stock Analysis":
         # Price Chart
         st.markdown("### 📉 PRICE CHART & TECHNICAL ANALYSIS")
         
-        hist_data = fetch_stock_data(selected_ticker, period)
+        price_panel = fetch_price_panel(UNIVERSE.tickers, period, offline_mode)
+        
+        if selected_ticker in price_panel:
+            close_prices = price_panel.close_series(selected_ticker)
+        else:
+            # Fall back to a single-ticker download if the batch missed this stock
+            hist_data = fetch_stock_data(selected_ticker, period, offline_mode)
+            close_prices = split_price_panel(hist_data, [selected_ticker]).close.get(selected_ticker)
         
-        if hist_data is not None and len(hist_data) > 0:
+        if close_prices is not None and len(close_prices) > 0:
             try:
-                # Extract close prices - handle all formats
-                try:
-                    if isinstance(hist_data.columns, pd.MultiIndex):
-                        close_prices = hist_data[('Close', selected_ticker)]
-                    else:
-                        close_prices = hist_data['Close']
-                except:
-                    close_prices = hist_data['Close'] if 'Close' in hist_data.columns else hist_data.iloc[:, 0]
-                
-                # Ensure 1D array
-                if isinstance(close_prices, pd.DataFrame):
-                    close_prices = close_prices.iloc[:, 0]
-                
-                close_prices = pd.to_numeric(close_prices, errors='coerce')
-                
                 # Create clean dataframe
                 df = pd.DataFrame({
                     'Date': close_prices.index,
@@ -1075,41 +1132,34 @@ if analysis_mode == "Single Stock Analysis":
                 st.info("Try selecting a different time period or stock")
         else:
             st.warning("No historical data available")
+    elif selected_ticker is not None:
+        if offline_mode:
+            st.warning("No saved snapshot for this stock yet. Switch off offline mode to fetch live data.")
+        else:
+            st.warning(f"Unable to fetch data for this stock right now ({fetch_error.message}). "
+                       f"Please try again in about {fetch_error.retry_after:.0f} seconds.")
 
 elif analysis_mode == "Sector Comparison":
     st.markdown("### 📊 SECTOR COMPARISON ANALYSIS")
     st.markdown("---")
     
     # Select sector
-    sectors = sorted(list(set([data['Sector'] for data in NIFTY_50_DATA.values()])))
-    selected_sector = st.selectbox("Select Sector:", sectors)
+    selected_sector = st.selectbox("Select Sector:", UNIVERSE.sectors)
     
     # Get all stocks in sector
-    sector_stocks = [(ticker, data['Company']) for ticker, data in NIFTY_50_DATA.items() 
-                     if data['Sector'] == selected_sector]
+    sector_stocks = [(ticker, UNIVERSE.company(ticker)) for ticker in UNIVERSE.tickers_in(selected_sector)]
     
     if sector_stocks:
         st.write(f"**Stocks in {selected_sector} Sector:** {len(sector_stocks)}")
         
-        # Fetch data for all stocks in sector
-        sector_data = []
         with st.spinner(f"Analyzing {selected_sector} sector..."):
-            for ticker, company_name in sector_stocks:
-                info = fetch_stock_info(ticker)
-                if info:
-                    sector_data.append({
-                        'Company': company_name,
-                        'Ticker': ticker,
-                        'Price': info.get('currentPrice'),
-                        'P/E': info.get('trailingPE'),
-                        'P/B': info.get('priceToBook'),
-                        'P/S': info.get('priceToSalesTrailing12Months'),
-                        'Market Cap (B)': info.get('marketCap', 0) / 1e9 if info.get('marketCap') else 0,
-                    })
+            universe = get_universe_snapshot(offline_mode)
+        df_sector = universe.for_sector(selected_sector)
+        df_sector = df_sector[['Company', 'Ticker', 'Price', 'P/E', 'P/B', 'P/S', 'Market Cap (B)']]
         
-        if sector_data:
-            df_sector = pd.DataFrame(sector_data)
-            
+        show_fetch_errors(universe, [ticker for ticker, _ in sector_stocks])
+        
+        if len(df_sector) > 0:
             # Display comparison table
             st.markdown("**Sector Stocks Valuation Comparison:**")
             st.dataframe(
@@ -1119,7 +1169,7 @@ elif analysis_mode == "Sector Comparison":
                     'P/B': '{:.2f}x',
                     'P/S': '{:.2f}x',
                     'Market Cap (B)': '₹{:.0f}B'
-                }),
+                }, na_rep='N/A'),
                 use_container_width=True,
                 hide_index=True
             )
@@ -1151,38 +1201,23 @@ elif analysis_mode == "Multi-Stock Comparison":
     st.markdown("---")
     
     # Select multiple stocks
-    all_tickers = [ticker for ticker in NIFTY_50_DATA.keys()]
-    all_companies = [f"{ticker} - {NIFTY_50_DATA[ticker]['Company']}" for ticker in all_tickers]
-    
-    selected_companies = st.multiselect(
+    selected_tickers = st.multiselect(
         "Select stocks to compare (choose 2-5 stocks):",
-        all_companies,
-        default=[all_companies[0], all_companies[1]]
+        UNIVERSE.tickers,
+        default=list(UNIVERSE.tickers[:2]),
+        format_func=lambda ticker: f"{ticker} - {UNIVERSE.company(ticker)}"
     )
     
-    if selected_companies:
-        selected_tickers = [comp.split(" - ")[0] for comp in selected_companies]
+    if selected_tickers:
         
-        # Fetch data for selected stocks
-        comparison_data = []
         with st.spinner("Analyzing selected stocks..."):
-            for ticker in selected_tickers:
-                info = fetch_stock_info(ticker)
-                if info:
-                    comparison_data.append({
-                        'Company': NIFTY_50_DATA[ticker]['Company'],
-                        'Ticker': ticker,
-                        'Sector': NIFTY_50_DATA[ticker]['Sector'],
-                        'Price': info.get('currentPrice'),
-                        'P/E': info.get('trailingPE'),
-                        'P/B': info.get('priceToBook'),
-                        'P/S': info.get('priceToSalesTrailing12Months'),
-                        'Dividend Yield %': info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0,
-                    })
+            universe = get_universe_snapshot(offline_mode)
+        df_compare = universe.for_tickers(selected_tickers)
+        df_compare = df_compare[['Company', 'Ticker', 'Sector', 'Price', 'P/E', 'P/B', 'P/S', 'Dividend Yield %']]
         
-        if comparison_data:
-            df_compare = pd.DataFrame(comparison_data)
-            
+        show_fetch_errors(universe, selected_tickers)
+        
+        if len(df_compare) > 0:
             st.markdown("**Multi-Stock Comparison Table:**")
             st.dataframe(
                 df_compare.style.format({
@@ -1191,7 +1226,7 @@ elif analysis_mode == "Multi-Stock Comparison":
                     'P/B': '{:.2f}x',
                     'P/S': '{:.2f}x',
                     'Dividend Yield %': '{:.2f}%'
-                }),
+                }, na_rep='N/A'),
                 use_container_width=True,
                 hide_index=True
             )
@@ -1225,41 +1260,34 @@ else:  # Relative Valuation Matrix
     
     st.write("**All NIFTY 50 Stocks Valuation Matrix**")
     
-    # Fetch all stocks data
-    all_matrix_data = []
     with st.spinner("Building valuation matrix for all NIFTY 50 stocks..."):
-        for ticker in NIFTY_50_DATA.keys():
-            info = fetch_stock_info(ticker)
-            if info:
-                all_matrix_data.append({
-                    'Ticker': ticker,
-                    'Company': NIFTY_50_DATA[ticker]['Company'],
-                    'Sector': NIFTY_50_DATA[ticker]['Sector'],
-                    'Price': info.get('currentPrice'),
-                    'P/E': info.get('trailingPE'),
-                    'P/B': info.get('priceToBook'),
-                    'EV/EBITDA': info.get('enterpriseToEbitda'),
-                })
+        universe = get_universe_snapshot(offline_mode)
     
-    if all_matrix_data:
-        df_matrix = pd.DataFrame(all_matrix_data)
+    show_fetch_errors(universe)
+    
+    if len(universe) > 0:
+        df_matrix = universe.all()
+        matrix_signals = universe.signals.reindex(df_matrix['Ticker']).set_axis(df_matrix.index)
+        df_matrix = df_matrix[['Ticker', 'Company', 'Sector', 'Price', 'P/E', 'P/B', 'EV/EBITDA']].copy()
+        df_matrix['Severity'] = matrix_signals['Severity']
         
         # Filter by sector if needed
-        sectors = sorted(df_matrix['Sector'].unique())
-        sector_filter = st.selectbox("Filter by Sector (optional):", ["All Sectors"] + sectors)
+        sector_filter = st.selectbox("Filter by Sector (optional):", ["All Sectors"] + universe.sectors)
         
         if sector_filter != "All Sectors":
             df_matrix = df_matrix[df_matrix['Sector'] == sector_filter]
         
         st.markdown(f"**Showing {len(df_matrix)} stocks**")
         
+        df_matrix.insert(3, 'Signal', signal_labels(matrix_signals.loc[df_matrix.index]))
+        
         st.dataframe(
             df_matrix.style.format({
                 'Price': '₹{:.0f}',
                 'P/E': '{:.2f}x',
                 'P/B': '{:.2f}x',
                 'EV/EBITDA': '{:.2f}x'
-            }),
+            }, na_rep='N/A'),
             use_container_width=True,
             hide_index=True
         )
@@ -1281,6 +1309,10 @@ else:  # Relative Valuation Matrix
         with col4:
             st.metric("Total Stocks", len(df_matrix))
         
+        overall = matrix_signals.loc[df_matrix.index, 'Overall']
+        st.markdown(f"**Signals:** 🟢 {(overall < 0).sum()} undervalued · "
+                    f"🟡 {(overall == 0).sum()} fairly valued · 🔴 {(overall > 0).sum()} overvalued")
+        
         st.markdown("---")
         st.info("Use this matrix to identify undervalued and overvalued stocks across the entire NIFTY 50 index.")
 
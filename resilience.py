@@ -0,0 +1,249 @@
+"""
+UPSTREAM RESILIENCE
+Rate limiting, retries and circuit breaking for market data calls
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+This module provides:
+1. FetchError - structured failure (ticker, kind, retry_after)
+2. TokenBucket - shared rate limiter for upstream calls
+3. retry_with_backoff - jittered exponential-backoff retries
+4. CircuitBreaker - per-host breaker that fails fast while a host is down
+5. NegativeCache - remembers failures for a kind-specific TTL so a
+   throttled ticker is not retried on every rerun
+"""
+
+import random
+import threading
+import time
+
+# Seconds a failure of each kind is remembered before the ticker is retried
+NEGATIVE_CACHE_TTL = {
+    'rate_limited': 120,
+    'not_found': 3600,
+    'no_data': 900,
+    'network': 30,
+    'timeout': 30,
+    'circuit_open': 15,
+    'upstream': 60,
+}
+
+# Human-readable description of each failure kind
+KIND_MESSAGES = {
+    'rate_limited': 'rate limited by data provider',
+    'not_found': 'ticker not found',
+    'no_data': 'no data returned',
+    'network': 'network unavailable',
+    'timeout': 'request timed out',
+    'circuit_open': 'data provider unavailable',
+    'upstream': 'data provider error',
+}
+
+# Failure kinds worth retrying immediately (with backoff)
+RETRYABLE_KINDS = {'rate_limited', 'network', 'timeout', 'upstream'}
+
+
+# ============================================================================
+# 1. STRUCTURED ERRORS
+# ============================================================================
+
+class FetchError(Exception):
+    """
+    Structured market data failure
+
+    kind: 'rate_limited', 'not_found', 'no_data', 'network', 'timeout',
+          'circuit_open' or 'upstream'
+    retry_after: seconds until the call is worth retrying
+    detail: underlying exception text, if any
+    """
+
+    def __init__(self, ticker, kind, message='', retry_after=None, detail=''):
+        self.ticker = ticker
+        self.kind = kind
+        self.message = message or KIND_MESSAGES.get(kind, kind.replace('_', ' '))
+        self.retry_after = NEGATIVE_CACHE_TTL.get(kind, 60) if retry_after is None else retry_after
+        self.detail = detail
+        super().__init__(f"{ticker}: {self.message}")
+
+    @property
+    def retryable(self):
+        return self.kind in RETRYABLE_KINDS
+
+    def __reduce__(self):
+        return (FetchError, (self.ticker, self.kind, self.message, self.retry_after, self.detail))
+
+
+def classify_error(exc):
+    """Map an arbitrary upstream exception to a FetchError kind"""
+    if isinstance(exc, FetchError):
+        return exc.kind
+
+    name = type(exc).__name__.lower()
+    text = str(exc).lower()
+
+    if 'ratelimit' in name or 'too many requests' in text or '429' in text:
+        return 'rate_limited'
+    if 'timeout' in name or 'timed out' in text:
+        return 'timeout'
+    if '404' in text or 'not found' in text or 'delisted' in text:
+        return 'not_found'
+    if 'connection' in name or 'dns' in name or 'dns' in text or 'resolve' in text or isinstance(exc, OSError):
+        return 'network'
+    return 'upstream'
+
+
+def as_fetch_error(ticker, exc):
+    """Wrap any exception as a FetchError"""
+    if isinstance(exc, FetchError):
+        return exc
+    return FetchError(ticker, classify_error(exc), detail=f"{type(exc).__name__}: {exc}")
+
+
+# ============================================================================
+# 2. TOKEN-BUCKET RATE LIMITER
+# ============================================================================
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    rate: tokens added per second (sustained request rate)
+    capacity: maximum burst size
+    """
+
+    def __init__(self, rate=4.0, capacity=8):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until tokens are available; False if timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+# ============================================================================
+# 3. RETRIES WITH JITTERED EXPONENTIAL BACKOFF
+# ============================================================================
+
+def retry_with_backoff(fn, attempts=3, base_delay=0.5, max_delay=8.0, should_retry=None):
+    """
+    Call fn() up to `attempts` times
+
+    Sleeps a random "full jitter" delay in [0, min(max_delay, base * 2^n)]
+    between attempts. should_retry(exc) decides whether an exception is
+    worth another attempt (default: always).
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            last_attempt = attempt == attempts - 1
+            if last_attempt or (should_retry is not None and not should_retry(e)):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+# ============================================================================
+# 4. CIRCUIT BREAKER
+# ============================================================================
+
+class CircuitBreaker:
+    """
+    Fail fast while an upstream host is down
+
+    closed    -> calls pass; `failure_threshold` consecutive failures open it
+    open      -> calls are rejected until `reset_timeout` seconds pass
+    half_open -> one trial call is let through; success closes the
+                 breaker, failure opens it again
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may be attempted now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self):
+        """Seconds until the breaker lets a trial call through"""
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+# ============================================================================
+# 5. NEGATIVE CACHE
+# ============================================================================
+
+class NegativeCache:
+    """Remember FetchErrors per key until their retry_after expires"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached FetchError for key, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            error, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            return error
+
+    def put(self, key, error):
+        with self._lock:
+            self._entries[key] = (error, time.monotonic() + error.retry_after)
+
+    def __len__(self):
+        return len(self._entries)
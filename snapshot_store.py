@@ -0,0 +1,363 @@
+"""
+MARKET SNAPSHOT STORE
+Persistent on-disk store for fetched market data
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+Keeps the last fetched info fields and daily price history for every
+ticker in a local SQLite database so that restarts do not re-hit Yahoo
+Finance for the whole universe, price history is only ever downloaded
+once (new bars are appended), and the app can render offline from the
+last snapshot.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_data import (project_info, split_ohlcv, period_start, PricePanel,
+                         OHLCV_COLUMNS)
+
+DEFAULT_DATA_DIR = os.environ.get(
+    'NIFTY_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.market_cache')
+)
+DEFAULT_DB_PATH = os.path.join(DEFAULT_DATA_DIR, 'market_snapshots.sqlite')
+
+# Snapshots kept per ticker before older ones are pruned
+DEFAULT_HISTORY = 5
+
+# Incremental price updates re-fetch this many calendar days before the
+# last stored bar, so adjustment restatements can be detected on the overlap
+PRICE_OVERLAP_DAYS = 7
+# Relative close-price difference on the overlap treated as a restatement
+RESTATEMENT_TOLERANCE = 1e-4
+# Minimum seconds between incremental refreshes of the same ticker
+PRICE_REFRESH_INTERVAL = 900
+
+
+class _SQLiteStore:
+    """Shared SQLite connection guarded by a lock (usable from any thread)"""
+
+    SCHEMA = ()
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class InfoSnapshot:
+    """A persisted info record and the time it was fetched"""
+
+    __slots__ = ('ticker', 'fetched_at', 'info')
+
+    def __init__(self, ticker, fetched_at, info):
+        self.ticker = ticker
+        self.fetched_at = fetched_at
+        self.info = info
+
+    @property
+    def age(self):
+        """Seconds since the snapshot was fetched"""
+        return time.time() - self.fetched_at
+
+
+class SnapshotStore(_SQLiteStore):
+    """
+    SQLite-backed snapshot store keyed by (ticker, fetch timestamp)
+
+    Only the INFO_FIELDS of each info dict are persisted. A single
+    connection is shared across threads behind a lock, so the store can be
+    written to from the concurrent fetch pool.
+    """
+
+    SCHEMA = ("""
+        CREATE TABLE IF NOT EXISTS info_snapshots (
+            ticker TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            payload TEXT NOT NULL,
+            PRIMARY KEY (ticker, fetched_at)
+        )
+    """,)
+
+    def __init__(self, path=DEFAULT_DB_PATH, history=DEFAULT_HISTORY):
+        super().__init__(path)
+        self.history = history
+
+    def put(self, ticker, info, fetched_at=None):
+        """Persist the valuation fields of an info dict"""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        payload = json.dumps(project_info(info))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO info_snapshots VALUES (?, ?, ?)',
+                (ticker, fetched_at, payload)
+            )
+            # Keep only the most recent snapshots for this ticker
+            self._conn.execute("""
+                DELETE FROM info_snapshots
+                WHERE ticker = ? AND fetched_at NOT IN (
+                    SELECT fetched_at FROM info_snapshots
+                    WHERE ticker = ? ORDER BY fetched_at DESC LIMIT ?
+                )
+            """, (ticker, ticker, self.history))
+
+        return fetched_at
+
+    def latest(self, ticker):
+        """Most recent InfoSnapshot for a ticker, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT fetched_at, payload FROM info_snapshots '
+                'WHERE ticker = ? ORDER BY fetched_at DESC LIMIT 1',
+                (ticker,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return InfoSnapshot(ticker, row[0], json.loads(row[1]))
+
+    def tickers(self):
+        """All tickers with at least one snapshot"""
+        with self._lock:
+            rows = self._conn.execute('SELECT DISTINCT ticker FROM info_snapshots').fetchall()
+        return [row[0] for row in rows]
+
+
+class PriceArchive(_SQLiteStore):
+    """
+    Local daily OHLCV archive with incremental updates
+
+    For every ticker the archive records the first date it covers and the
+    last stored bar. sync() then downloads only what is missing:
+    - tickers with no (or too short) history get one batched full download
+    - tickers already covered get one batched download of the bars since
+      their last stored date (plus a small overlap)
+    - if the overlap disagrees with the stored closes, the history was
+      restated (split/dividend adjustment) and that ticker is reloaded
+    - the last stored bar (and any bar dated today) may be a partial
+      intraday close, so it is overwritten rather than compared
+    """
+
+    SCHEMA = ("""
+        CREATE TABLE IF NOT EXISTS prices (
+            ticker TEXT NOT NULL,
+            date TEXT NOT NULL,
+            open REAL, high REAL, low REAL, close REAL, volume REAL,
+            PRIMARY KEY (ticker, date)
+        )
+    """, """
+        CREATE TABLE IF NOT EXISTS price_meta (
+            ticker TEXT PRIMARY KEY,
+            coverage_start TEXT,
+            last_date TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+
+    def __init__(self, path=DEFAULT_DB_PATH, refresh_interval=PRICE_REFRESH_INTERVAL):
+        super().__init__(path)
+        self.refresh_interval = refresh_interval
+        self.stats = {'full': 0, 'incremental': 0, 'restated': 0, 'rows_written': 0}
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+
+    def meta(self, ticker):
+        """(coverage_start, last_date, updated_at) for a ticker, or None"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT coverage_start, last_date, updated_at FROM price_meta WHERE ticker = ?',
+                (ticker,)
+            ).fetchone()
+
+    @staticmethod
+    def _covers(coverage_start, requested_start):
+        """True if stored history reaches back to the requested start"""
+        if coverage_start is None:  # full 'max' history stored
+            return True
+        if requested_start is None:
+            return False
+        return coverage_start <= requested_start.strftime('%Y-%m-%d')
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _write(self, ticker, frame, coverage_start, replace=False):
+        dates = frame.index.strftime('%Y-%m-%d').tolist()
+        values = frame[OHLCV_COLUMNS].to_numpy(dtype='float64').tolist()
+        rows = [(ticker, date, *bar) for date, bar in zip(dates, values)]
+        last_date = frame.index.max().strftime('%Y-%m-%d')
+
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute('DELETE FROM prices WHERE ticker = ?', (ticker,))
+            else:
+                row = self._conn.execute(
+                    'SELECT last_date FROM price_meta WHERE ticker = ?', (ticker,)
+                ).fetchone()
+                if row is not None:
+                    last_date = max(last_date, row[0])
+
+            self._conn.executemany('INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO price_meta VALUES (?, ?, ?, ?)',
+                (ticker, coverage_start, last_date, time.time())
+            )
+
+        self.stats['rows_written'] += len(rows)
+
+    def _touch(self, ticker):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE price_meta SET updated_at = ? WHERE ticker = ?',
+                               (time.time(), ticker))
+
+    def _stored_closes(self, ticker, since):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date, close FROM prices WHERE ticker = ? AND date >= ?',
+                (ticker, since)
+            ).fetchall()
+        return pd.Series({pd.Timestamp(date): close for date, close in rows}, dtype='float64')
+
+    def _is_restated(self, ticker, fresh, last_date):
+        """
+        Compare freshly downloaded closes with stored ones on the overlap
+
+        Only settled bars count: the last stored bar and today's bar may
+        have been written mid-session, and a changed close there is the
+        day moving on, not a restatement.
+        """
+        settled = min(pd.Timestamp(last_date), pd.Timestamp.today().normalize())
+        fresh_overlap = fresh.loc[fresh.index < settled, 'Close']
+        if len(fresh_overlap) == 0:
+            return False
+
+        stored = self._stored_closes(ticker, fresh_overlap.index.min().strftime('%Y-%m-%d'))
+        common = stored.index.intersection(fresh_overlap.index)
+        if len(common) == 0:
+            return False
+
+        old = stored.loc[common].values
+        new = fresh_overlap.loc[common].values
+        return bool(np.any(np.abs(new - old) > RESTATEMENT_TOLERANCE * np.abs(old)))
+
+    # ------------------------------------------------------------------
+    # Synchronisation
+    # ------------------------------------------------------------------
+
+    def sync(self, tickers, period, download):
+        """
+        Bring the archive up to date for `tickers` over `period`
+
+        download(tickers, period=None, start=None) must return a
+        yf.download-style frame for the list of tickers.
+        """
+        requested_start = period_start(period)
+        coverage_start = requested_start.strftime('%Y-%m-%d') if requested_start is not None else None
+        now = time.time()
+
+        full, incremental = [], {}
+        for ticker in dict.fromkeys(tickers):
+            meta = self.meta(ticker)
+            if meta is None or not self._covers(meta[0], requested_start):
+                full.append(ticker)
+            elif now - meta[2] >= self.refresh_interval:
+                incremental[ticker] = meta
+
+        restated = []
+
+        if incremental:
+            since = min(meta[1] for meta in incremental.values())
+            start = pd.Timestamp(since) - pd.Timedelta(days=PRICE_OVERLAP_DAYS)
+            frames = split_ohlcv(download(list(incremental), start=start.strftime('%Y-%m-%d')),
+                                 list(incremental))
+
+            for ticker, meta in incremental.items():
+                frame = frames.get(ticker)
+                if frame is None:
+                    self._touch(ticker)
+                elif self._is_restated(ticker, frame, meta[1]):
+                    restated.append(ticker)
+                else:
+                    self._write(ticker, frame, meta[0])
+            self.stats['incremental'] += len(incremental)
+
+        reload = full + restated
+        if reload:
+            frames = split_ohlcv(download(reload, period=period), reload)
+            for ticker in reload:
+                frame = frames.get(ticker)
+                if frame is not None:
+                    self._write(ticker, frame, coverage_start, replace=True)
+            self.stats['full'] += len(full)
+            self.stats['restated'] += len(restated)
+
+        return {'full': full, 'incremental': list(incremental), 'restated': restated}
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def load(self, ticker, period='max'):
+        """Stored OHLCV history for one ticker over a period"""
+        requested_start = period_start(period)
+        since = requested_start.strftime('%Y-%m-%d') if requested_start is not None else ''
+
+        with self._lock:
+            frame = pd.read_sql_query(
+                'SELECT date, open, high, low, close, volume FROM prices '
+                'WHERE ticker = ? AND date >= ? ORDER BY date',
+                self._conn, params=(ticker, since), parse_dates=['date']
+            )
+
+        frame = frame.set_index('date').astype('float64')
+        frame.columns = OHLCV_COLUMNS
+        frame.index.name = 'Date'
+        return frame
+
+    def load_panel(self, tickers, period='max'):
+        """Stored Close/Volume for many tickers as an aligned PricePanel"""
+        tickers = list(dict.fromkeys(tickers))
+        requested_start = period_start(period)
+        since = requested_start.strftime('%Y-%m-%d') if requested_start is not None else ''
+        placeholders = ','.join('?' * len(tickers))
+
+        with self._lock:
+            long = pd.read_sql_query(
+                f'SELECT ticker, date, close, volume FROM prices '
+                f'WHERE ticker IN ({placeholders}) AND date >= ?',
+                self._conn, params=(*tickers, since), parse_dates=['date']
+            )
+
+        close = long.pivot(index='date', columns='ticker', values='close')
+        volume = long.pivot(index='date', columns='ticker', values='volume')
+
+        present = [t for t in tickers if t in close.columns]
+        missing = [t for t in tickers if t not in close.columns]
+        close = close.reindex(columns=present).sort_index().astype('float64')
+        volume = volume.reindex(index=close.index, columns=present).astype('float64')
+        close.columns.name = volume.columns.name = None
+        close.index.name = volume.index.name = 'Date'
+
+        return PricePanel(close, volume, missing=missing)
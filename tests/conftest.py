@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to the Streamlit app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def snapshot():
+    """Three-stock IT universe priced at 100 with P/E 10, 20 and 30"""
+    from valuation_engine import build_universe_snapshot
+
+    universe = {
+        'A.NS': {'Company': 'Alpha', 'Sector': 'IT'},
+        'B.NS': {'Company': 'Beta', 'Sector': 'IT'},
+        'C.NS': {'Company': 'Gamma', 'Sector': 'IT'},
+    }
+    records = {
+        ticker: {'currentPrice': 100.0, 'trailingPE': pe, 'priceToBook': 3.0, 'marketCap': 1e11}
+        for ticker, pe in zip(universe, [10.0, 20.0, 30.0])
+    }
+    return build_universe_snapshot(records, universe)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparable_multiples import (MULTIPLE_BASES, MULTIPLE_TYPES, STATISTICS, calculate_implied_valuation,
+                                  get_valuation_summary, implied_valuation_tensor, multiples_array,
+                                  snapshot_financials, universe_valuation_summary)
+
+FINANCIALS = pd.DataFrame({
+    'market_cap': [500000.0, 180000.0],
+    'net_income': [20000.0, 9000.0],
+    'book_value': [100000.0, 60000.0],
+    'revenue': [150000.0, 70000.0],
+    'ebitda': [35000.0, 15000.0],
+    'net_debt': [-20000.0, 30000.0],
+    'shares_outstanding': [3600.0, 1400.0],
+    'share_price': [1400.0, 1300.0],
+}, index=['TCS.NS', 'HDFCBANK.NS'])
+
+
+def test_universe_summary_is_keyed_by_ticker():
+    summary = universe_valuation_summary(FINANCIALS, ['IT & Software', 'Financial Services'])
+
+    assert list(summary.columns[:2]) == ['Ticker', 'Sector']
+    assert set(summary['Ticker']) == {'TCS.NS', 'HDFCBANK.NS'}
+
+
+def test_single_company_summary_matches_the_universe_rows():
+    universe = universe_valuation_summary(FINANCIALS, ['IT & Software', 'Financial Services'])
+    single = get_valuation_summary(FINANCIALS.loc['TCS.NS'].to_dict(), 'IT & Software')
+
+    expected = universe[universe['Ticker'] == 'TCS.NS'].drop(columns=['Ticker', 'Sector'])
+    pd.testing.assert_frame_equal(single.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_snapshot_financials_returns_frame_and_sectors(snapshot):
+    financials, sectors = snapshot_financials(snapshot)
+
+    assert isinstance(financials, pd.DataFrame)
+    assert isinstance(sectors, np.ndarray)
+    assert list(financials.index) == ['A.NS', 'B.NS', 'C.NS']
+    assert list(sectors) == ['IT', 'IT', 'IT']
+
+
+MULTIPLES = {
+    'P/E': {'avg': 25.0, 'median': 22.0, 'high': 40.0, 'low': 0.0},
+    'P/B': {'avg': 4.0, 'median': 3.5, 'high': 8.0, 'low': -1.0},
+    'P/S': {'avg': 5.0, 'median': 4.0, 'high': 9.0, 'low': None},
+    'EV/EBITDA': {'avg': 18.0, 'median': 16.0, 'high': 30.0, 'low': 2.0},
+}
+
+# Negative, zero and missing bases, net debt larger than the implied EV,
+# and zero or negative prices
+EDGE_FINANCIALS = pd.DataFrame({
+    'market_cap': [500000.0, 90000.0, 4000.0, 60000.0, 1000.0],
+    'net_income': [20000.0, -3000.0, 0.0, np.nan, 50.0],
+    'book_value': [100000.0, 40000.0, -500.0, 20000.0, 0.0],
+    'revenue': [150000.0, 0.0, 3000.0, np.nan, 400.0],
+    'ebitda': [35000.0, 8000.0, 100.0, -200.0, 80.0],
+    'net_debt': [-20000.0, 200000.0, 1000.0, 5000.0, 0.0],
+    'shares_outstanding': [3600.0, 900.0, 0.0, 500.0, 10.0],
+    'share_price': [1400.0, 1000.0, 0.0, -5.0, 100.0],
+}, index=['A', 'B', 'C', 'D', 'E'])
+
+
+def _scalar_implied_valuation(financials, multiples, multiple_type):
+    """The per-company, per-method loop implied_valuation_tensor replaced"""
+    base = financials[MULTIPLE_BASES[multiple_type]]
+    if not base > 0:
+        return {}
+    net_debt = financials['net_debt'] if multiple_type == 'EV/EBITDA' else 0.0
+    results = {}
+    for method in STATISTICS:
+        multiple = multiples[multiple_type].get(method)
+        if not (multiple and multiple > 0):
+            continue
+        implied_value = multiple * base
+        implied_market_cap = implied_value - net_debt
+        if implied_market_cap <= 0:
+            implied_market_cap = implied_value
+        implied_price = implied_market_cap / (financials['shares_outstanding'] + 0.01) * 10
+        price = financials['share_price']
+        results[method] = {
+            'multiple': multiple,
+            'implied_market_cap': implied_market_cap,
+            'implied_price': implied_price,
+            'current_price': price,
+            'upside_downside': (implied_price - price) / price * 100 if implied_price > 0 and price > 0 else 0,
+            'current_multiple': (financials['market_cap'] + net_debt) / base,
+        }
+        if multiple_type == 'EV/EBITDA':
+            results[method]['implied_ev'] = implied_value
+    return results
+
+
+def test_implied_valuation_tensor_matches_the_scalar_loop():
+    tensor = implied_valuation_tensor(EDGE_FINANCIALS, multiples_array(MULTIPLES))
+
+    for n, financials in enumerate(EDGE_FINANCIALS.to_dict('records')):
+        for t, multiple_type in enumerate(MULTIPLE_TYPES):
+            expected = _scalar_implied_valuation(financials, MULTIPLES, multiple_type)
+            single = calculate_implied_valuation(financials, MULTIPLES, multiple_type)
+            assert set(single) == set(expected), (n, multiple_type)
+
+            for s, method in enumerate(STATISTICS):
+                assert tensor['valid'][n, t, s] == (method in expected), (n, multiple_type, method)
+                for key, value in expected.get(method, {}).items():
+                    assert single[method][key] == pytest.approx(value), (n, multiple_type, method, key)
+                    assert tensor[key][n, t, s] == pytest.approx(value), (n, multiple_type, method, key)
@@ -0,0 +1,349 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from financial_risk_modeling import (CONFIDENCE_LEVELS, BatchRelativeValuation, FinancialRiskModel,
+                                     RelativeValuation, RiskEngine, tail_risk)
+from valuation_thresholds import THRESHOLDS
+
+
+def _ols_slope(y, x):
+    """Least-squares slope of y on x: the beta with any consistent ddof"""
+    return np.polyfit(x, y, 1)[0]
+
+
+@pytest.fixture
+def market_panel():
+    """Returns of four tickers against a market, with gaps and a late listing"""
+    rng = np.random.default_rng(7)
+    market = rng.normal(0.0005, 0.01, 300)
+    returns = 1.3 * market[:, None] * [1, 0.5, 2, 1] + rng.normal(0, 0.01, (300, 4))
+    returns[[10, 50, 51], 1] = np.nan       # gaps
+    returns[:120, 2] = np.nan               # listed late
+    returns[200:, 3] = np.nan               # delisted
+    return returns, market
+
+
+def test_single_series_beta_is_the_regression_slope(market_panel):
+    returns, market = market_panel
+    model = FinancialRiskModel(returns[:, 0], market)
+
+    assert model.calculate_beta() == pytest.approx(_ols_slope(returns[:, 0], market))
+
+
+def test_engine_beta_uses_each_column_s_own_dates(market_panel):
+    returns, market = market_panel
+    beta = RiskEngine(returns, market).calculate_beta()
+
+    for i in range(returns.shape[1]):
+        valid = ~np.isnan(returns[:, i])
+        assert beta[i] == pytest.approx(_ols_slope(returns[valid, i], market[valid]))
+
+    assert beta[0] == pytest.approx(FinancialRiskModel(returns[:, 0], market).calculate_beta())
+
+
+def test_rolling_beta_matches_each_window(market_panel):
+    returns, market = market_panel
+    window = 40
+    rolling = RiskEngine(returns, market).rolling_beta(window).to_numpy()
+
+    for i in range(returns.shape[1]):
+        for t in range(window - 1, len(market)):
+            y, x = returns[t - window + 1:t + 1, i], market[t - window + 1:t + 1]
+            if np.isnan(y).any():
+                assert np.isnan(rolling[t, i])
+            else:
+                assert rolling[t, i] == pytest.approx(_ols_slope(y, x), rel=1e-8)
+
+
+def _window_tail(window_returns, confidence):
+    var = np.percentile(window_returns, (1 - confidence) * 100)
+    return var, window_returns[window_returns <= var].mean()
+
+
+@pytest.mark.parametrize('decimals', [None, 3])
+def test_rolling_var_cvar_matches_each_window(decimals):
+    rng = np.random.default_rng(11)
+    returns = rng.normal(0, 0.02, (160, 3))
+    if decimals is not None:
+        returns = np.round(returns, decimals)     # many ties at VAR
+    returns[[20, 21, 90], 0] = np.nan             # gaps
+    returns[:70, 1] = np.nan                      # late listing
+    window, levels = 30, (0.9, 0.95, 0.99)
+
+    var, cvar = RiskEngine(returns).rolling_var_cvar(window, levels)
+
+    for c in levels:
+        for i in range(returns.shape[1]):
+            for t in range(len(returns)):
+                sample = returns[max(0, t - window + 1):t + 1, i]
+                if t < window - 1 or np.isnan(sample).any():
+                    assert np.isnan(var[c].iat[t, i]) and np.isnan(cvar[c].iat[t, i])
+                else:
+                    expected_var, expected_cvar = _window_tail(sample, c)
+                    assert var[c].iat[t, i] == pytest.approx(expected_var, abs=1e-12)
+                    assert cvar[c].iat[t, i] == pytest.approx(expected_cvar, abs=1e-12)
+
+
+def test_rolling_var_cvar_short_history_is_all_nan():
+    var, cvar = RiskEngine(np.zeros((10, 2))).rolling_var_cvar(20)
+
+    assert var[0.95].isna().all().all()
+    assert cvar[0.95].isna().all().all()
+
+
+def _drawdown_reference(returns):
+    """Loop-based max drawdown, its spell length and the longest spell of one column"""
+    observed = np.flatnonzero(~np.isnan(returns))
+    wealth, peak, peak_at = 1.0, 1.0, observed[0] - 1
+    worst, worst_spell, spells, under_since = 0.0, 0, [], None
+
+    for t in range(observed[0], observed[-1] + 1):
+        if not np.isnan(returns[t]):
+            wealth *= 1 + returns[t]
+        if wealth >= peak:
+            if under_since is not None:
+                spells.append((under_since, t - peak_at))
+            peak, peak_at, under_since = wealth, t, None
+        else:
+            if under_since is None:
+                under_since = peak_at
+            drawdown = (wealth - peak) / peak
+            if drawdown < worst:
+                worst, worst_peak = drawdown, peak_at
+    if under_since is not None:
+        spells.append((under_since, observed[-1] - peak_at))
+
+    lengths = dict(spells)
+    if worst < 0:
+        worst_spell = lengths[worst_peak]
+    return worst, worst_spell, max(lengths.values(), default=0)
+
+
+def _from_prices(columns):
+    prices = pd.DataFrame(columns, index=pd.bdate_range('2024-01-01', periods=len(next(iter(columns.values())))))
+    return RiskEngine.from_prices(prices).calculate_maximum_drawdown()
+
+
+def test_recovery_day_counts_in_both_durations():
+    result = _from_prices({'A': [100, 90, 100, 100]}).loc['A']
+
+    assert result['Time Under Water'] == 2
+    assert result['Longest Under Water'] == 2
+    assert result['Recovery Date'] == pd.Timestamp('2024-01-03')
+
+
+def test_durations_stop_at_the_last_observation():
+    result = _from_prices({
+        'A': [100, 90, 80, 85, np.nan, np.nan, np.nan, np.nan],
+        'B': [100, 101, 102, 103, 104, 105, 106, 107],
+    }).loc['A']
+
+    assert result['Max Drawdown'] == pytest.approx(-0.2)
+    assert result['Time Under Water'] == 3
+    assert result['Longest Under Water'] == 3
+    assert pd.isna(result['Recovery Date'])
+
+
+def test_never_drawn_down_has_no_recovery_date():
+    result = _from_prices({'A': [100, 101, 102, 103]}).loc['A']
+
+    assert result['Max Drawdown'] == 0
+    assert pd.isna(result['Recovery Date'])
+    assert result['Time Under Water'] == 0
+    assert result['Longest Under Water'] == 0
+
+
+def test_drawdowns_match_a_loop_over_ragged_columns():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0.0003, 0.02, (400, 6))
+    returns[:90, 1] = np.nan                        # listed late
+    returns[250:, 2] = np.nan                       # delisted
+    returns[rng.random((400, 6)) < 0.03] = np.nan   # gaps
+    returns[:, 3] = np.abs(returns[:, 3])           # never below a peak
+    returns[np.isnan(returns[:, 3]), 3] = 0.0
+
+    result = RiskEngine(returns).calculate_maximum_drawdown()
+
+    for i in range(returns.shape[1]):
+        worst, worst_spell, longest = _drawdown_reference(returns[:, i])
+        assert result['Max Drawdown'].iat[i] == pytest.approx(worst, abs=1e-12)
+        assert result['Time Under Water'].iat[i] == worst_spell
+        assert result['Longest Under Water'].iat[i] == longest
+
+
+def test_drawdown_curve_stops_after_delisting():
+    returns = np.array([[-0.1, 0.01], [0.05, 0.01], [np.nan, 0.01]])
+    curve = RiskEngine(returns).drawdown_curve().to_numpy()
+
+    assert np.isnan(curve[2, 0])
+    assert curve[1, 0] == pytest.approx(0.9 * 1.05 - 1)
+
+
+def test_engine_max_drawdown_matches_single_series_model():
+    returns = np.random.default_rng(5).normal(0, 0.02, (250, 3))
+    engine = RiskEngine(returns).calculate_maximum_drawdown()
+
+    for i in range(3):
+        model = FinancialRiskModel(returns[:, i])
+        assert engine['Max Drawdown'].iat[i] == pytest.approx(model.calculate_maximum_drawdown())
+
+
+def _ragged_returns(seed=0, T=260, N=5):
+    """Returns with gaps, a late listing, a delisting and an empty column"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.018, (T, N))
+    returns[rng.random((T, N)) < 0.04] = np.nan
+    returns[:T // 3, 1] = np.nan
+    returns[2 * T // 3:, 2] = np.nan
+    returns[:, -1] = np.nan
+    return returns
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_tail_risk_matches_percentile_and_tail_mean(seed):
+    rng = np.random.default_rng(seed)
+    T = int(rng.integers(1, 300))
+    returns = rng.normal(0, 0.02, (T, 4))
+    if seed % 2:
+        returns = np.round(returns, 2)          # heavy ties
+    returns[rng.random((T, 4)) < 0.1] = np.nan
+
+    var, cvar = tail_risk(returns, CONFIDENCE_LEVELS)
+
+    for j, c in enumerate(CONFIDENCE_LEVELS):
+        for i in range(4):
+            sample = returns[~np.isnan(returns[:, i]), i]
+            if len(sample) == 0:
+                assert np.isnan(var[j, i]) and np.isnan(cvar[j, i])
+                continue
+            expected = np.percentile(sample, (1 - c) * 100)
+            assert var[j, i] == pytest.approx(expected, abs=1e-15)
+            assert cvar[j, i] == pytest.approx(sample[sample <= expected].mean(), abs=1e-15)
+
+
+def test_tail_risk_ties_at_var_extend_past_the_sorted_tail():
+    returns = np.concatenate([[-0.05], np.full(50, -0.01), np.linspace(0.001, 0.05, 149)])
+    np.random.default_rng(0).shuffle(returns)
+
+    var, cvar = tail_risk(returns, [0.95, 0.99])
+
+    assert var[0] == pytest.approx(-0.01)
+    assert cvar[0] == pytest.approx((-0.05 - 0.01 * 50) / 51)
+    assert cvar[1] == pytest.approx(np.mean(returns[returns <= var[1]]))
+
+
+def test_single_series_tail_risk_matches_engine_columns():
+    returns = _ragged_returns()
+    engine = RiskEngine(returns).calculate_tail_risk()
+
+    for i in range(4):
+        sample = returns[~np.isnan(returns[:, i]), i]
+        model = FinancialRiskModel(sample).calculate_tail_risk()
+        for c in CONFIDENCE_LEVELS:
+            assert engine[f'VAR_{c}'].iat[i] == pytest.approx(model.loc[c, 'VAR'])
+            assert engine[f'CVaR_{c}'].iat[i] == pytest.approx(model.loc[c, 'CVaR'])
+            assert model.loc[c, 'VAR'] == pytest.approx(FinancialRiskModel(sample).calculate_var(c))
+
+    assert engine.iloc[4].isna().all()
+
+
+def test_engine_matches_single_series_model_on_each_column():
+    returns = _ragged_returns(seed=1)
+    engine = RiskEngine(returns)
+    volatility = engine.calculate_volatility()
+    sharpe = engine.calculate_sharpe_ratio()
+    sortino = engine.calculate_sortino_ratio()
+    var, cvar = engine.calculate_var(0.99), engine.calculate_cvar(0.99)
+
+    for i in range(4):
+        model = FinancialRiskModel(returns[~np.isnan(returns[:, i]), i])
+        assert volatility[i] == pytest.approx(model.calculate_volatility())
+        assert sharpe[i] == pytest.approx(model.calculate_sharpe_ratio())
+        assert sortino[i] == pytest.approx(model.calculate_sortino_ratio())
+        assert var[i] == pytest.approx(model.calculate_var(0.99))
+        assert cvar[i] == pytest.approx(model.calculate_cvar(0.99))
+
+    assert np.isnan(volatility[4]) and np.isnan(sharpe[4])
+
+    metrics = engine.calculate_all_risk_metrics()
+    assert list(metrics['Observations']) == list((~np.isnan(returns)).sum(axis=0))
+
+
+def test_rolling_moments_match_each_window():
+    returns = _ragged_returns(seed=2, T=150, N=4)
+    window = 21
+    engine = RiskEngine(returns)
+    volatility = engine.rolling_volatility(window).to_numpy()
+    sharpe = engine.rolling_sharpe_ratio(window).to_numpy()
+    sortino = engine.rolling_sortino_ratio(window).to_numpy()
+
+    for i in range(returns.shape[1]):
+        for t in range(len(returns)):
+            sample = returns[max(0, t - window + 1):t + 1, i]
+            if t < window - 1 or np.isnan(sample).any():
+                assert np.isnan(volatility[t, i]) and np.isnan(sharpe[t, i]) and np.isnan(sortino[t, i])
+                continue
+            model = FinancialRiskModel(sample)
+            assert volatility[t, i] == pytest.approx(model.calculate_volatility(), rel=1e-9)
+            assert sharpe[t, i] == pytest.approx(model.calculate_sharpe_ratio(), rel=1e-9)
+            assert sortino[t, i] == pytest.approx(model.calculate_sortino_ratio(), rel=1e-9)
+
+
+def test_rolling_risk_metrics_frame_layout():
+    returns = _ragged_returns(seed=3, T=120, N=3)
+    market = np.random.default_rng(3).normal(0, 0.01, 120)
+
+    frame = RiskEngine(returns, market).calculate_rolling_risk_metrics(windows=(20, 60))
+
+    assert frame.shape == (120, 2 * 6 * 3)
+    assert set(frame.columns.get_level_values('Metric')) == {
+        'Volatility', 'Sharpe Ratio', 'Sortino Ratio', 'VAR_0.95', 'CVaR_0.95', 'Beta'}
+    assert frame.sort_index(axis=1)[(60, 'Volatility')].iloc[:59].isna().all().all()
+
+
+def test_nan_multiples_raise_no_flag_and_score_no_points():
+    model = RelativeValuation({'current_price': 100.0, 'earnings_per_share': np.nan, 'book_value_per_share': np.nan,
+                               'sales_per_share': np.nan, 'ebitda': np.nan, 'market_cap': 1e5,
+                               'earnings_growth_rate': np.nan})
+    model.calculate_all_metrics()
+
+    assert model.risk_signals == []
+    assert model.get_valuation_score() == 50
+
+
+@pytest.fixture
+def companies():
+    """Companies with multiples on every flag cut-off, negative, zero and missing inputs"""
+    return pd.DataFrame({
+        'current_price':        [100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 0.0, 100.0],
+        'earnings_per_share':   [4.0, 100 / 12, -5.0, 0.0, np.nan, 100 / 15, 2.0, 10.0],
+        'book_value_per_share': [100 / 3, 100.0, -20.0, 50.0, np.nan, 0.0, 1.0, 40.0],
+        'sales_per_share':      [100 / 3, 100.0, 10.0, 0.0, 50.0, np.nan, 1.0, 25.0],
+        'ebitda':               [1000.0, 2000.0, -100.0, 0.0, np.nan, 500.0, 10.0, 1500.0],
+        'market_cap':           [14000.0, 15000.0, 5000.0, 8000.0, 1000.0, 7500.0, 100.0, 12000.0],
+        'debt':                 [2000.0, 1000.0, 0.0, 0.0, 0.0, 0.0, 0.0, 500.0],
+        'cash':                 [1000.0, 0.0, 500.0, 0.0, 0.0, 0.0, 0.0, 500.0],
+        'earnings_growth_rate': [10.0, 12.0, 5.0, 10.0, 10.0, 10.0, 0.0, np.nan],
+        'dividends_per_share':  [1.0, 2.0, 0.0, 1.0, np.nan, 0.5, 1.0, 3.0],
+    })
+
+
+def test_batch_valuation_matches_one_company_at_a_time(companies):
+    batch = BatchRelativeValuation.from_frame(companies)
+    metrics = batch.to_frame()
+    scores = batch.get_valuation_score()
+    flags = batch.risk_flags()
+
+    for i, row in enumerate(companies.to_dict('records')):
+        model = RelativeValuation(row)
+        expected = model.calculate_all_metrics()
+        for metric in BatchRelativeValuation.METRICS:
+            value = expected.get(metric)
+            assert metrics[metric].iat[i] == pytest.approx(np.nan if value is None else value, nan_ok=True), (i, metric)
+
+        assert scores[i] == model.get_valuation_score(), i
+        for metric in flags:
+            bands = THRESHOLDS.get('flag', metric).bands
+            expected_flag = -1 if bands[0] in model.risk_signals else (1 if bands[2] in model.risk_signals else 0)
+            assert flags[metric].iat[i] == expected_flag, (i, metric)
@@ -0,0 +1,34 @@
+import threading
+
+from market_data import StaleWhileRevalidateCache
+
+
+def test_concurrent_stats_are_not_lost():
+    cache = StaleWhileRevalidateCache(ttl=3600)
+    cache.put('key', 1)
+    threads, calls = 8, 2000
+
+    def worker():
+        for _ in range(calls):
+            cache.get('key', loader=lambda: 2)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    assert cache.stats['hits'] == threads * calls
+
+
+def test_stale_entry_is_served_and_refreshed():
+    cache = StaleWhileRevalidateCache(ttl=60)
+    cache.put('key', 'old', fetched_at=0)
+
+    assert cache.get('key', loader=lambda: 'new') == 'old'
+    cache._executor.shutdown(wait=True)
+
+    assert cache.get('key', loader=lambda: 'newer') == 'new'
+    assert cache.stats['stale_hits'] == 1
+    assert cache.stats['refreshes'] == 1
+    assert cache.stats['hits'] == 1
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from monte_carlo_valuation import BYTES_PER_DRAW, DISTRIBUTIONS, simulate_implied_prices
+
+N_DRAWS = 2000
+
+FINANCIALS = pd.DataFrame({
+    'market_cap': [500000.0, 180000.0, 90000.0, 60000.0, 30000.0],
+    'net_income': [20000.0, 9000.0, -500.0, 3000.0, 1200.0],
+    'book_value': [100000.0, 60000.0, 40000.0, 20000.0, 0.0],
+    'revenue': [150000.0, 70000.0, 30000.0, 25000.0, 9000.0],
+    'ebitda': [35000.0, 15000.0, 4000.0, 6000.0, 2000.0],
+    'net_debt': [-20000.0, 30000.0, 50000.0, 0.0, 1000.0],
+    'shares_outstanding': [3600.0, 1400.0, 900.0, 500.0, 300.0],
+    'share_price': [1400.0, 1300.0, 1000.0, 1200.0, 1000.0],
+}, index=['A', 'B', 'C', 'D', 'E'])
+SECTORS = ['IT & Software', 'Financial Services', 'Automobiles', 'IT & Software', 'Pharmaceuticals']
+
+
+def _simulate(stocks_per_block, distribution='triangular', **kwargs):
+    budget_mb = stocks_per_block * N_DRAWS * BYTES_PER_DRAW / 2 ** 20
+    return simulate_implied_prices(FINANCIALS, SECTORS, n_draws=N_DRAWS, distribution=distribution,
+                                   seed=7, memory_budget_mb=budget_mb, **kwargs)
+
+
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS)
+def test_same_seed_gives_the_same_result_for_any_block_size(distribution):
+    expected = _simulate(len(FINANCIALS), distribution)
+
+    for stocks_per_block in [1, 2, 3]:
+        pd.testing.assert_frame_equal(_simulate(stocks_per_block, distribution), expected)
+
+
+def test_process_pool_matches_in_process_run():
+    pd.testing.assert_frame_equal(_simulate(2, processes=2), _simulate(len(FINANCIALS)))
+
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from snapshot_store import PriceArchive
+
+
+class FakeDownload:
+    """yf.download stand-in: 30 business days ending three days ago"""
+
+    def __init__(self):
+        self.dates = pd.bdate_range(end=pd.Timestamp.today().normalize() - pd.Timedelta(days=3),
+                                    periods=30)
+        self.last_close_shift = 0.0
+        self.history_shift = 0.0
+
+    def __call__(self, tickers, period=None, start=None):
+        close = np.arange(len(self.dates), dtype=float) + 100
+        close[:-1] += self.history_shift
+        close[-1] += self.last_close_shift
+        close = pd.Series(close, index=self.dates)
+        if start is not None:
+            close = close[close.index >= pd.Timestamp(start)]
+
+        columns = pd.MultiIndex.from_product([['Open', 'High', 'Low', 'Close', 'Volume'], tickers])
+        return pd.DataFrame({c: close.values for c in columns}, index=close.index)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return PriceArchive(str(tmp_path / 'prices.db'), refresh_interval=0)
+
+
+def test_partial_last_bar_is_overwritten_not_restated(archive):
+    download = FakeDownload()
+    assert archive.sync(['A.NS'], '3mo', download)['full'] == ['A.NS']
+
+    download.last_close_shift = 1.5
+    result = archive.sync(['A.NS'], '3mo', download)
+
+    assert result['incremental'] == ['A.NS']
+    assert result['restated'] == []
+    assert archive.load('A.NS')['Close'].iloc[-1] == pytest.approx(129 + 1.5)
+
+
+def test_changed_settled_bar_triggers_reload(archive):
+    download = FakeDownload()
+    archive.sync(['A.NS'], '3mo', download)
+
+    download.history_shift = 2.0
+    result = archive.sync(['A.NS'], '3mo', download)
+
+    assert result['restated'] == ['A.NS']
+    assert archive.load('A.NS')['Close'].iloc[0] == pytest.approx(102.0)
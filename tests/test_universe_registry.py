@@ -0,0 +1,28 @@
+from universe_registry import UniverseRegistry
+
+REGISTRY = UniverseRegistry({
+    'TCS.NS': {'Company': 'Tata Consultancy Services', 'Sector': 'IT & Software'},
+    'INFY.NS': {'Company': 'Infosys', 'Sector': 'IT & Software'},
+    'TATASTEEL.NS': {'Company': 'Tata Steel', 'Sector': 'Metals & Mining'},
+})
+
+
+def test_search_matches_word_prefixes():
+    assert REGISTRY.search('tata') == ('TCS.NS', 'TATASTEEL.NS')
+    assert REGISTRY.search('tata cons') == ('TCS.NS',)
+    assert REGISTRY.search('infy') == ('INFY.NS',)
+
+
+def test_search_without_matches_is_empty():
+    assert REGISTRY.search('zzzz') == ()
+    assert REGISTRY.search('tata infosys') == ()
+
+
+def test_blank_search_returns_every_ticker():
+    assert REGISTRY.search('  ') == REGISTRY.tickers
+
+
+def test_peers_and_sectors():
+    assert REGISTRY.peers('TCS.NS') == ('INFY.NS',)
+    assert REGISTRY.tickers_in('Banks') == ()
+    assert REGISTRY.sectors == ('IT & Software', 'Metals & Mining')
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparable_multiples import LiveSectorMultiples
+from valuation_engine import LiveUniverse, SectorStats
+
+
+def _frame(rows):
+    frame = pd.DataFrame(rows, columns=['Sector', 'Ticker', 'P/E', 'Market Cap (Cr)'])
+    for metric in ['P/B', 'P/S', 'EV/EBITDA']:
+        frame[metric] = np.nan
+    return frame.set_index(['Sector', 'Ticker'])
+
+
+@pytest.fixture
+def stats():
+    return SectorStats(_frame([
+        ('IT', 'A', 10.0, 100.0),
+        ('IT', 'B', 20.0, 100.0),
+        ('IT', 'C', 30.0, 100.0),
+        ('IT', 'D', -5.0, 100.0),
+        ('Banks', 'E', 12.0, 100.0),
+        ('Banks', 'F', 18.0, 100.0),
+        ('Metals', 'G', 8.0, 100.0),
+    ]))
+
+
+def test_sector_aggregates_include_every_stock(stats):
+    assert stats.sector('IT')['P/E mean'] == pytest.approx(20.0)
+    assert stats.sector('IT')['P/E count'] == 3
+
+
+def test_peer_statistics_leave_the_stock_out(stats):
+    for ticker, peers in {'A': [20, 30], 'B': [10, 30], 'C': [10, 20]}.items():
+        standing = stats.stock(ticker)
+        own = {'A': 10, 'B': 20, 'C': 30}[ticker]
+        assert standing['P/E Peer Mean'] == pytest.approx(np.mean(peers))
+        assert standing['P/E Peer Count'] == 2
+        assert standing['P/E Z'] == pytest.approx((own - np.mean(peers)) / np.std(peers, ddof=1))
+
+    assert stats.stock('A')['P/E Pctl'] == 0.0
+    assert stats.stock('B')['P/E Pctl'] == 0.5
+    assert stats.stock('C')['P/E Pctl'] == 1.0
+
+
+def test_two_stock_sector_compares_with_the_other_stock(stats):
+    assert stats.stock('E')['P/E Peer Mean'] == pytest.approx(18.0)
+    assert stats.stock('F')['P/E Peer Mean'] == pytest.approx(12.0)
+    # One peer has no spread to measure a z-score against
+    assert np.isnan(stats.stock('E')['P/E Z'])
+
+
+def test_unscored_and_lone_stocks(stats):
+    # D has a negative P/E: not scored, but its peers are still all three
+    assert stats.stock('D')['P/E Peer Mean'] == pytest.approx(20.0)
+    assert stats.stock('D')['P/E Peer Count'] == 3
+    assert np.isnan(stats.stock('D')['P/E Z'])
+
+    assert stats.stock('G')['P/E Peer Count'] == 0
+    assert np.isnan(stats.stock('G')['P/E Peer Mean'])
+    assert np.isnan(stats.stock('G')['P/E Pctl'])
+
+
+def test_live_universe_returns_the_tickers_each_call_repriced(snapshot):
+    base, live = snapshot, LiveUniverse()
+
+    snapshot, changed = live.update(base, {'A.NS': 110.0})
+    assert changed == ['A.NS']
+    assert snapshot.frame.xs('A.NS', level='Ticker')['P/E'].iat[0] == pytest.approx(11.0)
+
+    # A second session with the same quotes has nothing left to reprice
+    assert live.update(base, {'A.NS': 110.0})[1] == []
+    assert not hasattr(live, 'last_changed')
+
+
+def test_sector_multiples_ignore_an_out_of_order_snapshot(snapshot):
+    base = snapshot
+    first, changed_first = base.reprice({'A.NS': 120.0})
+    second, changed_second = first.reprice({'A.NS': 150.0, 'B.NS': 150.0})
+
+    multiples = LiveSectorMultiples(min_peers=1)
+    multiples.update(base)
+    multiples.update(second, changed_second)
+    multiples.update(first, changed_first)     # a slower session finishing last
+
+    # P/E of A, B, C in the newest snapshot: 15, 30, 30
+    assert multiples.get('IT')['multiples']['P/E']['avg'] == pytest.approx(25.0)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from valuation_thresholds import THRESHOLDS, Bands
+
+
+# The if/elif chains the threshold table replaced, as band indices
+
+def _signal(metric, value):
+    cuts = {'P/E': [12, 15, 20, 30], 'P/B': [0.8, 1.2, 2.0, 3.0],
+            'P/S': [0.5, 1.0, 2.0, 3.0], 'EV/EBITDA': [8, 12, 15, 20]}[metric]
+    for i, cut in enumerate(cuts):
+        if value < cut:
+            return i
+    return len(cuts)
+
+
+def _low_high(low, high):
+    return lambda value: 0 if value < low else (2 if value > high else 1)
+
+
+OLD_FLAG = {'P/E': _low_high(12, 25), 'P/B': _low_high(1, 3),
+            'EV/EBITDA': _low_high(8, 15), 'PEG': _low_high(1, 1.5)}
+OLD_SCORE = {'P/E': _low_high(15, 25), 'P/B': _low_high(1, 3), 'P/S': _low_high(1, 3),
+             'EV/EBITDA': _low_high(8, 15), 'PEG': lambda value: 0 if value < 1 else 1}
+OLD_UPSIDE = lambda value: 2 if value > 5 else (0 if value < -5 else 1)  # noqa: E731
+
+
+def _relative(value):
+    for i, cut in enumerate([-15, -5, 5, 15]):
+        if value < cut:
+            return i
+    return 4
+
+
+def _probes(bands):
+    """Every edge, a hair either side of it, and points between edges"""
+    edges = bands.edges
+    points = np.concatenate([edges, np.nextafter(edges, -np.inf), np.nextafter(edges, np.inf),
+                             edges.min() - 1, edges.max() + 1, (edges[:-1] + edges[1:]) / 2], axis=None)
+    return np.unique(points)
+
+
+CASES = (
+    [('signal', metric, lambda v, m=metric: _signal(m, v)) for metric in ['P/E', 'P/B', 'P/S', 'EV/EBITDA']]
+    + [('flag', metric, rule) for metric, rule in OLD_FLAG.items()]
+    + [('score', metric, rule) for metric, rule in OLD_SCORE.items()]
+    + [('upside', 'implied', OLD_UPSIDE), ('relative', 'multiple', _relative)]
+)
+
+
+@pytest.mark.parametrize('scale, metric, old', CASES, ids=[f"{s}-{m}" for s, m, _ in CASES])
+def test_bands_match_the_old_comparisons_at_every_edge(scale, metric, old):
+    bands = THRESHOLDS.get(scale, metric)
+    values = _probes(bands)
+    expected = [old(value) for value in values]
+
+    assert [bands.band(value) for value in values] == expected
+    assert bands.band_array(values).tolist() == expected
+
+
+def test_strict_edges_keep_the_value_in_the_lower_band():
+    bands = Bands([1, 2, 3], ['a', 'b', 'c', 'd'], strict=[False, True, False])
+
+    assert [bands.classify(v) for v in [1, 2, 3]] == ['b', 'b', 'd']
+    assert bands.band_array(np.array([0.5, 1, 2, 2.5, 3, np.nan])).tolist() == [0, 1, 1, 2, 3, 3]
+
+
+def test_strict_flags_must_match_the_edges():
+    with pytest.raises(ValueError):
+        Bands([1, 2], ['a', 'b', 'c'], strict=[True])
@@ -0,0 +1,126 @@
+"""
+UNIVERSE REGISTRY
+Immutable ticker, sector and company-name indexes for the stock universe
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+This module provides:
+1. UniverseRegistry - read-only view of a NIFTY_50_DATA-style mapping,
+   indexed once: sector -> tickers, ticker -> sector/company, and a
+   sorted word index for company-name search
+2. Peer lookup and selectbox labels without scanning the universe
+
+The registry is itself a Mapping (ticker -> {'Company', 'Sector'}), so it
+can be passed anywhere NIFTY_50_DATA is accepted.
+"""
+
+import bisect
+import re
+from collections.abc import Mapping
+from types import MappingProxyType
+
+
+def _words(text):
+    """Lower-case search words of a company name or ticker"""
+    return [word for word in re.split(r'[^0-9a-z]+', text.lower()) if word]
+
+
+class UniverseRegistry(Mapping):
+    """
+    Immutable index over ticker -> {'Company': ..., 'Sector': ...}
+
+    tickers: all tickers, in the order given
+    sectors: sorted sector names
+    """
+
+    __slots__ = ('tickers', 'sectors', '_data', '_by_sector', '_words', '_word_tickers')
+
+    def __init__(self, data):
+        entries = {
+            ticker: MappingProxyType({'Company': info['Company'], 'Sector': info['Sector']})
+            for ticker, info in data.items()
+        }
+
+        by_sector = {}
+        for ticker, info in entries.items():
+            by_sector.setdefault(info['Sector'], []).append(ticker)
+
+        # Sorted (word, ticker) pairs: a prefix search is one bisect
+        index = sorted({(word, ticker)
+                        for ticker, info in entries.items()
+                        for word in _words(info['Company']) + _words(ticker)})
+
+        set_ = object.__setattr__
+        set_(self, '_data', MappingProxyType(entries))
+        set_(self, 'tickers', tuple(entries))
+        set_(self, 'sectors', tuple(sorted(by_sector)))
+        set_(self, '_by_sector', MappingProxyType({s: tuple(t) for s, t in by_sector.items()}))
+        set_(self, '_words', tuple(word for word, _ in index))
+        set_(self, '_word_tickers', tuple(ticker for _, ticker in index))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UniverseRegistry is immutable")
+
+    def __getitem__(self, ticker):
+        return self._data[ticker]
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def company(self, ticker):
+        return self._data[ticker]['Company']
+
+    def sector_of(self, ticker):
+        return self._data[ticker]['Sector']
+
+    def tickers_in(self, sector):
+        """Tickers of a sector, in universe order (empty for unknown sectors)"""
+        return self._by_sector.get(sector, ())
+
+    def peers(self, ticker, limit=None):
+        """Other tickers in the same sector"""
+        peers = tuple(t for t in self.tickers_in(self.sector_of(ticker)) if t != ticker)
+        return peers if limit is None else peers[:limit]
+
+    def label(self, ticker):
+        """'Company (TICKER)' display label"""
+        return f"{self.company(ticker)} ({ticker})"
+
+    def search(self, query, limit=None):
+        """
+        Tickers whose company name or ticker has a word starting with every
+        word of the query, in universe order ('tata cons' -> TCS.NS)
+        """
+        words = _words(query)
+        if not words:
+            return self.tickers if limit is None else self.tickers[:limit]
+
+        matches = None
+        for word in words:
+            start = bisect.bisect_left(self._words, word)
+            end = bisect.bisect_left(self._words, word + '￿', start)
+            found = set(self._word_tickers[start:end])
+            matches = found if matches is None else matches & found
+            if not matches:
+                return ()
+
+        result = tuple(t for t in self.tickers if t in matches)
+        return result if limit is None else result[:limit]
+
+
+# Example usage
+if __name__ == "__main__":
+
+    registry = UniverseRegistry({
+        'TCS.NS': {'Company': 'Tata Consultancy Services', 'Sector': 'IT & Software'},
+        'INFY.NS': {'Company': 'Infosys', 'Sector': 'IT & Software'},
+        'TATASTEEL.NS': {'Company': 'Tata Steel', 'Sector': 'Metals & Mining'},
+    })
+
+    print("Sectors:", registry.sectors)
+    print("IT & Software:", registry.tickers_in('IT & Software'))
+    print("Peers of TCS.NS:", registry.peers('TCS.NS'))
+    print("Search 'tata':", registry.search('tata'))
+    print("Search 'tata cons':", registry.search('tata cons'))
@@ -0,0 +1,596 @@
+"""
+VALUATION ENGINE
+Batch metrics, universe snapshot and signals for the Nifty Relative Valuation Model
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+This module provides:
+1. valuation_metrics_frame - batch valuation metrics (yield %, market
+   cap in crores, growth %, ...) derived column-wise from info records
+2. UniverseSnapshot - one typed DataFrame of valuation fields for every
+   ticker, indexed by (Sector, Ticker), built once per data refresh
+3. build_universe_snapshot - derive the snapshot from fetched info records;
+   fundamentals_frame / reprice_metrics / LiveUniverse reprice it from
+   fresh quotes, touching only the stocks whose price moved
+4. SectorStats - per-sector median, mean, cap-weighted and harmonic
+   multiples plus each stock's peer (leave-one-out) mean, z-score and
+   percentile rank
+5. compute_signals - binned over/under/fair valuation signals for every
+   row of a multiples DataFrame in one vectorised pass, driven by the
+   shared threshold table (valuation_thresholds)
+6. analyze_signal - the same classification for a single stock
+7. signal_labels - render overall signal labels
+   only for the rows actually displayed
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from valuation_thresholds import THRESHOLDS
+
+# Numeric snapshot columns (all float64, NaN when unavailable)
+SNAPSHOT_COLUMNS = [
+    'Price',
+    'P/E',
+    'P/B',
+    'P/S',
+    'EV/EBITDA',
+    'Dividend Yield %',
+    'Earnings Growth %',
+    'Market Cap (Cr)',
+    'Market Cap (B)',
+    '52W High',
+    '52W Low',
+]
+
+
+# Metric names used by the single-stock view, per snapshot column
+METRIC_NAMES = {
+    'P/E': 'P/E Ratio',
+    'P/B': 'P/B Ratio',
+    'P/S': 'P/S Ratio',
+    'EV/EBITDA': 'EV/EBITDA',
+    'Dividend Yield %': 'Dividend Yield %',
+    'Market Cap (Cr)': 'Market Cap (Cr)',
+    '52W High': '52W High',
+    '52W Low': '52W Low',
+    'Price': 'Current Price',
+    'Earnings Growth %': 'Earnings Growth %',
+}
+
+
+def _field(records, keys, field):
+    """Column of one info field across records as float64 (NaN if missing or non-numeric)"""
+    values = np.full(len(keys), np.nan)
+    for i, key in enumerate(keys):
+        record = records.get(key)
+        if record is not None:
+            value = record.get(field)
+            if value is not None:
+                try:
+                    values[i] = value
+                except (TypeError, ValueError):
+                    pass
+    return values
+
+
+# ============================================================================
+# VALUATION METRICS (BATCH)
+# ============================================================================
+
+def valuation_metrics_frame(records):
+    """
+    Derive the valuation metrics of many stocks with column-wise operations
+    
+    Parameters:
+    -----------
+    records : dict of ticker -> info record/dict, a list of info records,
+              or a UniverseSnapshot (whose metrics are already derived)
+    
+    Returns:
+    --------
+    DataFrame indexed by ticker (or position for a list) with the float64
+    SNAPSHOT_COLUMNS; missing, None and non-numeric values are all NaN
+    """
+    if isinstance(records, UniverseSnapshot):
+        return records.frame.droplevel('Sector')[SNAPSHOT_COLUMNS]
+    if not isinstance(records, dict):
+        records = dict(enumerate(records))
+
+    keys = list(records)
+    current = _field(records, keys, 'currentPrice')
+    regular = _field(records, keys, 'regularMarketPrice')
+    market_cap = _field(records, keys, 'marketCap')
+
+    return pd.DataFrame({
+        'Price': np.where(np.isnan(current), regular, current),
+        'P/E': _field(records, keys, 'trailingPE'),
+        'P/B': _field(records, keys, 'priceToBook'),
+        'P/S': _field(records, keys, 'priceToSalesTrailing12Months'),
+        'EV/EBITDA': _field(records, keys, 'enterpriseToEbitda'),
+        'Dividend Yield %': _field(records, keys, 'dividendYield') * 100,
+        'Earnings Growth %': _field(records, keys, 'earningsGrowth') * 100,
+        'Market Cap (Cr)': market_cap / 1e7,
+        'Market Cap (B)': market_cap / 1e9,
+        '52W High': _field(records, keys, 'fiftyTwoWeekHigh'),
+        '52W Low': _field(records, keys, 'fiftyTwoWeekLow'),
+    }, index=pd.Index(keys, name='Ticker'), dtype='float64')
+
+
+def metrics_dict(row):
+    """
+    One row of valuation_metrics_frame as the metrics dict used by the
+    single-stock view (NaN -> None; a missing price is 0)
+    """
+    metrics = {name: (None if pd.isna(row[column]) else float(row[column]))
+               for column, name in METRIC_NAMES.items()}
+    if metrics['Current Price'] is None:
+        metrics['Current Price'] = 0
+    return metrics
+
+
+# Per-share fundamentals that stay fixed while the price moves
+FUNDAMENTAL_COLUMNS = ['EPS', 'BVPS', 'SPS', 'DPS', 'Shares', 'Net Debt', 'EBITDA']
+
+
+def fundamentals_frame(records):
+    """
+    Slow-moving fundamentals behind the multiples, one row per stock
+    
+    Each fundamental is backed out of the multiple it was quoted with
+    (EPS = price / P/E, net debt = EV/EBITDA x EBITDA - market cap, ...),
+    so repricing reproduces the quoted multiples exactly at the original
+    price. Reported figures (trailingEps, bookValue, ...) fill in where
+    the multiple itself is missing.
+    
+    Returns a float64 DataFrame indexed like valuation_metrics_frame
+    """
+    if not isinstance(records, dict):
+        records = dict(enumerate(records))
+
+    keys = list(records)
+    metrics = valuation_metrics_frame(records)
+    price = metrics['Price'].to_numpy()
+
+    def implied(value, field):
+        reported = _field(records, keys, field)
+        return np.where(np.isnan(value), reported, value)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = implied(_field(records, keys, 'marketCap') / price, 'sharesOutstanding')
+        ebitda = _field(records, keys, 'ebitda')
+        reported_net_debt = _field(records, keys, 'totalDebt') - _field(records, keys, 'totalCash')
+        net_debt = metrics['EV/EBITDA'].to_numpy() * ebitda - price * shares
+        net_debt = np.where(np.isnan(net_debt), np.nan_to_num(reported_net_debt), net_debt)
+        ebitda = np.where(np.isnan(ebitda), (price * shares + net_debt) / metrics['EV/EBITDA'].to_numpy(), ebitda)
+
+        return pd.DataFrame({
+            'EPS': implied(price / metrics['P/E'].to_numpy(), 'trailingEps'),
+            'BVPS': implied(price / metrics['P/B'].to_numpy(), 'bookValue'),
+            'SPS': implied(price / metrics['P/S'].to_numpy(), 'revenuePerShare'),
+            'DPS': price * metrics['Dividend Yield %'].to_numpy() / 100,
+            'Shares': shares,
+            'Net Debt': net_debt,
+            'EBITDA': ebitda,
+        }, index=metrics.index, dtype='float64')
+
+
+def reprice_metrics(metrics, fundamentals, prices):
+    """
+    Recompute price-driven metrics for new prices, as one vector operation
+    
+    Parameters:
+    -----------
+    metrics : DataFrame of SNAPSHOT_COLUMNS for the stocks being repriced
+    fundamentals : matching rows of fundamentals_frame
+    prices : array of new prices, aligned with the rows
+    
+    Returns:
+    --------
+    Copy of metrics with Price, multiples, yield, market cap and 52W range
+    updated; a multiple whose fundamental is unknown keeps its old value,
+    one whose fundamental is not positive (e.g. a loss) becomes NaN
+    """
+    repriced = metrics.copy()
+    p = np.asarray(prices, dtype=np.float64)
+    f = {column: fundamentals[column].to_numpy() for column in FUNDAMENTAL_COLUMNS}
+
+    def ratio(numerator, denominator, column):
+        old = metrics[column].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new = np.where(denominator > 0, numerator / denominator, np.nan)
+        return np.where(np.isnan(denominator) | np.isnan(numerator), old, new)
+
+    market_cap = p * f['Shares']
+    repriced['Price'] = p
+    repriced['P/E'] = ratio(p, f['EPS'], 'P/E')
+    repriced['P/B'] = ratio(p, f['BVPS'], 'P/B')
+    repriced['P/S'] = ratio(p, f['SPS'], 'P/S')
+    repriced['EV/EBITDA'] = ratio(market_cap + f['Net Debt'], f['EBITDA'], 'EV/EBITDA')
+    repriced['Dividend Yield %'] = ratio(f['DPS'] * 100, p, 'Dividend Yield %')
+    repriced['Market Cap (Cr)'] = np.where(np.isnan(market_cap), metrics['Market Cap (Cr)'], market_cap / 1e7)
+    repriced['Market Cap (B)'] = np.where(np.isnan(market_cap), metrics['Market Cap (B)'], market_cap / 1e9)
+    repriced['52W High'] = np.fmax(metrics['52W High'].to_numpy(), p)
+    repriced['52W Low'] = np.fmin(metrics['52W Low'].to_numpy(), p)
+    return repriced
+
+
+# ============================================================================
+# UNIVERSE SNAPSHOT
+# ============================================================================
+
+class UniverseSnapshot:
+    """
+    Columnar valuation snapshot of the whole universe
+
+    frame: DataFrame indexed by (Sector, Ticker), sorted, with a Company
+           column plus the float64 SNAPSHOT_COLUMNS
+    errors: ticker -> FetchError for tickers that could not be loaded
+    built_at: epoch seconds when the snapshot was built
+    sector_stats: SectorStats of the frame (computed once, on first use)
+    fundamentals: fundamentals_frame rows (by ticker) used for repricing
+    signals: compute_signals output indexed by ticker
+    priced_at: epoch seconds of the latest repricing
+    """
+
+    def __init__(self, frame, errors=None, built_at=None, fundamentals=None, signals=None,
+                 priced_at=None):
+        self.frame = frame
+        self.errors = dict(errors or {})
+        self.built_at = time.time() if built_at is None else built_at
+        self.priced_at = self.built_at if priced_at is None else priced_at
+        self.fundamentals = fundamentals
+        self.signals = compute_signals(self._by_ticker(frame)) if signals is None else signals
+        self._sector_stats = None
+
+    @property
+    def sector_stats(self):
+        """SectorStats of the frame, computed on first use"""
+        if self._sector_stats is None:
+            self._sector_stats = SectorStats(self.frame)
+        return self._sector_stats
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def sectors(self):
+        """Sorted list of sectors present in the snapshot"""
+        return list(self.frame.index.get_level_values('Sector').unique())
+
+    def for_sector(self, sector):
+        """Flat DataFrame (Ticker, Sector columns) of one sector's stocks"""
+        if sector not in self.frame.index.get_level_values('Sector'):
+            return self._flat(self.frame.iloc[0:0])
+        return self._flat(self.frame.loc[[sector]])
+
+    def for_tickers(self, tickers):
+        """Flat DataFrame of the given tickers, in the requested order"""
+        flat = self._flat(self.frame).set_index('Ticker', drop=False)
+        present = [t for t in tickers if t in flat.index]
+        return flat.loc[present].reset_index(drop=True)
+
+    def all(self):
+        """Flat DataFrame of the whole universe"""
+        return self._flat(self.frame)
+
+    def metrics(self, ticker):
+        """Metrics dict of one stock (see metrics_dict), or None"""
+        tickers = self.frame.index.get_level_values('Ticker')
+        if ticker not in tickers:
+            return None
+        return metrics_dict(self.frame.iloc[tickers.get_loc(ticker)])
+
+    def reprice(self, quotes, tolerance=1e-9):
+        """
+        Apply fresh quotes, recomputing only the stocks whose price moved
+        
+        quotes: ticker -> latest price
+        Returns (snapshot, changed tickers); the snapshot is self when
+        nothing changed, otherwise a new snapshot sharing the fundamentals
+        """
+        if self.fundamentals is None or not quotes:
+            return self, []
+
+        tickers = self.frame.index.get_level_values('Ticker')
+        prices = pd.Series(quotes, dtype='float64')
+        prices = prices[prices.index.isin(tickers) & (prices > 0)]
+
+        positions = tickers.get_indexer(prices.index)
+        current = self.frame['Price'].to_numpy()[positions]
+        moved = ~np.isclose(prices.to_numpy(), current, rtol=tolerance, atol=0)
+        if not moved.any():
+            return self, []
+
+        positions = positions[moved]
+        changed = list(prices.index[moved])
+        columns = [self.frame.columns.get_loc(c) for c in SNAPSHOT_COLUMNS]
+
+        frame = self.frame.copy()
+        rows = self.frame.iloc[positions][SNAPSHOT_COLUMNS]
+        rows = reprice_metrics(rows, self.fundamentals.loc[changed], prices.to_numpy()[moved])
+        frame.iloc[positions, columns] = rows.to_numpy()
+
+        # Signals rows follow the frame's row order
+        updated = compute_signals(self._by_ticker(frame.iloc[positions]))
+        signals = {}
+        for column in self.signals.columns:
+            values = self.signals[column].to_numpy().copy()
+            values[positions] = updated[column].to_numpy()
+            signals[column] = values
+        signals = pd.DataFrame(signals, index=self.signals.index)
+
+        snapshot = UniverseSnapshot(frame, self.errors, self.built_at, self.fundamentals, signals,
+                                    priced_at=time.time())
+        return snapshot, changed
+
+    @staticmethod
+    def _by_ticker(frame):
+        return frame.reset_index().set_index('Ticker')
+
+    @staticmethod
+    def _flat(frame):
+        return frame.reset_index()[['Ticker', 'Company', 'Sector'] + SNAPSHOT_COLUMNS]
+
+
+def build_universe_snapshot(records, universe, errors=None):
+    """
+    Build a UniverseSnapshot from fetched info records
+
+    records: ticker -> info record/dict (e.g. a fetch_many result)
+    universe: NIFTY_50_DATA-style mapping ticker -> {'Company', 'Sector'}
+    errors: optional ticker -> FetchError for tickers that failed
+    """
+    tickers = [t for t in universe if t in records]
+
+    frame = valuation_metrics_frame({t: records[t] for t in tickers}).reset_index()
+    frame.insert(0, 'Sector', [universe[t]['Sector'] for t in tickers])
+    frame.insert(2, 'Company', [universe[t]['Company'] for t in tickers])
+
+    frame = frame.set_index(['Sector', 'Ticker']).sort_index()
+    fundamentals = fundamentals_frame({t: records[t] for t in tickers})
+
+    return UniverseSnapshot(frame, errors=errors, fundamentals=fundamentals)
+
+
+class LiveUniverse:
+    """
+    Holds the latest repriced snapshot between refreshes
+    
+    update() starts over whenever the fundamentals snapshot is rebuilt and
+    otherwise reprices only the tickers whose quote moved since last time.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def update(self, base, quotes):
+        """
+        Reprice the held snapshot from quotes
+
+        Returns (snapshot, changed tickers), both taken under the lock so
+        concurrent sessions each get the tickers their own call repriced.
+        """
+        with self._lock:
+            if self._snapshot is None or self._snapshot.built_at != base.built_at:
+                self._snapshot = base
+            self._snapshot, changed = self._snapshot.reprice(quotes)
+            return self._snapshot, changed
+
+
+# ============================================================================
+# SECTOR STATISTICS
+# ============================================================================
+
+# Multiples aggregated per sector
+SECTOR_STAT_METRICS = ['P/E', 'P/B', 'P/S', 'EV/EBITDA']
+
+
+class SectorStats:
+    """
+    Per-sector multiples and each stock's standing within its sector,
+    computed once per snapshot with a groupby on sector
+    
+    Only positive multiples are used (a negative P/E says nothing about
+    relative value and would break the harmonic mean).
+    
+    sectors: DataFrame indexed by sector with '<metric> <stat>' columns for
+             stat in median, mean, cap_weighted, harmonic and count (every
+             stock of the sector included - for sector tables)
+    stocks: DataFrame indexed by ticker with leave-one-out columns that
+            compare each stock with its peers only: '<metric> Peer Mean',
+            '<metric> Peer Count', '<metric> Z' (z-score against the peers)
+            and '<metric> Pctl' (share of peers with a lower multiple, ties
+            counted half, 0-1)
+    """
+
+    STATS = ['median', 'mean', 'cap_weighted', 'harmonic', 'count']
+
+    def __init__(self, frame):
+        flat = frame.reset_index()
+        sector = flat['Sector']
+        cap = flat['Market Cap (Cr)'].where(flat['Market Cap (Cr)'] > 0)
+
+        sectors = {}
+        stocks = {'Sector': sector.to_numpy()}
+        for metric in SECTOR_STAT_METRICS:
+            values = flat[metric].where(flat[metric] > 0)
+            grouped = values.groupby(sector)
+            weights = cap.where(values.notna())
+
+            sectors[f'{metric} median'] = grouped.median()
+            sectors[f'{metric} mean'] = grouped.mean()
+            sectors[f'{metric} cap_weighted'] = ((values * weights).groupby(sector).sum(min_count=1)
+                                                 / weights.groupby(sector).sum(min_count=1))
+            sectors[f'{metric} harmonic'] = grouped.count() / (1 / values).groupby(sector).sum(min_count=1)
+            sectors[f'{metric} count'] = grouped.count()
+
+            # Leave-one-out: take the stock's own value out of the sector sums,
+            # so in small sectors it does not pull its own benchmark
+            own = values.fillna(0.0)
+            peer_count = grouped.transform('count') - values.notna()
+            peer_sum = grouped.transform('sum') - own
+            peer_squares = (values ** 2).groupby(sector).transform('sum') - own ** 2
+            peer_mean = peer_sum / peer_count.where(peer_count > 0)
+            peer_var = ((peer_squares - peer_count * peer_mean ** 2) / (peer_count - 1).where(peer_count > 1)).clip(lower=0)
+            peer_std = np.sqrt(peer_var)
+
+            stocks[f'{metric} Peer Mean'] = peer_mean.to_numpy()
+            stocks[f'{metric} Peer Count'] = peer_count.to_numpy()
+            stocks[f'{metric} Z'] = ((values - peer_mean) / peer_std.where(peer_std > 0)).to_numpy()
+            stocks[f'{metric} Pctl'] = ((grouped.rank() - 1) / (peer_count.where(peer_count > 0))).to_numpy()
+
+        self.sectors = pd.DataFrame(sectors)
+        self.stocks = pd.DataFrame(stocks, index=pd.Index(flat['Ticker'], name='Ticker'))
+
+        # Plain dicts for O(1) lookups from the UI
+        self._by_sector = self.sectors.to_dict('index')
+        self._by_ticker = self.stocks.to_dict('index')
+
+    def sector(self, sector):
+        """Aggregates for one sector as {'<metric> <stat>': value}, or {}"""
+        return self._by_sector.get(sector, {})
+
+    def stock(self, ticker):
+        """Z-scores and percentile ranks of one stock, or {}"""
+        return self._by_ticker.get(ticker, {})
+
+
+# ============================================================================
+# VALUATION SIGNALS (VECTORISED)
+# ============================================================================
+
+# Status codes
+UNDERVALUED, FAIR, OVERVALUED = -1, 0, 1
+STATUS_NAMES = {UNDERVALUED: 'Undervalued', FAIR: 'Fair', OVERVALUED: 'Overvalued'}
+
+# Multiples scored by the signals, in display order
+SIGNAL_METRICS = ['P/E', 'P/B', 'P/S', 'EV/EBITDA']
+
+OVERALL_SIGNALS = {
+    UNDERVALUED: ('🟢 UNDERVALUED - BUY', 'Strong Buy Signal'),
+    FAIR: ('🟡 FAIRLY VALUED - HOLD', 'Hold Signal'),
+    OVERVALUED: ('🔴 OVERVALUED - SELL', 'Sell Signal'),
+}
+
+
+def _signal_groups(metric, sectors, n_rows):
+    """(Bands, row mask) pairs: sectors with their own edges, then the rest"""
+    default = np.ones(n_rows, dtype=bool)
+    if sectors is not None:
+        for sector in THRESHOLDS.sectors('signal', metric):
+            mask = sectors == sector
+            if mask.any():
+                default &= ~mask
+                yield THRESHOLDS.get('signal', metric, sector), mask
+    yield THRESHOLDS.get('signal', metric), default
+
+
+def compute_signals(multiples):
+    """
+    Classify every row of a DataFrame of multiples in one pass
+    
+    Parameters:
+    -----------
+    multiples : DataFrame with any of the SIGNAL_METRICS columns
+               (missing or zero values are not scored) and optionally a
+               'Sector' column for sector-specific thresholds
+    
+    Returns:
+    --------
+    DataFrame on the same index with, per metric, '<metric> Band' (-1 when
+    not scored) and '<metric> Status' (-1/0/1), plus 'Undervalued', 'Fair'
+    and 'Overvalued' counts, total 'Severity' and 'Overall' status
+    """
+    signals = pd.DataFrame(index=multiples.index)
+    sectors = multiples['Sector'].to_numpy() if 'Sector' in multiples else None
+    undervalued = np.zeros(len(multiples), dtype=np.int64)
+    fair = np.zeros(len(multiples), dtype=np.int64)
+    overvalued = np.zeros(len(multiples), dtype=np.int64)
+    severity = np.zeros(len(multiples), dtype=np.int64)
+
+    for metric in SIGNAL_METRICS:
+        if metric not in multiples:
+            continue
+        values = multiples[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+        scored = ~np.isnan(values) & (values != 0)
+
+        band = np.zeros(len(values), dtype=np.intp)
+        status = np.full(len(values), FAIR)
+        weight = np.zeros(len(values), dtype=np.int64)
+        score = np.zeros(len(values), dtype=np.int64)
+        for bands, rows in _signal_groups(metric, sectors, len(values)):
+            band[rows] = bands.band_array(values[rows])
+            status[rows] = bands.field('status')[band[rows]]
+            weight[rows] = bands.field('weight')[band[rows]]
+            score[rows] = bands.field('score')[band[rows]]
+
+        status = np.where(scored, status, FAIR)
+        weight = np.where(scored, weight, 0)
+
+        undervalued += np.where(status == UNDERVALUED, weight, 0)
+        fair += np.where(scored & (status == FAIR), weight, 0)
+        overvalued += np.where(status == OVERVALUED, weight, 0)
+        severity += np.where(scored, score, 0)
+
+        signals[f'{metric} Band'] = np.where(scored, band, -1).astype(np.int8)
+        signals[f'{metric} Status'] = status.astype(np.int8)
+
+    signals['Undervalued'] = undervalued
+    signals['Fair'] = fair
+    signals['Overvalued'] = overvalued
+    signals['Severity'] = severity
+    signals['Overall'] = np.sign(overvalued - undervalued).astype(np.int8)
+    return signals
+
+
+def _metric_detail(value, payload):
+    """Display breakdown of one scored multiple"""
+    return {
+        'value': value,
+        'signal': payload['signal'],
+        'status': STATUS_NAMES[payload['status']],
+        'reasoning': payload['reasoning'],
+        'severity': payload['severity'],
+        'color': payload['color']
+    }
+
+
+def _analysis(details, undervalued, fair, overvalued):
+    overall = int(np.sign(overvalued - undervalued))
+    return {
+        'metrics': details,
+        'overall_sentiment': [],
+        'overvalued_count': int(overvalued),
+        'undervalued_count': int(undervalued),
+        'fair_count': int(fair),
+        'overall': OVERALL_SIGNALS[overall][0],
+        'recommendation': OVERALL_SIGNALS[overall][1]
+    }
+
+
+def analyze_signal(multiples, sector=None):
+    """
+    Scalar path: classify one stock's multiples (one bisect per value)
+    
+    multiples: dict of metric -> value (None, NaN or zero are not scored)
+    Returns the detailed breakdown used by the single-stock view
+    """
+    details = {}
+    counts = {UNDERVALUED: 0, FAIR: 0, OVERVALUED: 0}
+    for metric in SIGNAL_METRICS:
+        value = multiples.get(metric)
+        if not value or value != value:
+            continue
+        payload = THRESHOLDS.get('signal', metric, sector).classify(value)
+        details[metric] = _metric_detail(value, payload)
+        counts[payload['status']] += payload['weight']
+    return _analysis(details, counts[UNDERVALUED], counts[FAIR], counts[OVERVALUED])
+
+
+def signal_labels(signals):
+    """Overall signal label per row (render only the rows being displayed)"""
+    return signals['Overall'].map(lambda code: OVERALL_SIGNALS[code][0])
@@ -0,0 +1,250 @@
+"""
+VALUATION THRESHOLDS
+Single threshold table for every valuation cut-off in the model
+Prof. V. Ravichandran | The Mountain Path - World of Finance
+
+This module provides:
+1. DEFAULT_THRESHOLDS - band edges and band payloads per scale and metric
+2. SECTOR_THRESHOLDS - optional per-sector overrides of the band edges
+3. ThresholdTable - the table compiled into sorted bin-edge arrays:
+   one bisect per scalar value, one np.searchsorted per column
+4. load_thresholds - read a JSON override file (NIFTY_THRESHOLDS_FILE)
+
+Changing a band is a data change: edit the table (or the JSON file),
+not the code that classifies.
+"""
+
+import bisect
+import json
+import os
+
+import numpy as np
+
+# ============================================================================
+# 1. THRESHOLD TABLE
+# ============================================================================
+
+# Each scale maps metric -> {'edges': [...], 'bands': [...], 'strict': [...]}
+# A value falls in band i when edges[i-1] <= value < edges[i], so there is
+# always one more band than there are edges. 'strict' (optional, one flag
+# per edge) marks edges crossed only on a strict '>': a value exactly on a
+# strict edge stays in the band below it.
+DEFAULT_THRESHOLDS = {
+    # Absolute multiple bands behind the valuation signals
+    'signal': {
+        'P/E': {
+            'edges': [12, 15, 20, 30],
+            'bands': [
+                {'status': -1, 'weight': 1, 'score': -2, 'signal': '🟢 Undervalued', 'severity': 'Strong Buy', 'color': 'green', 'reasoning': 'Trading at low earnings multiple'},
+                {'status': -1, 'weight': 1, 'score': -1, 'signal': '🟡 Undervalued', 'severity': 'Buy', 'color': 'lightgreen', 'reasoning': 'Below historical average'},
+                {'status': 0, 'weight': 1, 'score': 0, 'signal': '🟡 Fair Valued', 'severity': 'Hold', 'color': 'yellow', 'reasoning': 'Trading at reasonable multiple'},
+                {'status': 1, 'weight': 1, 'score': 1, 'signal': '🟠 Overvalued', 'severity': 'Sell', 'color': 'orange', 'reasoning': 'Premium to historical average'},
+                {'status': 1, 'weight': 2, 'score': 2, 'signal': '🔴 Heavily Overvalued', 'severity': 'Strong Sell', 'color': 'red', 'reasoning': 'Trading at very high multiple'},
+            ]
+        },
+        'P/B': {
+            'edges': [0.8, 1.2, 2.0, 3.0],
+            'bands': [
+                {'status': -1, 'weight': 1, 'score': -2, 'signal': '🟢 Undervalued', 'severity': 'Strong Buy', 'color': 'green', 'reasoning': 'Trading below book value'},
+                {'status': 0, 'weight': 1, 'score': 0, 'signal': '🟡 Fair Valued', 'severity': 'Hold', 'color': 'yellow', 'reasoning': 'Near book value'},
+                {'status': 0, 'weight': 1, 'score': 0, 'signal': '🟡 Moderately Valued', 'severity': 'Hold', 'color': 'yellow', 'reasoning': 'Premium to book value'},
+                {'status': 1, 'weight': 1, 'score': 1, 'signal': '🟠 Overvalued', 'severity': 'Sell', 'color': 'orange', 'reasoning': 'Significant premium to book'},
+                {'status': 1, 'weight': 2, 'score': 2, 'signal': '🔴 Heavily Overvalued', 'severity': 'Strong Sell', 'color': 'red', 'reasoning': 'Extreme premium to book value'},
+            ]
+        },
+        'P/S': {
+            'edges': [0.5, 1.0, 2.0, 3.0],
+            'bands': [
+                {'status': -1, 'weight': 1, 'score': -2, 'signal': '🟢 Undervalued', 'severity': 'Strong Buy', 'color': 'green', 'reasoning': 'Very low sales multiple'},
+                {'status': 0, 'weight': 1, 'score': 0, 'signal': '🟡 Fair Valued', 'severity': 'Hold', 'color': 'yellow', 'reasoning': 'Reasonable sales multiple'},
+                {'status': 0, 'weight': 1, 'score': 0, 'signal': '🟡 Moderately Valued', 'severity': 'Hold', 'color': 'yellow', 'reasoning': 'Moderate premium'},
+                {'status': 1, 'weight': 1, 'score': 1, 'signal': '🟠 Overvalued', 'severity': 'Sell', 'color': 'orange', 'reasoning': 'Elevated sales multiple'},
+                {'status': 1, 'weight': 2, 'score': 2, 'signal': '🔴 Heavily Overvalued', 'severity': 'Strong Sell', 'color': 'red', 'reasoning': 'Excessive sales multiple'},
+            ]
+        },
+        'EV/EBITDA': {
+            'edges': [8, 12, 15, 20],
+            'bands': [
+                {'status': -1, 'weight': 1, 'score': -2, 'signal': '🟢 Undervalued', 'severity': 'Strong Buy', 'color': 'green', 'reasoning': 'Low EBITDA multiple'},
+                {'status': 0, 'weight': 1, 'score': 0, 'signal': '🟡 Fair Valued', 'severity': 'Hold', 'color': 'yellow', 'reasoning': 'Historical average multiple'},
+                {'status': 0, 'weight': 1, 'score': 0, 'signal': '🟡 Moderately Valued', 'severity': 'Hold', 'color': 'yellow', 'reasoning': 'Above average multiple'},
+                {'status': 1, 'weight': 1, 'score': 1, 'signal': '🟠 Overvalued', 'severity': 'Sell', 'color': 'orange', 'reasoning': 'Premium EBITDA multiple'},
+                {'status': 1, 'weight': 2, 'score': 2, 'signal': '🔴 Heavily Overvalued', 'severity': 'Strong Sell', 'color': 'red', 'reasoning': 'Very high EBITDA multiple'},
+            ]
+        },
+    },
+
+    # Risk flags raised by RelativeValuation.calculate_*
+    'flag': {
+        'P/E': {'edges': [12, 25], 'strict': [False, True], 'bands': ["P/E suggests undervaluation", None, "P/E suggests overvaluation"]},
+        'P/B': {'edges': [1, 3], 'strict': [False, True], 'bands': ["P/B suggests deep value opportunity", None, "P/B suggests potential overvaluation"]},
+        'EV/EBITDA': {'edges': [8, 15], 'strict': [False, True], 'bands': ["EV/EBITDA suggests undervaluation", None, "EV/EBITDA suggests overvaluation"]},
+        'PEG': {'edges': [1, 1.5], 'strict': [False, True], 'bands': ["PEG suggests undervaluation for growth rate", None, "PEG suggests overvaluation for growth rate"]},
+    },
+
+    # Points added to RelativeValuation.get_valuation_score (neutral = 50)
+    'score': {
+        'P/E': {'edges': [15, 25], 'strict': [False, True], 'bands': [10, 0, -10]},
+        'P/B': {'edges': [1, 3], 'strict': [False, True], 'bands': [15, 0, -10]},
+        'P/S': {'edges': [1, 3], 'strict': [False, True], 'bands': [10, 0, -10]},
+        'EV/EBITDA': {'edges': [8, 15], 'strict': [False, True], 'bands': [10, 0, -10]},
+        'PEG': {'edges': [1], 'bands': [10, 0]},
+    },
+
+    # Stock multiple relative to the sector average, in % (compare_multiples)
+    'relative': {
+        'multiple': {
+            'edges': [-15, -5, 5, 15],
+            'bands': ["Significantly Undervalued", "Moderately Undervalued", "Fair Valued",
+                      "Moderately Overvalued", "Significantly Overvalued"]
+        },
+    },
+
+    # Implied-price upside in % (get_valuation_summary)
+    'upside': {
+        'implied': {'edges': [-5, 5], 'strict': [False, True], 'bands': ['Overvalued', 'Fair Valued', 'Undervalued']},
+    },
+}
+
+# Per-sector overrides: sector -> scale -> metric -> {'edges': [...]}
+# ('bands' and 'strict' may be given too; otherwise the defaults are kept,
+# so the override must have the same number of edges). Empty by default; add
+# entries here or in the NIFTY_THRESHOLDS_FILE JSON.
+SECTOR_THRESHOLDS = {}
+
+
+# ============================================================================
+# 2. COMPILED TABLE
+# ============================================================================
+
+class Bands:
+    """
+    One compiled scale/metric entry
+
+    edges: sorted float64 array of bin edges (for np.searchsorted)
+    bands: band payloads, len(edges) + 1 of them
+    strict: bool array, True where a value on the edge stays in the band below
+    """
+
+    __slots__ = ('edges', 'bands', 'strict', '_edge_list', '_strict_list', '_fields')
+
+    def __init__(self, edges, bands, strict=None):
+        edges = [float(e) for e in edges]
+        strict = [False] * len(edges) if strict is None else [bool(s) for s in strict]
+        if edges != sorted(edges):
+            raise ValueError(f"Threshold edges must be sorted: {edges}")
+        if len(bands) != len(edges) + 1:
+            raise ValueError(f"Expected {len(edges) + 1} bands for edges {edges}, got {len(bands)}")
+        if len(strict) != len(edges):
+            raise ValueError(f"Expected {len(edges)} strict flags for edges {edges}, got {len(strict)}")
+
+        self.edges = np.array(edges, dtype=np.float64)
+        self.bands = list(bands)
+        self.strict = np.array(strict, dtype=bool)
+        self._edge_list = edges
+        self._strict_list = strict
+        self._fields = {}
+
+    def band(self, value):
+        """Band index of one value (single bisect)"""
+        i = bisect.bisect_right(self._edge_list, value)
+        if i and self._strict_list[i - 1] and self._edge_list[i - 1] == value:
+            i -= 1
+        return i
+
+    def classify(self, value):
+        """Band payload of one value"""
+        return self.bands[self.band(value)]
+
+    def band_array(self, values):
+        """Band index of every value (single np.searchsorted)"""
+        index = np.searchsorted(self.edges, values, side='right')
+        if self.strict.any():
+            below = np.maximum(index - 1, 0)
+            index = index - ((index > 0) & self.strict[below] & (self.edges[below] == values))
+        return index
+
+    def field(self, name):
+        """Array of one payload field indexed by band (bands must be dicts)"""
+        if name not in self._fields:
+            self._fields[name] = np.array([band[name] for band in self.bands])
+        return self._fields[name]
+
+
+class ThresholdTable:
+    """Threshold table compiled once into Bands per (scale, metric, sector)"""
+
+    def __init__(self, thresholds=None, sector_thresholds=None):
+        thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+        sector_thresholds = SECTOR_THRESHOLDS if sector_thresholds is None else sector_thresholds
+
+        self._bands = {}
+        for scale, metrics in thresholds.items():
+            for metric, spec in metrics.items():
+                self._bands[(scale, metric, None)] = Bands(spec['edges'], spec['bands'], spec.get('strict'))
+
+        for sector, scales in sector_thresholds.items():
+            for scale, metrics in scales.items():
+                for metric, spec in metrics.items():
+                    default = self._bands[(scale, metric, None)]
+                    self._bands[(scale, metric, sector)] = Bands(spec['edges'], spec.get('bands', default.bands),
+                                                                 spec.get('strict', default.strict))
+
+    def get(self, scale, metric, sector=None):
+        """Compiled Bands for a metric, using the sector override if any"""
+        bands = self._bands.get((scale, metric, sector))
+        if bands is None:
+            bands = self._bands[(scale, metric, None)]
+        return bands
+
+    def metrics(self, scale):
+        """Metrics defined on a scale"""
+        return [metric for (s, metric, sector) in self._bands if s == scale and sector is None]
+
+    def sectors(self, scale, metric):
+        """Sectors with their own edges for a scale/metric"""
+        return [sector for (s, m, sector) in self._bands if s == scale and m == metric and sector is not None]
+
+    def classify(self, scale, metric, value, sector=None):
+        """Band payload of one value"""
+        return self.get(scale, metric, sector).classify(value)
+
+
+def load_thresholds(path=None):
+    """
+    Build the ThresholdTable, applying a JSON override file if present
+
+    The file may contain 'thresholds' (merged per scale/metric over
+    DEFAULT_THRESHOLDS) and 'sectors' (per-sector overrides).
+    """
+    path = path or os.environ.get('NIFTY_THRESHOLDS_FILE')
+    if not path:
+        return ThresholdTable()
+
+    with open(path) as f:
+        overrides = json.load(f)
+
+    thresholds = {scale: dict(metrics) for scale, metrics in DEFAULT_THRESHOLDS.items()}
+    for scale, metrics in overrides.get('thresholds', {}).items():
+        for metric, spec in metrics.items():
+            default = thresholds.get(scale, {}).get(metric, {})
+            thresholds.setdefault(scale, {})[metric] = {**default, **spec}
+
+    sectors = {**SECTOR_THRESHOLDS, **overrides.get('sectors', {})}
+    return ThresholdTable(thresholds, sectors)
+
+
+# Loaded once at import; every classifier in the model reads from this
+THRESHOLDS = load_thresholds()
+
+
+# Example usage
+if __name__ == "__main__":
+
+    print("P/E 14 ->", THRESHOLDS.classify('signal', 'P/E', 14)['signal'])
+    print("P/B 0.9 ->", THRESHOLDS.classify('flag', 'P/B', 0.9))
+    print("Upside 12% ->", THRESHOLDS.classify('upside', 'implied', 12))
+
+    pe = np.array([8.0, 13.0, 18.0, 25.0, 45.0])
+    bands = THRESHOLDS.get('signal', 'P/E').band_array(pe)
+    print("P/E bands:", bands, "status:", THRESHOLDS.get('signal', 'P/E').field('status')[bands])